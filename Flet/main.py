@@ -1,24 +1,35 @@
+import sys
+import os
+from src.startup import StartupProfiler, LazyModule
+
+# --profile-startup prints where startup time went once the first view is up
+profiler = StartupProfiler(enabled="--profile-startup" in sys.argv)
+profiler.start()
+
 import flet as ft
 import time
-import s2t.s2t as s2t
 import threading
 import asyncio
-from src.OllamaBackend import CanaryTopicModel,base_model
-from src.question_generator import QuestionGenerator
-from ollama import chat
+import atexit
+from src.response_cache import ResponseCache, cached_async_chat, deterministic_options
+from src.llm_config import KEEP_ALIVE
+from src.study_timer import StudyTimer
 from pydantic import BaseModel
-import sys
-import os
 
 # Suppress pygame welcome message
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 sys.path.append(os.path.join(os.path.dirname(__file__), 't2s'))
-import t2s as t2s
-import pygame
+
+# Heavy subsystems are imported on first use, or by the warm-up after the first view is shown
+s2t = LazyModule("s2t.s2t", profiler)  # faster_whisper, sounddevice
+t2s = LazyModule("t2s", profiler)  # pygame, piper
+ollama = LazyModule("ollama", profiler)
+llm_backend = LazyModule("src.OllamaBackend", profiler)
 
 from storage.data.DB.DB_API import TopicsDB
+from storage.data.DB import srs
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-from simple_spider_graph import get_radar_chart_path
+from simple_spider_graph import ChartCache, CHARTS
 
 # -- Theme & Constants -- #
 BG_COLOR = "#4a4a4a"
@@ -28,11 +39,32 @@ TEXT_COLOR = "#f5f5f5"
 BLACK_TEXT = "#2e2e2e"
 FONT_FAMILY = "Cairo"
 TOPIC_NAME = "Baye's theorem"
+# Opt-in: pin temperature/seed for question generation so repeat requests are served from the cache.
+# Off, every request asks the model for a fresh question and the cache is not used.
+DETERMINISTIC_QUESTIONS = False
+# Minimum seconds between TextField refreshes while a reply is streaming in
+STREAM_UPDATE_INTERVAL = 0.05
+# Due flashcards fetched per query while studying
+DUE_BATCH_SIZE = 20
+# Flashcards fetched per page in the deck list, and how close to the bottom (px) the next page is loaded
+FLASHCARD_PAGE_SIZE = 50
+FLASHCARD_SCROLL_MARGIN = 300
 
 # Global state
 tts_playing = False
 tts_thread = None
-topics_db = TopicsDB()
+with profiler.step("open database"):
+    topics_db = TopicsDB()
+# Study time per topic and activity, written to topics_db in batches
+study_timer = StudyTimer(topics_db)
+atexit.register(study_timer.close)
+# Last render of each study chart, shown straight away and re-rendered in the background when the data changes
+with profiler.step("load cached charts"):
+    study_charts = {kind: ChartCache(topics_db, kind) for kind in CHARTS}
+# Created on first use, so ollama isn't imported before it's needed
+llm_client = None
+with profiler.step("open response cache"):
+    llm_cache = ResponseCache()
 
 # -- Pydantic Models -- #
 class Question(BaseModel):
@@ -104,14 +136,20 @@ def main(page: ft.Page):
     recording_state = {"is_recording": False}
     progress_ring = ft.Ref[ft.ProgressRing]()
     progress_bar_timer = {"thread": None, "stop": False}
-    canary_model = CanaryTopicModel(base_model=base_model, topic=TOPIC_NAME)
-    question_generator = QuestionGenerator()
+    canary_model = None
+    question_generator = None
+    warmup = None
     last_canary_response = ""
     tts_playing = False
+    current_speech = None
     current_topic_id = None
     current_topic_name = TOPIC_NAME
     notes_field = ft.Ref[ft.TextField]()
     last_notes = ""
+
+    # File dialog shared by flashcard deck import and export
+    deck_picker = ft.FilePicker()
+    page.overlay.append(deck_picker)
     
     # Response field
     canary_response = ft.TextField(
@@ -127,10 +165,44 @@ def main(page: ft.Page):
     canary_loading = ft.ProgressRing(visible=False, width=20, height=20)
 
     # -- Core Functions -- #
+    def get_canary_model():
+        nonlocal canary_model
+        if canary_model is None:
+            canary_model = llm_backend.AsyncCanaryTopicModel(base_model=llm_backend.base_model, topic=current_topic_name)
+        return canary_model
+
+    async def ensure_loaded(*modules):
+        # Import lazy subsystems off the event loop, so a click before the warm-up finishes doesn't freeze the UI
+        await asyncio.to_thread(lambda: [module.load() for module in modules])
+
+    def get_llm_client():
+        global llm_client
+        if llm_client is None:
+            llm_client = ollama.AsyncClient()
+        return llm_client
+
+    def start_warmup():
+        # Load every model in the background so the first interaction never hits a cold model
+        nonlocal question_generator, warmup
+        try:
+            from src.question_generator import AsyncQuestionGenerator
+            from src.warmup import ModelWarmup
+            question_generator = AsyncQuestionGenerator(cache=llm_cache if DETERMINISTIC_QUESTIONS else None,
+                                                        deterministic=DETERMINISTIC_QUESTIONS)
+            warmup = ModelWarmup(keep_alive=KEEP_ALIVE)
+            warmup.add_ollama_model(llm_backend.base_model)
+            warmup.add_ollama_model(question_generator.model_name)
+            warmup.add("whisper", lambda: s2t.get_model())
+            warmup.add("piper", lambda: t2s.get_engine())
+            warmup.start()
+        except Exception as e:
+            print(f"[Warmup] Error: {e}")
+
     def update_canary_topic(new_topic):
         nonlocal current_topic_name
         current_topic_name = new_topic
-        canary_model.set_topic(new_topic)
+        if canary_model is not None:
+            canary_model.set_topic(new_topic)
 
     def create_new_topic_from_input(topic_name: str):
         if not topic_name.strip():
@@ -204,45 +276,44 @@ def main(page: ft.Page):
             print(f"[Database] Error: {e}")
             return {'total_topics': 0, 'topics_today': 0, 'total_study_time': 0, 'average_study_time': 0, 'study_streak': 0, 'most_studied_topic': None, 'recent_topics': []}
 
-    def generate_spider_graph():
-        try:
-            graph_path = get_radar_chart_path()
-            return graph_path if graph_path and os.path.exists(graph_path) else None
-        except Exception as e:
-            print(f"[Spider Graph] Error: {e}")
-            return None
+    def show_spider_graph(image, chart_image):
+        # Fall back to the logo until there is enough study time to chart
+        chart_image.src_base64 = image
+        chart_image.src = None if image else r"storage\data\img\BigLogo.png"
 
     # -- TTS Functions -- #
+    def start_speech():
+        """Stop any current speech and return a new pipeline that speaks text as it is fed."""
+        nonlocal tts_playing, current_speech
+        stop_speech()
+
+        def on_done():
+            nonlocal tts_playing
+            if current_speech is speech:
+                tts_playing = False
+
+        speech = t2s.SpeechPipeline(on_done=on_done)
+        current_speech = speech
+        tts_playing = True
+        return speech
+
     def speak_text(text):
-        nonlocal tts_playing
-        if tts_playing:
-            stop_speech()
-        try:
-            tts_playing = True
-            tts_thread = threading.Thread(target=run_tts, args=(text,), daemon=True)
-            tts_thread.start()
-        except Exception as e:
-            print(f"[TTS] Error: {e}")
-            tts_playing = False
-    
-    def run_tts(text):
         try:
-            asyncio.run(t2s.t2s(text))
+            speech = start_speech()
+            speech.feed(text)
+            speech.finish()
         except Exception as e:
             print(f"[TTS] Error: {e}")
-        finally:
-            nonlocal tts_playing
-            tts_playing = False
+            stop_speech()
     
     def stop_speech():
         nonlocal tts_playing
-        if tts_playing:
+        if current_speech is not None and current_speech.is_active():
             try:
-                pygame.mixer.music.stop()
-                pygame.mixer.quit()
-                tts_playing = False
+                current_speech.stop()
             except Exception as e:
                 print(f"[TTS] Error: {e}")
+        tts_playing = False
 
     # -- Recording Functions -- #
     def update_progress_ring():
@@ -259,87 +330,109 @@ def main(page: ft.Page):
             progress_ring.current.value = 0
             progress_ring.current.update()
 
-    def on_transcription(result):
-        canary_response.value = result
-        canary_response.update()
+    async def stream_into_field(field, chunks, on_chunk=None):
+        """Append streamed chunks to a TextField, refreshing at most every STREAM_UPDATE_INTERVAL."""
+        started = time.perf_counter()
+        last_flush = None
+        text = ""
+        async for chunk in chunks:
+            text += chunk
+            if on_chunk:
+                on_chunk(chunk)
+            now = time.perf_counter()
+            # The first chunk is shown immediately; later ones are coalesced into periodic refreshes
+            if last_flush is None:
+                print(f"[Canary] First token visible after {now - started:.2f}s")
+            if last_flush is None or now - last_flush >= STREAM_UPDATE_INTERVAL:
+                field.value = text
+                field.update()
+                last_flush = now
+        field.value = text
+        field.update()
+        return text
+
+    async def respond_to_explanation(result):
         canary_loading.visible = True
         canary_loading.update()
         
+        await ensure_loaded(t2s, llm_backend)
+        # Speech starts with the first complete sentence while the rest is still generating
+        speech = start_speech()
         try:
-            canary_learning_response = canary_model.generate_response(result)
-            canary_response.value = canary_learning_response
-            canary_response.update()
+            canary_learning_response = await stream_into_field(canary_response, get_canary_model().stream_response(result), on_chunk=speech.feed)
+            speech.finish()
             nonlocal last_canary_response
             last_canary_response = canary_learning_response
-            speak_text(canary_learning_response)
         except Exception as e:
             print(f"[Canary] Error: {e}")
-            try:
-                fallback_response = canary_model.stream_response(result)
-                canary_response.value = fallback_response
-                canary_response.update()
-                speak_text(fallback_response)
-            except Exception as fallback_error:
-                print(f"[Fallback] Error: {fallback_error}")
+            speech.stop()
+            canary_response.value = "Error generating response. Please try again."
+            canary_response.update()
         finally:
             canary_loading.visible = False
             canary_loading.update()
+            study_timer.touch()
+
+    def on_transcription(result):
+        # Called from the s2t auto-stop thread; hand the LLM work to the page's event loop
+        recording_state["is_recording"] = False
+        progress_bar_timer["stop"] = True
+        canary_response.value = result
+        canary_response.update()
+        page.run_task(respond_to_explanation, result)
     
-    s2t.set_on_transcription_callback(on_transcription)
+    s2t.on_load(lambda module: module.set_on_transcription_callback(on_transcription))
+
+    def on_partial_transcription(text):
+        # Show what has been heard so far while the student is still talking
+        canary_response.value = text
+        canary_response.update()
+
+    s2t.on_load(lambda module: module.set_on_partial_transcription_callback(on_partial_transcription))
 
-    def toggle_recording(e=None):
+    async def toggle_recording(e=None):
         if recording_state["is_recording"]:
-            result = s2t.stop_recording_and_transcribe()
+            # Transcription is CPU-bound; keep it off the event loop
+            result = await asyncio.to_thread(s2t.stop_recording_and_transcribe)
             recording_state["is_recording"] = False
             progress_bar_timer["stop"] = True
-            canary_loading.visible = True
-            canary_loading.update()
-            
-            try:
-                canary_learning_response = canary_model.generate_response(result)
-                canary_response.value = canary_learning_response
-                canary_response.update()
-                nonlocal last_canary_response
-                last_canary_response = canary_learning_response
-                speak_text(canary_learning_response)
-            except Exception as e:
-                print(f"[Canary] Error: {e}")
-                try:
-                    fallback_response = canary_model.stream_response(result)
-                    canary_response.value = fallback_response
-                    canary_response.update()
-                    speak_text(fallback_response)
-                except Exception as fallback_error:
-                    print(f"[Fallback] Error: {fallback_error}")
-            finally:
-                canary_loading.visible = False
-                canary_loading.update()
+            await respond_to_explanation(result)
         else:
-            started = s2t.start_recording()
+            # The first recording may still have to import faster-whisper
+            started = await asyncio.to_thread(s2t.start_recording)
             if not started:
                 return
+            study_timer.start(current_topic_id, "speaking")
             recording_state["is_recording"] = True
             progress_bar_timer["stop"] = False
             t = threading.Thread(target=update_progress_ring, daemon=True)
             progress_bar_timer["thread"] = t
             t.start()
 
-    def generate_question(e):
+    async def fetch_mcq_question() -> Question:
+        # Only pinned requests are cached; otherwise the same topic would get the same question forever
+        options = deterministic_options() if DETERMINISTIC_QUESTIONS else None
+        await ensure_loaded(ollama)
+        content = await cached_async_chat(
+            get_llm_client(),
+            llm_cache if DETERMINISTIC_QUESTIONS else None,
+            model='gemma3n:e2b-it-q4_K_M',
+            messages=[{
+                'role': 'user', 
+                'content': f'Generate a single multiple choice question about {current_topic_name} with 4 options (A, B, C, D) and explanation.'
+            }],
+            options=options,
+            format=Question.model_json_schema(),
+            keep_alive=KEEP_ALIVE,
+        )
+        return Question.model_validate_json(content)
+
+    async def generate_question(e):
         try:
             canary_loading.visible = True
             canary_loading.update()
             
-            response = chat(
-                model='gemma3n:e2b-it-q4_K_M',
-                messages=[{
-                    'role': 'user', 
-                    'content': f'Generate a single multiple choice question about {current_topic_name} with 4 options (A, B, C, D) and explanation.'
-                }],
-                stream=False,
-                format=Question.model_json_schema(),
-            )
-            
-            question = Question.model_validate_json(response['message']['content'])
+            question = await fetch_mcq_question()
             question_text = f"Question: {question.question}\n\nOptions:\n"
             for i, option in enumerate(['A', 'B', 'C', 'D']):
                 question_text += f"{option}. {question.options[i]}\n"
@@ -350,6 +443,7 @@ def main(page: ft.Page):
             
             # Only speak if TTS is not stopped
             if not tts_playing:
+                await ensure_loaded(t2s)
                 speak_text(question_text)
             
         except Exception as e:
@@ -361,9 +455,52 @@ def main(page: ft.Page):
             canary_loading.update()
 
     # -- Views -- #
+    def update_if_shown(control):
+        # Views fill in after they are returned; skip controls whose view has been left meanwhile
+        if control.page:
+            try:
+                control.update()
+            except Exception as e:
+                print(f"[View] Error: {e}")
+
     def create_topics_view():
-        stats = get_statistics()
-        recent_topics = topics_db.get_recent_topics(5)
+        # The view is returned as a skeleton; statistics, recent topics and the chart fill in as each is ready.
+        # Queries run on the event loop's worker pool (asyncio.to_thread) and controls are only touched from the loop.
+        chart_image = ft.Image(width=400, height=300, fit=ft.ImageFit.CONTAIN)
+        chart_title = ft.Text(size=20, color=TEXT_COLOR, font_family="Courgette-Regular", weight=ft.FontWeight.BOLD)
+        chart_kind = {"value": "radar"}
+        
+        def show_chart(kind):
+            chart_kind["value"] = kind
+            chart = study_charts[kind]
+            chart_title.value = chart.title
+            show_spider_graph(chart.image, chart_image)
+            
+            async def apply_chart(image):
+                # Ignore renders for a chart that is no longer selected
+                if chart_kind["value"] != kind:
+                    return
+                show_spider_graph(image, chart_image)
+                update_if_shown(chart_image)
+            
+            # Called on the render thread; the control itself is only changed from the page's event loop
+            chart.refresh(lambda image: page.run_task(apply_chart, image))
+        
+        def select_chart(e):
+            show_chart(next(iter(e.control.selected)))
+            chart_title.update()
+            chart_image.update()
+        
+        chart_selector = ft.SegmentedButton(
+            segments=[
+                ft.Segment(value="radar", label=ft.Text("Topics")),
+                ft.Segment(value="daily", label=ft.Text("Daily")),
+                ft.Segment(value="weekly", label=ft.Text("Weekly")),
+            ],
+            selected={"radar"},
+            on_change=select_chart,
+        )
+        show_chart("radar")
         
         topic_name_input = ft.TextField(
             label="Name of topic to study",
@@ -381,8 +518,32 @@ def main(page: ft.Page):
                 topic_name_input.value = ""
                 topic_name_input.update()
         
-        recent_topics_list = []
-        if recent_topics:
+        recent_topics_column = ft.Column(
+            [ft.Container(ft.ProgressRing(width=24, height=24, color=BLACK_TEXT), alignment=ft.alignment.center, padding=20)],
+            spacing=5, scroll=ft.ScrollMode.AUTO, height=200,
+        )
+        
+        async def load_recent_topics():
+            try:
+                recent_topics = await asyncio.to_thread(topics_db.get_recent_topics, 5)
+            except Exception as e:
+                print(f"[Database] Error: {e}")
+                recent_topics = []
+            recent_topics_column.controls = build_recent_topics_list(recent_topics)
+            update_if_shown(recent_topics_column)
+        
+        def build_recent_topics_list(recent_topics):
+            recent_topics_list = []
+            if not recent_topics:
+                recent_topics_list.append(
+                    ft.Container(
+                        ft.Text("No topics created yet", color=BLACK_TEXT, size=16),
+                        padding=10,
+                        bgcolor=TEXT_FIELD_BG,
+                        border_radius=8,
+                        width=300
+                    )
+                )
             for topic in recent_topics:
                 topic_container = ft.Container(
                     ft.Row([
@@ -404,16 +565,27 @@ def main(page: ft.Page):
                     margin=ft.margin.only(bottom=10)
                 )
                 recent_topics_list.append(topic_container)
-        else:
-            recent_topics_list.append(
-                ft.Container(
-                    ft.Text("No topics created yet", color=BLACK_TEXT, size=16),
-                    padding=10,
-                    bgcolor=TEXT_FIELD_BG,
-                    border_radius=8,
-                    width=300
-                )
-            )
+            return recent_topics_list
+        
+        # Statistics start as placeholders
+        stat_labels = {
+            'topics_today': lambda v: f"Topics created today: {v}",
+            'total_topics': lambda v: f"Total topics: {v}",
+            'study_streak': lambda v: f"Study streak: {v} days",
+            'average_study_time': lambda v: f"Average study time: {v} min",
+            'most_studied_topic': lambda v: f"Most studied topic: {v or 'None'}",
+            'total_study_time': lambda v: f"Total study time: {v} min",
+        }
+        stat_texts = {key: ft.Text(label("…"), color=BLACK_TEXT, size=24) for key, label in stat_labels.items()}
+        
+        async def load_statistics():
+            stats = await asyncio.to_thread(get_statistics)
+            for key, label in stat_labels.items():
+                stat_texts[key].value = label(stats[key])
+                update_if_shown(stat_texts[key])
+        
+        page.run_task(load_statistics)
+        page.run_task(load_recent_topics)
         
         return ft.View(
             "/",
@@ -449,7 +621,7 @@ def main(page: ft.Page):
                                 content=ft.Column([
                                     ft.Text("Recent topics", size=36, color=TEXT_COLOR, font_family="Courgette-Regular"),
                                     ft.Container(
-                                        content=ft.Column(recent_topics_list, spacing=5, scroll=ft.ScrollMode.AUTO, height=200),
+                                        content=recent_topics_column,
                                         padding=10,
                                         bgcolor=CONTAINER_BG,
                                         border_radius=8,
@@ -466,14 +638,10 @@ def main(page: ft.Page):
                         # Study Time Distribution Graph (moved under Recent Topics)
                         ft.Container(
                             content=ft.Column([
-                                ft.Text("Study Time Distribution (Last 7 Days)", size=20, color=TEXT_COLOR, font_family="Courgette-Regular", weight=ft.FontWeight.BOLD),
+                                chart_title,
+                                chart_selector,
                                 ft.Container(
-                                    content=ft.Image(
-                                        src=generate_spider_graph() or r"storage\data\img\BigLogo.png",
-                                        width=400,
-                                        height=300,
-                                        fit=ft.ImageFit.CONTAIN,
-                                    ),
+                                    content=chart_image,
                                     padding=10,
                                     bgcolor=TEXT_FIELD_BG,
                                     border_radius=8,
@@ -495,8 +663,8 @@ def main(page: ft.Page):
                                     ft.Row([
                                         ft.Container(
                                             content=ft.Column([
-                                                ft.Text(f"Topics created today: {stats['topics_today']}", color=BLACK_TEXT, size=24),
-                                                ft.Text(f"Total topics: {stats['total_topics']}", color=BLACK_TEXT, size=24),
+                                                stat_texts['topics_today'],
+                                                stat_texts['total_topics'],
                                             ], spacing=8),
                                             padding=15,
                                             bgcolor="#e8e8e8",  # Light square
@@ -505,8 +673,8 @@ def main(page: ft.Page):
                                         ),
                                         ft.Container(
                                             content=ft.Column([
-                                                ft.Text(f"Study streak: {stats['study_streak']} days", color=BLACK_TEXT, size=24),
-                                                ft.Text(f"Average study time: {stats['average_study_time']} min", color=BLACK_TEXT, size=24),
+                                                stat_texts['study_streak'],
+                                                stat_texts['average_study_time'],
                                             ], spacing=8),
                                             padding=15,
                                             bgcolor="#d0d0d0",  # Dark square
@@ -517,8 +685,8 @@ def main(page: ft.Page):
                                     ft.Row([
                                         ft.Container(
                                             content=ft.Column([
-                                                ft.Text(f"Most studied topic: {stats['most_studied_topic'] or 'None'}", color=BLACK_TEXT, size=24),
-                                                ft.Text(f"Total study time: {stats['total_study_time']} min", color=BLACK_TEXT, size=24),
+                                                stat_texts['most_studied_topic'],
+                                                stat_texts['total_study_time'],
                                             ], spacing=8),
                                             padding=15,
                                             bgcolor="#d0d0d0",  # Dark square
@@ -602,10 +770,10 @@ def main(page: ft.Page):
                 ]) if loading else ft.Image(src=r"storage\data\img\mic.png", width=50, height=50)
                 mic_button_ref.current.update()
         
-        def generate_question_with_loading(e):
+        async def generate_question_with_loading(e):
             update_question_button_loading(True)
             try:
-                generate_question(e)
+                await generate_question(e)
             finally:
                 update_question_button_loading(False)
         
@@ -623,13 +791,22 @@ def main(page: ft.Page):
             finally:
                 update_flashcards_button_loading(False)
         
-        def toggle_recording_with_loading(e):
+        async def toggle_recording_with_loading(e):
             update_mic_button_loading(True)
             try:
-                toggle_recording(e)
+                await toggle_recording(e)
             finally:
                 update_mic_button_loading(False)
         
+        streak_text = ft.Text("Streak: …", weight=ft.FontWeight.BOLD, color=BLACK_TEXT, font_family="Courgette-Regular")
+        
+        async def load_streak():
+            stats = await asyncio.to_thread(get_statistics)
+            streak_text.value = f"Streak: {stats['study_streak']}"
+            update_if_shown(streak_text)
+        
+        page.run_task(load_streak)
+        
         return ft.View(
             "/main",
             bgcolor=BG_COLOR,
@@ -642,7 +819,7 @@ def main(page: ft.Page):
                     ft.Container(
                         content=ft.Row([
                             ft.Image(src=r"storage\data\img\Fire.png", width=32, height=32),
-                            ft.Text(f"Streak: {get_statistics()['study_streak']}", weight=ft.FontWeight.BOLD, color=BLACK_TEXT, font_family="Courgette-Regular")
+                            streak_text
                         ]),
                         padding=ft.padding.symmetric(horizontal=20, vertical=15),
                     )
@@ -764,20 +941,10 @@ def main(page: ft.Page):
         quiz_loading = ft.ProgressRing(visible=True, width=30, height=30)
         quiz_content = ft.Ref[ft.Container]()
         
-        def load_quiz():
+        async def load_quiz():
             try:
                 # Generate a single question like the generate_question function
-                response = chat(
-                    model='gemma3n:e2b-it-q4_K_M',
-                    messages=[{
-                        'role': 'user', 
-                        'content': f'Generate a single multiple choice question about {current_topic_name} with 4 options (A, B, C, D) and explanation.'
-                    }],
-                    stream=False,
-                    format=Question.model_json_schema(),
-                )
-                
-                question = Question.model_validate_json(response['message']['content'])
+                question = await fetch_mcq_question()
                 selected_answer = ft.Ref[ft.RadioGroup]()
                 score_display = ft.Ref[ft.Text]()
 
@@ -802,6 +969,7 @@ def main(page: ft.Page):
                     )
 
                 def submit_quiz(e):
+                    study_timer.touch()
                     selected = selected_answer.current.value if selected_answer.current else None
                     is_correct = selected and selected.lower() == question.correct_answer.lower()
                     
@@ -849,8 +1017,8 @@ def main(page: ft.Page):
                     quiz_content.current.content = ft.Text("Error loading quiz. Please try again.", color=TEXT_COLOR, size=20)
                     quiz_content.current.update()
         
-        # Start loading quiz in background
-        threading.Thread(target=load_quiz, daemon=True).start()
+        # Start loading quiz on the page's event loop
+        page.run_task(load_quiz)
         
         return ft.View(
             "/quiz",
@@ -880,15 +1048,8 @@ def main(page: ft.Page):
         flashcards_loading = ft.ProgressRing(visible=True, width=30, height=30)
         flashcards_content = ft.Ref[ft.Container]()
         
-        def load_flashcards():
+        async def load_flashcards():
             try:
-                # Get existing flashcards for the current topic
-                existing_flashcards = []
-                try:
-                    existing_flashcards = topics_db.get_flashcards_by_topic(current_topic_id) if current_topic_id else []
-                except:
-                    existing_flashcards = []
-                
                 # Create input fields for new flashcard
                 question_input = ft.TextField(
                     label="Question", 
@@ -907,32 +1068,70 @@ def main(page: ft.Page):
                     text_style=ft.TextStyle(color=BLACK_TEXT)
                 )
                 
-                # Create a list view for existing flashcards
+                # Create a list view for existing flashcards; pages are added as it scrolls near the bottom
                 flashcards_list = ft.ListView(
                     spacing=10,
                     auto_scroll=False,
                     height=400,
                 )
+                list_state = {"after_id": 0, "done": current_topic_id is None, "loading": False}
+                
+                def flashcard_tile(question, answer):
+                    return ft.Container(
+                        content=ft.Column([
+                            ft.Text(f"Q: {question}", size=20, color=BLACK_TEXT, font_family=FONT_FAMILY, weight=ft.FontWeight.BOLD),
+                            ft.Text(f"A: {answer}", size=20, color=BLACK_TEXT, font_family=FONT_FAMILY),
+                        ], spacing=5),
+                        padding=15,
+                        bgcolor=TEXT_FIELD_BG,
+                        border_radius=8,
+                        margin=ft.margin.only(bottom=10)
+                    )
+                
+                async def load_next_page() -> bool:
+                    # Returns True if cards were added; scroll events that arrive mid-load are dropped.
+                    # Runs on the page's event loop, so the flags need no lock; the query goes to the loop's worker pool.
+                    if list_state["done"] or list_state["loading"]:
+                        return False
+                    list_state["loading"] = True
+                    try:
+                        cards = await asyncio.to_thread(
+                            topics_db.get_flashcards_page, current_topic_id, list_state["after_id"], FLASHCARD_PAGE_SIZE
+                        )
+                        if len(cards) < FLASHCARD_PAGE_SIZE:
+                            list_state["done"] = True
+                        if cards:
+                            list_state["after_id"] = int(cards[-1]['id'])
+                        flashcards_list.controls.extend(flashcard_tile(card['question'], card['answer']) for card in cards)
+                        return bool(cards)
+                    except Exception as e:
+                        print(f"[Flashcards Loading] Error: {e}")
+                        return False
+                    finally:
+                        list_state["loading"] = False
+                
+                async def on_list_scroll(e: ft.OnScrollEvent):
+                    if e.pixels >= e.max_scroll_extent - FLASHCARD_SCROLL_MARGIN and await load_next_page():
+                        flashcards_list.update()
+                
+                flashcards_list.on_scroll = on_list_scroll
                 
                 def add_flashcard(e):
+                    nonlocal card_count
+                    study_timer.touch()
                     question_text = question_input.value
                     answer_text = answer_input.value
                     if question_text.strip() and answer_text.strip():
                         try:
-                            topics_db.add_flashcard(current_topic_id, question_text.strip(), answer_text.strip())
-                            # Add new flashcard to the list
-                            new_card = ft.Container(
-                                content=ft.Column([
-                                    ft.Text(f"Q: {question_text.strip()}", size=20, color=BLACK_TEXT, font_family=FONT_FAMILY, weight=ft.FontWeight.BOLD),
-                                    ft.Text(f"A: {answer_text.strip()}", size=20, color=BLACK_TEXT, font_family=FONT_FAMILY),
-                                ], spacing=5),
-                                padding=15,
-                                bgcolor=TEXT_FIELD_BG,
-                                border_radius=8,
-                                margin=ft.margin.only(bottom=10)
-                            )
-                            flashcards_list.controls.append(new_card)
-                            flashcards_list.update()
+                            new_card = topics_db.add_flashcard(current_topic_id, question_text.strip(), answer_text.strip())
+                            # Add new flashcard to the list once every earlier page is shown; until then a later page brings it in
+                            if list_state["done"]:
+                                flashcards_list.controls.append(flashcard_tile(question_text.strip(), answer_text.strip()))
+                                list_state["after_id"] = int(new_card['id'])
+                                flashcards_list.update()
+                            card_count += 1
+                            list_title.value = f"Your Flashcards ({card_count})"
+                            list_title.update()
                             
                             # Clear inputs
                             question_input.value = ""
@@ -953,23 +1152,46 @@ def main(page: ft.Page):
                         page.snack_bar.open = True
                         page.update()
                 
-                # Add existing flashcards to the list
-                for card in existing_flashcards:
-                    card_container = ft.Container(
-                        content=ft.Column([
-                            ft.Text(f"Q: {card['question']}", size=20, color=BLACK_TEXT, font_family=FONT_FAMILY, weight=ft.FontWeight.BOLD),
-                            ft.Text(f"A: {card['answer']}", size=20, color=BLACK_TEXT, font_family=FONT_FAMILY),
-                        ], spacing=5),
-                        padding=15,
-                        bgcolor=TEXT_FIELD_BG,
-                        border_radius=8,
-                        margin=ft.margin.only(bottom=10)
-                    )
-                    flashcards_list.controls.append(card_container)
+                # First page of existing flashcards
+                await load_next_page()
+                card_count = await asyncio.to_thread(topics_db.count_flashcards, current_topic_id) if current_topic_id else 0
+                list_title = ft.Text(f"Your Flashcards ({card_count})", size=24, color=TEXT_COLOR, font_family="Courgette-Regular")
                 
+                # Deck import/export (CSV, FlashcardDeck JSON or Anki TSV, chosen by file extension)
+                def on_deck_picked(e: ft.FilePickerResultEvent):
+                    try:
+                        if deck_picker.data == "import" and e.files:
+                            count = topics_db.import_flashcards(current_topic_id, e.files[0].path)
+                            message = f"Imported {count} flashcards"
+                            page.run_task(load_flashcards)
+                        elif deck_picker.data == "export" and e.path:
+                            count = topics_db.export_flashcards(current_topic_id, e.path)
+                            message = f"Exported {count} flashcards"
+                        else:
+                            return
+                    except Exception as ex:
+                        print(f"[Flashcard Deck] Error: {ex}")
+                        message = "Error reading or writing the deck file"
+                    page.snack_bar = ft.SnackBar(content=ft.Text(message, color=TEXT_COLOR), bgcolor=CONTAINER_BG)
+                    page.snack_bar.open = True
+                    page.update()
+
+                def pick_deck(action):
+                    if current_topic_id is None:
+                        page.snack_bar = ft.SnackBar(content=ft.Text("No topic selected", color=TEXT_COLOR), bgcolor=CONTAINER_BG)
+                        page.snack_bar.open = True
+                        page.update()
+                        return
+                    deck_picker.data = action
+                    deck_picker.on_result = on_deck_picked
+                    if action == "import":
+                        deck_picker.pick_files(allowed_extensions=["csv", "json", "tsv", "txt"])
+                    else:
+                        deck_picker.save_file(file_name=f"{current_topic_name}.json", allowed_extensions=["csv", "json", "tsv", "txt"])
+
                 # Study mode functionality
                 def start_study_mode(e):
-                    if not existing_flashcards:
+                    if not flashcards_list.controls:
                         page.snack_bar = ft.SnackBar(content=ft.Text("No flashcards to study!", color=TEXT_COLOR), bgcolor=CONTAINER_BG)
                         page.snack_bar.open = True
                         page.update()
@@ -999,6 +1221,10 @@ def main(page: ft.Page):
                                 question_input,
                                 answer_input,
                                 ft.ElevatedButton("Add Flashcard", bgcolor=CONTAINER_BG, color=BLACK_TEXT, on_click=add_flashcard),
+                                ft.Row([
+                                    ft.ElevatedButton("Import Deck", bgcolor=CONTAINER_BG, color=BLACK_TEXT, on_click=lambda _: pick_deck("import")),
+                                    ft.ElevatedButton("Export Deck", bgcolor=CONTAINER_BG, color=BLACK_TEXT, on_click=lambda _: pick_deck("export")),
+                                ], alignment=ft.MainAxisAlignment.CENTER, spacing=15),
                             ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=15),
                             padding=20,
                             bgcolor=CONTAINER_BG,
@@ -1008,7 +1234,7 @@ def main(page: ft.Page):
                         # Existing Flashcards Section
                         ft.Container(
                             content=ft.Column([
-                                ft.Text("Your Flashcards", size=24, color=TEXT_COLOR, font_family="Courgette-Regular"),
+                                list_title,
                                 ft.Container(
                                     content=flashcards_list,
                                     padding=15,
@@ -1041,7 +1267,7 @@ def main(page: ft.Page):
                     flashcards_content.current.update()
         
         # Start loading flashcards in background
-        threading.Thread(target=load_flashcards, daemon=True).start()
+        page.run_task(load_flashcards)
         
         return ft.View(
             "/flashcards",
@@ -1067,50 +1293,32 @@ def main(page: ft.Page):
         )
 
     def create_study_flashcards_view():
-        # Get flashcards for the current topic
-        flashcards = []
-        try:
-            flashcards = topics_db.get_flashcards_by_topic(current_topic_id) if current_topic_id else []
-        except:
-            flashcards = []
+        # Returned as a skeleton; due cards are loaded on the worker pool a batch at a time, earliest first
+        due_cards = []
+        current_card = None
+        reviewed_count = 0
+        showing_answer = False
+        body = ft.Container(content=ft.ProgressRing(color=TEXT_COLOR), alignment=ft.alignment.center, expand=True)
         
-        if not flashcards:
-            return ft.View(
-                "/study-flashcards",
-                bgcolor=BG_COLOR,
-                appbar=ft.AppBar(
-                    leading=IconButton(r"storage\data\img\back.png", 24, lambda _: page.go("/flashcards"), "Back"),
-                    title=AppLogo(60),
-                    center_title=True,
-                    bgcolor=CONTAINER_BG,
-                ),
-                controls=[
-                    ft.Container(
-                        content=ft.Column([
-                            ft.Text("No Flashcards", size=36, weight=ft.FontWeight.BOLD, color=TEXT_COLOR, font_family="Courgette-Regular"),
-                            ft.Text("Create some flashcards first!", size=20, color=TEXT_COLOR, font_family=FONT_FAMILY),
-                            ft.ElevatedButton("Go Back", bgcolor=CONTAINER_BG, color=BLACK_TEXT, on_click=lambda _: page.go("/flashcards")),
-                        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=20),
-                        alignment=ft.alignment.center,
-                        expand=True,
-                    )
-                ],
-                padding=20,
-                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-            )
+        def message_column(title, subtitle):
+            return ft.Column([
+                ft.Text(title, size=36, weight=ft.FontWeight.BOLD, color=TEXT_COLOR, font_family="Courgette-Regular"),
+                ft.Text(subtitle, size=20, color=TEXT_COLOR, font_family=FONT_FAMILY),
+                ft.ElevatedButton("Go Back", bgcolor=CONTAINER_BG, color=BLACK_TEXT, on_click=lambda _: page.go("/flashcards")),
+            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=20)
         
-        # Study mode state
-        current_card_index = 0
-        showing_answer = False
+        async def caught_up_message():
+            next_due = await asyncio.to_thread(topics_db.get_next_due_time, current_topic_id)
+            return f"Next card is due {next_due[:16]}" if next_due else "Nothing left to review"
         
         # Create card display
         card_display = ft.Container(
             content=ft.Column([
                 ft.Text("Q:", size=24, color=BLACK_TEXT, font_family=FONT_FAMILY, weight=ft.FontWeight.BOLD),
-                ft.Text(flashcards[0]['question'], size=20, color=BLACK_TEXT, font_family=FONT_FAMILY),
+                ft.Text("", size=20, color=BLACK_TEXT, font_family=FONT_FAMILY),
                 ft.Container(height=20),
                 ft.Text("A:", size=24, color=BLACK_TEXT, font_family=FONT_FAMILY, weight=ft.FontWeight.BOLD, visible=False),
-                ft.Text(flashcards[0]['answer'], size=20, color=BLACK_TEXT, font_family=FONT_FAMILY, visible=False),
+                ft.Text("", size=20, color=BLACK_TEXT, font_family=FONT_FAMILY, visible=False),
             ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=10),
             padding=30,
             bgcolor=TEXT_FIELD_BG,
@@ -1120,63 +1328,111 @@ def main(page: ft.Page):
             alignment=ft.alignment.center,
         )
         
-        # Navigation buttons
-        prev_button = ft.ElevatedButton("Previous", bgcolor=CONTAINER_BG, color=BLACK_TEXT, disabled=True)
-        next_button = ft.ElevatedButton("Next", bgcolor=CONTAINER_BG, color=BLACK_TEXT)
+        # Show Answer, then one rating button per SM-2 grade
         flip_button = ft.ElevatedButton("Show Answer", bgcolor=CONTAINER_BG, color=BLACK_TEXT)
+        rating_row = ft.Row([
+            ft.ElevatedButton(label, bgcolor=CONTAINER_BG, color=BLACK_TEXT, data=rating)
+            for label, rating in (("Again", srs.AGAIN), ("Hard", srs.HARD), ("Good", srs.GOOD), ("Easy", srs.EASY))
+        ], alignment=ft.MainAxisAlignment.CENTER, spacing=20, visible=False)
+        hint_text = ft.Text("Click 'Show Answer' to reveal the answer", size=14, color=TEXT_COLOR, font_family=FONT_FAMILY)
         
         # Progress indicator
-        progress_text = ft.Text(f"Card {current_card_index + 1} of {len(flashcards)}", size=16, color=TEXT_COLOR, font_family=FONT_FAMILY)
-        
-        def update_card_display():
-            if 0 <= current_card_index < len(flashcards):
-                card = flashcards[current_card_index]
-                card_display.content.controls[1].value = card['question']
-                card_display.content.controls[3].visible = showing_answer
-                card_display.content.controls[4].value = card['answer']
-                card_display.content.controls[4].visible = showing_answer
-                card_display.update()
-                
-                progress_text.value = f"Card {current_card_index + 1} of {len(flashcards)}"
-                progress_text.update()
-                
-                # Update button states
-                prev_button.disabled = current_card_index == 0
-                next_button.disabled = current_card_index == len(flashcards) - 1
-                prev_button.update()
-                next_button.update()
-        
-        def show_previous_card(e):
-            nonlocal current_card_index, showing_answer
-            if current_card_index > 0:
-                current_card_index -= 1
-                showing_answer = False
-                update_card_display()
-                flip_button.text = "Show Answer"
-                flip_button.update()
+        progress_text = ft.Text("", size=16, color=TEXT_COLOR, font_family=FONT_FAMILY)
         
-        def show_next_card(e):
-            nonlocal current_card_index, showing_answer
-            if current_card_index < len(flashcards) - 1:
-                current_card_index += 1
-                showing_answer = False
-                update_card_display()
-                flip_button.text = "Show Answer"
-                flip_button.update()
+        async def refresh_progress():
+            remaining = await asyncio.to_thread(topics_db.count_due_flashcards, current_topic_id)
+            progress_text.value = f"Reviewed {reviewed_count} · {remaining} due"
         
-        def flip_card(e):
+        def set_showing_answer(value):
             nonlocal showing_answer
-            showing_answer = not showing_answer
+            showing_answer = value
             card_display.content.controls[3].visible = showing_answer
             card_display.content.controls[4].visible = showing_answer
-            card_display.update()
-            flip_button.text = "Hide Answer" if showing_answer else "Show Answer"
-            flip_button.update()
+            flip_button.visible = not showing_answer
+            rating_row.visible = showing_answer
+            hint_text.value = "How well did you remember it?" if showing_answer else "Click 'Show Answer' to reveal the answer"
+        
+        async def show_current_card():
+            card_display.content.controls[1].value = current_card['question']
+            card_display.content.controls[4].value = current_card['answer']
+            set_showing_answer(False)
+            await refresh_progress()
+            update_if_shown(body)
+        
+        async def finish_session():
+            card_display.content.controls[1].value = "All caught up!"
+            card_display.content.controls[3].visible = False
+            card_display.content.controls[4].value = await caught_up_message()
+            card_display.content.controls[4].visible = True
+            flip_button.visible = False
+            rating_row.visible = False
+            hint_text.value = f"Reviewed {reviewed_count} card{'s' if reviewed_count != 1 else ''}"
+            await refresh_progress()
+            update_if_shown(body)
+        
+        def flip_card(e):
+            study_timer.touch()
+            set_showing_answer(True)
+            page.update()
+        
+        async def rate_card(e):
+            nonlocal current_card, due_cards, reviewed_count
+            study_timer.touch()
+            # One rating per card, even if a button is clicked again while the review is saved
+            rating_row.disabled = True
+            update_if_shown(rating_row)
+            try:
+                await asyncio.to_thread(topics_db.review_flashcard, current_topic_id, int(current_card['id']), e.control.data)
+                reviewed_count += 1
+                if not due_cards:
+                    # Fetch the next batch; cards failed a moment ago come back once their relearn delay is up
+                    due_cards = await asyncio.to_thread(topics_db.get_due_flashcards, current_topic_id, DUE_BATCH_SIZE)
+            except Exception as ex:
+                print(f"[Flashcards] Error: {ex}")
+            finally:
+                rating_row.disabled = False
+            if due_cards:
+                current_card = due_cards.pop(0)
+                await show_current_card()
+            else:
+                await finish_session()
         
         # Set up button callbacks
-        prev_button.on_click = show_previous_card
-        next_button.on_click = show_next_card
         flip_button.on_click = flip_card
+        for button in rating_row.controls:
+            button.on_click = rate_card
+        
+        study_column = ft.Column([
+            ft.Text(f"Study Flashcards: {current_topic_name}", size=36, weight=ft.FontWeight.BOLD, color=TEXT_COLOR, font_family="Courgette-Regular"),
+            progress_text,
+            card_display,
+            flip_button,
+            rating_row,
+            hint_text,
+        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=20)
+        
+        async def load_session():
+            nonlocal due_cards, current_card
+            has_cards = False
+            try:
+                if current_topic_id:
+                    due_cards = await asyncio.to_thread(topics_db.get_due_flashcards, current_topic_id, DUE_BATCH_SIZE)
+                    has_cards = bool(due_cards) or await asyncio.to_thread(topics_db.get_next_due_time, current_topic_id) is not None
+                if not has_cards:
+                    body.content = message_column("No Flashcards", "Create some flashcards first!")
+                elif not due_cards:
+                    body.content = message_column("All Caught Up", await caught_up_message())
+                else:
+                    current_card = due_cards.pop(0)
+                    body.content = study_column
+                    await show_current_card()
+                    return
+            except Exception as e:
+                print(f"[Flashcards] Error: {e}")
+                body.content = message_column("No Flashcards", "Create some flashcards first!")
+            update_if_shown(body)
+        
+        page.run_task(load_session)
         
         return ft.View(
             "/study-flashcards",
@@ -1187,29 +1443,20 @@ def main(page: ft.Page):
                 center_title=True,
                 bgcolor=CONTAINER_BG,
             ),
-            controls=[
-                ft.Container(
-                    content=ft.Column([
-                        ft.Text(f"Study Flashcards: {current_topic_name}", size=36, weight=ft.FontWeight.BOLD, color=TEXT_COLOR, font_family="Courgette-Regular"),
-                        progress_text,
-                        card_display,
-                        ft.Row([
-                            prev_button,
-                            flip_button,
-                            next_button,
-                        ], alignment=ft.MainAxisAlignment.CENTER, spacing=20),
-                        ft.Text("Click 'Show Answer' to reveal the answer", size=14, color=TEXT_COLOR, font_family=FONT_FAMILY),
-                    ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=20),
-                    alignment=ft.alignment.center,
-                    expand=True,
-                )
-            ],
+            controls=[body],
             padding=20,
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
         )
 
     # -- Routing -- #
     def route_change(route):
+        # Time spent in quiz and flashcards counts toward the current topic; speaking starts with a recording
+        if page.route == "/quiz":
+            study_timer.start(current_topic_id, "quiz")
+        elif page.route in ("/flashcards", "/study-flashcards"):
+            study_timer.start(current_topic_id, "flashcards")
+        else:
+            study_timer.stop()
         page.views.clear()
         if page.route == "/main":
             page.views.append(create_main_view())
@@ -1230,7 +1477,23 @@ def main(page: ft.Page):
 
     page.on_route_change = route_change
     page.on_view_pop = view_pop
-    page.go(page.route)
+    with profiler.step("first view"):
+        page.go(page.route)
+    profiler.report()
+    if topics_db.recovery and topics_db.recovery['data_lost']:
+        if topics_db.recovery['source'] == "snapshot":
+            message = (f"Your data was damaged and has been restored from the backup of "
+                       f"{topics_db.recovery['snapshot_time'].replace('T', ' ')}. Changes made since then are lost.")
+        else:
+            message = "Your data was damaged and has been repaired, but some entries may be missing."
+        page.snack_bar = ft.SnackBar(
+            content=ft.Text(f"{message} The damaged file was kept as {os.path.basename(topics_db.recovery['damaged_path'])}.",
+                            color=TEXT_COLOR),
+            bgcolor=CONTAINER_BG, duration=15000, show_close_icon=True
+        )
+        page.snack_bar.open = True
+        page.update()
+    threading.Thread(target=start_warmup, daemon=True).start()
 
 if __name__ == "__main__":
     ft.app(target=main)
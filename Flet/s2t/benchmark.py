@@ -0,0 +1,131 @@
+"""
+Benchmark the Whisper engine profiles on local recordings.
+
+Put pairs of `name.wav` and `name.txt` (the reference transcript) in a
+fixtures directory, then run:
+
+    python s2t/benchmark.py --fixtures s2t/fixtures --profiles fast balanced accurate
+
+For each profile this reports model load time, and per clip the decode
+latency, real-time factor (decode time / audio length, lower is better)
+and word error rate against the reference.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from faster_whisper import decode_audio
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import s2t
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def normalize(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    # Word-level Levenshtein distance, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def load_fixtures(directory):
+    fixtures = []
+    if not os.path.isdir(directory):
+        return fixtures
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".wav"):
+            continue
+        wav_path = os.path.join(directory, name)
+        txt_path = os.path.splitext(wav_path)[0] + ".txt"
+        reference = ""
+        if os.path.exists(txt_path):
+            with open(txt_path, 'r', encoding='utf-8') as file:
+                reference = file.read().strip()
+        audio = decode_audio(wav_path, sampling_rate=s2t.SAMPLERATE)
+        fixtures.append((name, audio, reference))
+    return fixtures
+
+
+def benchmark_profile(name, fixtures, overrides):
+    s2t.set_profile(name, **overrides)
+    start = time.perf_counter()
+    model = s2t.get_model()
+    load_time = time.perf_counter() - start
+    if model is None:
+        print(f"{name}: model failed to load")
+        return None
+
+    beam_size = s2t.get_profile()["beam_size"]
+    results = []
+    for clip, audio, reference in fixtures:
+        start = time.perf_counter()
+        segments, info = model.transcribe(audio, beam_size=beam_size)
+        text = " ".join(seg.text for seg in segments).strip()
+        latency = time.perf_counter() - start
+        duration = len(audio) / s2t.SAMPLERATE
+        wer = word_error_rate(reference, text) if reference else None
+        results.append((clip, duration, latency, latency / duration if duration else 0.0, wer))
+
+    print(f"\n=== {name} ({s2t.get_profile()['model_size']}, beam {beam_size}) - load {load_time:.2f}s ===")
+    print(f"{'clip':<30} {'audio s':>8} {'latency s':>10} {'RTF':>6} {'WER':>6}")
+    for clip, duration, latency, rtf, wer in results:
+        wer_text = f"{wer:.1%}" if wer is not None else "-"
+        print(f"{clip[:30]:<30} {duration:>8.1f} {latency:>10.2f} {rtf:>6.2f} {wer_text:>6}")
+
+    total_audio = sum(r[1] for r in results)
+    total_latency = sum(r[2] for r in results)
+    wers = [r[4] for r in results if r[4] is not None]
+    summary = {
+        "profile": name,
+        "load_time": load_time,
+        "rtf": total_latency / total_audio if total_audio else 0.0,
+        "mean_latency": total_latency / len(results),
+        "wer": sum(wers) / len(wers) if wers else None,
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper engine profiles")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Directory with name.wav / name.txt pairs")
+    parser.add_argument("--profiles", nargs="+", default=list(s2t.PROFILES), choices=list(s2t.PROFILES))
+    parser.add_argument("--cpu-threads", type=int, help="Override cpu_threads for every profile")
+    parser.add_argument("--num-workers", type=int, help="Override num_workers for every profile")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No fixtures found in {args.fixtures}. Add name.wav files with matching name.txt transcripts.")
+        sys.exit(1)
+
+    overrides = {}
+    if args.cpu_threads is not None:
+        overrides["cpu_threads"] = args.cpu_threads
+    if args.num_workers is not None:
+        overrides["num_workers"] = args.num_workers
+
+    summaries = [s for s in (benchmark_profile(name, fixtures, overrides) for name in args.profiles) if s]
+
+    print("\n=== Summary ===")
+    print(f"{'profile':<10} {'load s':>8} {'mean latency s':>15} {'RTF':>6} {'WER':>6}")
+    for s in summaries:
+        wer_text = f"{s['wer']:.1%}" if s['wer'] is not None else "-"
+        print(f"{s['profile']:<10} {s['load_time']:>8.2f} {s['mean_latency']:>15.2f} {s['rtf']:>6.2f} {wer_text:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,223 @@
-import keyboard
 import sounddevice as sd
 import numpy as np
-import scipy.io.wavfile as wav
 from faster_whisper import WhisperModel
 import threading
 import time
 import os
 
 # --- Configuration ---
-MODEL_SIZE = "small"  # Options: "tiny", "base", "small", "OVER medium", "OVER large-v1", "OVERlarge-v2"
 DEVICE = "cpu"  # "cuda" for GPU, "cpu" for CPU
 COMPUTE_TYPE = "int8"  # "float16" or "int8_float16" for GPU, "int8" for CPU
-SAMPLERATE = 44100  # Sample rate for recording
-FILENAME = "temp_recording.wav"
+
+# --- Engine profiles ---
+# model_size options: "tiny", "base", "small" (medium/large are too slow for this app)
+# cpu_threads=0 lets CTranslate2 pick; num_workers > 1 only helps when transcribing in parallel
+PROFILES = {
+    "fast": {"model_size": "tiny", "beam_size": 1, "device": DEVICE, "compute_type": COMPUTE_TYPE, "cpu_threads": 0, "num_workers": 1},
+    "balanced": {"model_size": "base", "beam_size": 2, "device": DEVICE, "compute_type": COMPUTE_TYPE, "cpu_threads": 0, "num_workers": 1},
+    "accurate": {"model_size": "small", "beam_size": 5, "device": DEVICE, "compute_type": COMPUTE_TYPE, "cpu_threads": 0, "num_workers": 1},
+}
+PROFILE = os.environ.get("CANARY_WHISPER_PROFILE", "accurate")
+SAMPLERATE = 16000  # Whisper's native rate; audio is captured mono float32 and never resampled
 RECORD_TIME = 50  # seconds (2 minutes)
 
+# --- Streaming (VAD-chunked) transcription ---
+STREAMING = True  # Transcribe speech chunks while still recording
+VAD_FRAME_SECONDS = 0.03  # Energy is measured over frames of this length
+VAD_ENERGY_THRESHOLD = 0.01  # RMS below this counts as silence
+VAD_MIN_SILENCE = 0.6  # Seconds of silence that end a chunk
+VAD_MIN_CHUNK = 3.0  # Never cut a chunk shorter than this
+VAD_MAX_CHUNK = 20.0  # Force a cut at the quietest frame if no pause is found
+CHUNK_POLL_INTERVAL = 0.25  # Seconds between VAD passes on new audio
+
 # --- Recording State ---
 _recording = False
-_recorded_frames = []
 _stream = None
 _recording_lock = threading.Lock()
 _recording_start_time = None
+_chunk_worker = None
+_chunk_stop = threading.Event()
+_partial_texts = []
 
 # --- Initialize Whisper Model (singleton for API use) ---
 _model = None
+_model_lock = threading.Lock()
+_profile = dict(PROFILES.get(PROFILE, PROFILES["accurate"]), name=PROFILE if PROFILE in PROFILES else "accurate")
+
+def set_profile(name, **overrides):
+    """Switch to a named engine profile, optionally overriding its settings (e.g. cpu_threads=4).
+    The model is reloaded lazily on the next get_model()."""
+    global _model, _profile
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile '{name}'. Options: {', '.join(PROFILES)}")
+    unknown = set(overrides) - set(PROFILES[name])
+    if unknown:
+        raise ValueError(f"Unknown profile settings: {', '.join(sorted(unknown))}")
+    with _model_lock:
+        _profile = dict(PROFILES[name], name=name, **overrides)
+        _model = None
+
+def get_profile():
+    return dict(_profile)
+
 def get_model():
     global _model
-    if _model is None:
-        try:
-            _model = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
-        except Exception as e:
-            print(f"Error initializing Whisper model: {e}")
-            _model = None
-    return _model
-
-def start_recording():
+    # Locked so a background warm-up and the first recording never load the model twice
+    with _model_lock:
+        if _model is None:
+            try:
+                _model = WhisperModel(
+                    _profile["model_size"],
+                    device=_profile["device"],
+                    compute_type=_profile["compute_type"],
+                    cpu_threads=_profile["cpu_threads"],
+                    num_workers=_profile["num_workers"],
+                )
+            except Exception as e:
+                print(f"Error initializing Whisper model: {e}")
+                _model = None
+        return _model
+
+class _RingBuffer:
+    """
+    Preallocated mono float32 audio buffer.
+
+    The audio callback copies each block straight into place, so recording
+    allocates nothing per block. Positions are absolute sample counts since
+    reset(); reads that don't wrap are zero-copy views.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self.written = 0
+
+    def reset(self):
+        self.written = 0
+
+    def write(self, block):
+        samples = block[:, 0] if block.ndim == 2 else block
+        if len(samples) > self.capacity:
+            samples = samples[-self.capacity:]
+        start = self.written % self.capacity
+        end = start + len(samples)
+        if end <= self.capacity:
+            self._data[start:end] = samples
+        else:
+            split = self.capacity - start
+            self._data[start:] = samples[:split]
+            self._data[:end - self.capacity] = samples[split:]
+        # Published after the copy so readers never see unwritten samples
+        self.written += len(samples)
+
+    def read(self, start, end=None):
+        """Return samples [start, end) of what has been written (only the last `capacity` are kept)."""
+        end = self.written if end is None else min(end, self.written)
+        start = max(start, end - self.capacity, 0)
+        if start >= end:
+            return np.zeros(0, dtype=np.float32)
+        first = start % self.capacity
+        last = first + (end - start)
+        if last <= self.capacity:
+            return self._data[first:last]
+        return np.concatenate((self._data[first:], self._data[:last - self.capacity]))
+
+# Room for a full RECORD_TIME take plus slack, so a single recording never wraps
+_buffer = _RingBuffer((RECORD_TIME + 2) * SAMPLERATE)
+
+def _find_cut(audio, samplerate):
+    """Return the sample index to cut a finished chunk at, or None to keep accumulating."""
+    frame = int(samplerate * VAD_FRAME_SECONDS)
+    n_frames = len(audio) // frame
+    if n_frames == 0 or len(audio) < VAD_MIN_CHUNK * samplerate:
+        return None
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    silent = rms < VAD_ENERGY_THRESHOLD
+    min_chunk_frames = int(VAD_MIN_CHUNK / VAD_FRAME_SECONDS)
+    min_silence_frames = int(VAD_MIN_SILENCE / VAD_FRAME_SECONDS)
+    # Cut in the middle of the last long-enough pause that leaves a chunk of at least VAD_MIN_CHUNK
+    cut = None
+    run_start = None
+    for i in range(n_frames + 1):
+        if i < n_frames and silent[i]:
+            if run_start is None:
+                run_start = i
+            continue
+        if run_start is not None and i - run_start >= min_silence_frames:
+            middle = (run_start + i) // 2
+            if middle >= min_chunk_frames:
+                cut = middle
+        run_start = None
+    if cut is None and len(audio) >= VAD_MAX_CHUNK * samplerate:
+        cut = min_chunk_frames + int(np.argmin(rms[min_chunk_frames:]))
+    return cut * frame if cut is not None else None
+
+def _transcribe_chunk(model, audio):
+    # Feed the tail of what was already heard as a prompt so words across chunk edges stay coherent
+    prompt = " ".join(_partial_texts)[-200:] or None
+    segments, info = model.transcribe(audio, beam_size=_profile["beam_size"], initial_prompt=prompt)
+    text = " ".join([seg.text for seg in segments]).strip()
+    if text:
+        _partial_texts.append(text)
+        if _on_partial_transcription:
+            _on_partial_transcription(" ".join(_partial_texts))
+
+def _chunk_worker_loop():
+    """Cut recorded audio at pauses and transcribe each chunk while recording continues."""
+    model = get_model()
+    chunk_start = 0
+    while True:
+        stopping = _chunk_stop.wait(CHUNK_POLL_INTERVAL)
+        if model is None:
+            if stopping:
+                return
+            continue
+        pending = _buffer.read(chunk_start)
+        cut = _find_cut(pending, SAMPLERATE)
+        while cut is not None:
+            try:
+                _transcribe_chunk(model, pending[:cut])
+            except Exception as e:
+                print(f"[Streaming transcription] Error: {e}")
+            chunk_start += cut
+            pending = pending[cut:]
+            cut = _find_cut(pending, SAMPLERATE)
+        if stopping:
+            # Whatever is left after the last pause is the only audio decoded after stop
+            if len(pending) > 0:
+                try:
+                    _transcribe_chunk(model, pending)
+                except Exception as e:
+                    print(f"[Streaming transcription] Error: {e}")
+            return
+
+def start_recording(streaming=None):
     """Start recording audio from the microphone (toggle ON)."""
-    global _recording, _recorded_frames, _stream, _recording_start_time
+    global _recording, _stream, _recording_start_time, _chunk_worker, _partial_texts
+    if streaming is None:
+        streaming = STREAMING
     with _recording_lock:
         if _recording:
             print("Already recording.")
             return False  # Prevent duplicate starts
         _recording = True
-        _recorded_frames = []
+        _buffer.reset()
+        _partial_texts = []
         _recording_start_time = time.time()
     def callback(indata, frames, time_, status):
         if status:
             print(status)
-        with _recording_lock:
-            if _recording:
-                _recorded_frames.append(indata.copy())
-    _stream = sd.InputStream(samplerate=SAMPLERATE, channels=1, callback=callback)
+        if _recording:
+            _buffer.write(indata)
+    _stream = sd.InputStream(samplerate=SAMPLERATE, channels=1, dtype='float32', callback=callback)
     _stream.start()
+    if streaming:
+        _chunk_stop.clear()
+        _chunk_worker = threading.Thread(target=_chunk_worker_loop, daemon=True)
+        _chunk_worker.start()
+    else:
+        _chunk_worker = None
     print("[Recording started]")
     # Start a timer thread to auto-stop after RECORD_TIME
     def auto_stop():
@@ -68,7 +234,7 @@ def start_recording():
 
 def stop_recording_and_transcribe(auto=False):
     """Stop recording and transcribe the audio. Returns transcription string or error."""
-    global _recording, _recorded_frames, _stream
+    global _recording, _stream
     with _recording_lock:
         if not _recording:
             print("Not currently recording.")
@@ -78,24 +244,24 @@ def stop_recording_and_transcribe(auto=False):
         _stream.stop()
         _stream.close()
         _stream = None
-    if not _recorded_frames:
+    if _chunk_worker is not None:
+        _chunk_stop.set()
+        _chunk_worker.join()
+        if get_model() is None:
+            return "[Model not initialized]"
+        text = " ".join(_partial_texts).strip()
+        return text if text else "[No audio recorded]"
+    if _buffer.written == 0:
         return "[No audio recorded]"
-    audio_data = np.concatenate(_recorded_frames, axis=0)
-    wav.write(FILENAME, SAMPLERATE, audio_data)
     model = get_model()
     if model is None:
         return "[Model not initialized]"
     try:
-        segments, info = model.transcribe(FILENAME, beam_size=5)
+        # The buffer already holds 16 kHz mono float32, which Whisper takes as-is
+        segments, info = model.transcribe(_buffer.read(0), beam_size=_profile["beam_size"])
         text = " ".join([seg.text for seg in segments])
-        # Delete the temporary recording file after transcription
-        if os.path.exists(FILENAME):
-            os.remove(FILENAME)
         return text.strip()
     except Exception as e:
-        # Delete the temporary recording file even if transcription fails
-        if os.path.exists(FILENAME):
-            os.remove(FILENAME)
         return f"[Transcription error: {e}]"
 
 def is_recording():
@@ -111,11 +277,17 @@ def get_recording_progress():
 
 # --- UI callback for auto transcription ---
 _on_transcription = None
+_on_partial_transcription = None
 
 def set_on_transcription_callback(cb):
     global _on_transcription
     _on_transcription = cb
 
+def set_on_partial_transcription_callback(cb):
+    """Register cb(text), called with the transcript so far each time a chunk is decoded while recording."""
+    global _on_partial_transcription
+    _on_partial_transcription = cb
+
 if __name__ == "__main__":
     try:
         while True:
@@ -1,7 +1,7 @@
 import asyncio
 import os
 import sys
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import json
 
 # Try to import ollama, if not available, provide installation instructions
@@ -12,7 +12,169 @@ except ImportError:
     print("pip install ollama")
     sys.exit(1)
     
+try:
+    from .llm_config import KEEP_ALIVE
+except ImportError:
+    from llm_config import KEEP_ALIVE
+
 base_model="gemma3n:e2b-it-q4_K_M"
+
+# Token budget for system prompt + history + new input; leaves room for the reply in a 2k context
+DEFAULT_TOKEN_BUDGET = 1500
+# After trimming, history is cut down to this fraction of the budget so the prefix stays stable for several turns
+TRIM_TARGET = 0.6
+# Rough characters-per-token ratio used to estimate prompt size without a tokenizer
+CHARS_PER_TOKEN = 4
+MAX_SUMMARY_CHARS = 600
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for budget checks."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class ChatSession:
+    """
+    Message history for one study session with a single topic.
+
+    The Ollama chat endpoint does not hand back a reusable `context` like
+    `generate` does; instead the server reuses the KV cache for any prefix of
+    the prompt that matches the previous request, as long as the model is kept
+    loaded. The session therefore keeps the history append-only, sends
+    `keep_alive` with every call and only trims old turns in large blocks, so
+    most turns pay prompt evaluation for the new utterance only.
+    """
+
+    def __init__(self, system_prompt: Optional[str] = None, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 keep_alive: str = KEEP_ALIVE):
+        """
+        Initialize an empty session.
+
+        Args:
+            system_prompt: System prompt sent at the start of every request
+            token_budget: Maximum estimated tokens for system prompt, history and new input
+            keep_alive: Ollama keep_alive value passed with every request
+        """
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.keep_alive = keep_alive
+        self.turns: List[Dict[str, str]] = []
+        self.summary = ""
+        self.trimmed_turns = 0
+        self.last_prompt_eval_count = 0
+        self.last_eval_count = 0
+
+    def reset(self, system_prompt: Optional[str] = None):
+        """
+        Forget the conversation, optionally switching to a new system prompt.
+
+        Args:
+            system_prompt: New system prompt, or None to keep the current one
+        """
+        if system_prompt is not None:
+            self.system_prompt = system_prompt
+        self.turns = []
+        self.summary = ""
+        self.trimmed_turns = 0
+        self.last_prompt_eval_count = 0
+        self.last_eval_count = 0
+
+    def _system_message(self) -> Optional[Dict[str, str]]:
+        if not self.system_prompt:
+            return None
+        content = self.system_prompt
+        if self.summary:
+            content += f"\n\nEarlier in this session the user explained: {self.summary}"
+        return {"role": "system", "content": content}
+
+    def build_messages(self, user_input: str) -> List[Dict[str, str]]:
+        """
+        Build the message list for the next request, trimming history first if
+        the new utterance would take the request over budget.
+
+        Args:
+            user_input: The user's new utterance
+
+        Returns:
+            System prompt, prior turns and the new user message
+        """
+        self._enforce_budget(estimate_tokens(user_input))
+        messages = []
+        system_message = self._system_message()
+        if system_message:
+            messages.append(system_message)
+        messages.extend(self.turns)
+        messages.append({"role": "user", "content": user_input})
+        return messages
+
+    def record_turn(self, user_input: str, reply: str, response: Optional[Any] = None):
+        """
+        Append a finished exchange and trim history if it went over budget.
+
+        Args:
+            user_input: The user's utterance
+            reply: The model's full reply
+            response: The final Ollama response (or stream chunk), used for token counts
+        """
+        self.turns.append({"role": "user", "content": user_input})
+        self.turns.append({"role": "assistant", "content": reply})
+        if response is not None:
+            self.last_prompt_eval_count = response.get('prompt_eval_count') or 0
+            self.last_eval_count = response.get('eval_count') or 0
+        self._enforce_budget()
+
+    def estimated_tokens(self) -> int:
+        """Estimated prompt tokens of the current history, including the system prompt."""
+        system_message = self._system_message()
+        total = estimate_tokens(system_message['content']) if system_message else 0
+        return total + sum(estimate_tokens(turn['content']) for turn in self.turns)
+
+    def _enforce_budget(self, incoming: int = 0):
+        # incoming: estimated tokens of a user message about to be sent with the history
+        if self.estimated_tokens() + incoming <= self.token_budget:
+            return
+        # Drop whole user/assistant pairs, oldest first, down to the trim target.
+        # Always keep the latest exchange so the next turn has something to build on.
+        target = int(self.token_budget * TRIM_TARGET)
+        dropped = []
+        while len(self.turns) > 2 and self.estimated_tokens() + incoming > target:
+            dropped.extend(self.turns[:2])
+            self.turns = self.turns[2:]
+            self.trimmed_turns += 1
+        self._summarize(dropped)
+
+    def _summarize(self, dropped: List[Dict[str, str]]):
+        # Extractive summary: the first sentence of each dropped user explanation,
+        # keeping the most recent material when it grows too long
+        points = []
+        for turn in dropped:
+            if turn['role'] != 'user':
+                continue
+            first_sentence = turn['content'].strip().split('. ')[0].strip()
+            if first_sentence:
+                points.append(first_sentence.rstrip('.') + '.')
+        if not points:
+            return
+        summary = f"{self.summary} {' '.join(points)}".strip()
+        self.summary = summary[-MAX_SUMMARY_CHARS:]
+
+    def get_info(self) -> Dict[str, Any]:
+        """
+        Get information about the session state.
+
+        Returns:
+            Dictionary with turn counts and token usage
+        """
+        return {
+            "turns": len(self.turns) // 2,
+            "trimmed_turns": self.trimmed_turns,
+            "estimated_tokens": self.estimated_tokens(),
+            "token_budget": self.token_budget,
+            "last_prompt_eval_count": self.last_prompt_eval_count,
+            "last_eval_count": self.last_eval_count,
+        }
+
+
 class CanaryTopicModel:
     """
     A model class that specializes in a given topic using the Canary approach.
@@ -21,17 +183,21 @@ class CanaryTopicModel:
     """
    
     
-    def __init__(self, base_model: str = base_model, topic: Optional[str] = None):
+    def __init__(self, base_model: str = base_model, topic: Optional[str] = None,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET, keep_alive: str = KEEP_ALIVE):
         """
         Initialize the Canary topic model.
         
         Args:
             base_model: The base Ollama model to use
             topic: The topic to specialize in for learning conversations
+            token_budget: Maximum estimated prompt tokens kept in the session history
+            keep_alive: How long Ollama keeps the model loaded between turns
         """
         self.base_model = base_model
         self.topic = topic
         self.system_prompt = self._create_system_prompt(topic) if topic else None
+        self.session = ChatSession(self.system_prompt, token_budget=token_budget, keep_alive=keep_alive)
         
     def _create_system_prompt(self, topic: str) -> str:
         """
@@ -67,6 +233,22 @@ Your role is to be a learning partner, not a lecturer. Help the user discover th
         """
         self.topic = topic
         self.system_prompt = self._create_system_prompt(topic)
+        self.session.reset(self.system_prompt)
+
+    def reset_session(self):
+        """
+        Forget the conversation so far while keeping the current topic.
+        """
+        self.session.reset()
+
+    def _options(self, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        return {
+            "num_predict": max_tokens,
+            "temperature": temperature,
+            "top_k": 40,
+            "top_p": 0.9,
+            "repeat_penalty": 1.1
+        }
         
     def generate_response(self, user_input: str, max_tokens: int = 500, temperature: float = 0.7) -> str:
         """
@@ -86,26 +268,14 @@ Your role is to be a learning partner, not a lecturer. Help the user discover th
         try:
             response = ollama.chat(
                 model=self.base_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self.system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": user_input
-                    }
-                ],
-                options={
-                    "num_predict": max_tokens,
-                    "temperature": temperature,
-                    "top_k": 40,
-                    "top_p": 0.9,
-                    "repeat_penalty": 1.1
-                }
+                messages=self.session.build_messages(user_input),
+                options=self._options(max_tokens, temperature),
+                keep_alive=self.session.keep_alive
             )
             
-            return response['message']['content']
+            reply = response['message']['content']
+            self.session.record_turn(user_input, reply, response)
+            return reply
             
         except Exception as e:
             return f"Error generating response: {str(e)}"
@@ -128,29 +298,21 @@ Your role is to be a learning partner, not a lecturer. Help the user discover th
         try:
             stream = ollama.chat(
                 model=self.base_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self.system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": user_input
-                    }
-                ],
-                options={
-                    "num_predict": max_tokens,
-                    "temperature": temperature,
-                    "top_k": 40,
-                    "top_p": 0.9,
-                    "repeat_penalty": 1.1
-                },
+                messages=self.session.build_messages(user_input),
+                options=self._options(max_tokens, temperature),
+                keep_alive=self.session.keep_alive,
                 stream=True
             )
             
+            parts = []
+            last_chunk = None
             for chunk in stream:
+                last_chunk = chunk
                 if 'message' in chunk and 'content' in chunk['message']:
+                    parts.append(chunk['message']['content'])
                     yield chunk['message']['content']
+            # Only completed replies become part of the conversation history
+            self.session.record_turn(user_input, "".join(parts), last_chunk)
                     
         except Exception as e:
             yield f"Error streaming response: {str(e)}"
@@ -178,9 +340,100 @@ Your role is to be a learning partner, not a lecturer. Help the user discover th
         return {
             "base_model": self.base_model,
             "topic": self.topic,
-            "system_prompt": self.system_prompt[:200] + "..." if self.system_prompt and len(self.system_prompt) > 200 else self.system_prompt
+            "system_prompt": self.system_prompt[:200] + "..." if self.system_prompt and len(self.system_prompt) > 200 else self.system_prompt,
+            "session": self.session.get_info()
         }
 
+class AsyncCanaryTopicModel(CanaryTopicModel):
+    """
+    Asyncio-native variant of CanaryTopicModel built on ollama.AsyncClient.
+    Uses the same prompt, options and session memory, but generation runs as
+    coroutines so the UI event loop is never blocked waiting on the model.
+    """
+
+    def __init__(self, base_model: str = base_model, topic: Optional[str] = None,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET, keep_alive: str = KEEP_ALIVE,
+                 host: Optional[str] = None):
+        """
+        Initialize the async Canary topic model.
+
+        Args:
+            base_model: The base Ollama model to use
+            topic: The topic to specialize in for learning conversations
+            token_budget: Maximum estimated prompt tokens kept in the session history
+            keep_alive: How long Ollama keeps the model loaded between turns
+            host: Ollama server address (defaults to the client default)
+        """
+        super().__init__(base_model=base_model, topic=topic, token_budget=token_budget, keep_alive=keep_alive)
+        self.client = ollama.AsyncClient(host=host)
+
+    async def generate_response(self, user_input: str, max_tokens: int = 500, temperature: float = 0.7) -> str:
+        """
+        Generate a response using the Canary approach to encourage learning.
+
+        Args:
+            user_input: The user's explanation or input about the topic
+            max_tokens: Maximum number of tokens to generate
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = very random)
+
+        Returns:
+            A response that encourages deeper understanding through questioning
+        """
+        if not self.topic:
+            raise ValueError("No topic set. Please set a topic using set_topic() method.")
+
+        try:
+            response = await self.client.chat(
+                model=self.base_model,
+                messages=self.session.build_messages(user_input),
+                options=self._options(max_tokens, temperature),
+                keep_alive=self.session.keep_alive
+            )
+
+            reply = response['message']['content']
+            self.session.record_turn(user_input, reply, response)
+            return reply
+
+        except Exception as e:
+            return f"Error generating response: {str(e)}"
+
+    async def stream_response(self, user_input: str, max_tokens: int = 500, temperature: float = 0.7):
+        """
+        Stream responses using the Canary approach to encourage learning.
+
+        Args:
+            user_input: The user's explanation or input about the topic
+            max_tokens: Maximum number of tokens to generate
+            temperature: Controls randomness
+
+        Yields:
+            Response chunks that encourage deeper understanding
+        """
+        if not self.topic:
+            raise ValueError("No topic set. Please set a topic using set_topic() method.")
+
+        try:
+            stream = await self.client.chat(
+                model=self.base_model,
+                messages=self.session.build_messages(user_input),
+                options=self._options(max_tokens, temperature),
+                keep_alive=self.session.keep_alive,
+                stream=True
+            )
+
+            parts = []
+            last_chunk = None
+            async for chunk in stream:
+                last_chunk = chunk
+                if 'message' in chunk and 'content' in chunk['message']:
+                    parts.append(chunk['message']['content'])
+                    yield chunk['message']['content']
+            self.session.record_turn(user_input, "".join(parts), last_chunk)
+
+        except Exception as e:
+            yield f"Error streaming response: {str(e)}"
+
+
 # Example usage and testing
 def main():
     """Example usage of the CanaryTopicModel"""
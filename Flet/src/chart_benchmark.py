@@ -0,0 +1,119 @@
+"""
+Compare the study chart renderers: time to import and render, and peak memory.
+
+    python src/chart_benchmark.py --renders 20
+
+Each renderer runs in its own fresh interpreter so import cost and resident
+memory are measured in isolation. "native" is the SVG renderer the app uses;
+"plotly" is the previous plotly + kaleido pipeline, reproduced here as the
+baseline and skipped if those packages aren't installed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_TOPICS = ["Bayes' theorem", "Calculus", "Linear algebra", "Organic chemistry", "World history"]
+SAMPLE_MINUTES = [143.5, 108.5, 73.5, 38.5, 21.0]
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil reports the peak working set
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def load_native():
+    from svg_charts import radar_svg
+    return lambda: radar_svg(SAMPLE_TOPICS, SAMPLE_MINUTES)
+
+
+def load_plotly():
+    import plotly.graph_objects as go
+
+    def render():
+        fig = go.Figure(data=go.Scatterpolar(
+            r=SAMPLE_MINUTES, theta=SAMPLE_TOPICS, fill='toself', name='Time Spent',
+            line_color="#bcb8b1", fillcolor='rgba(188, 184, 177, 0.3)', line_width=3
+        ))
+        fig.update_layout(
+            polar=dict(
+                radialaxis=dict(visible=True, range=[0, max(SAMPLE_MINUTES)], gridcolor="#e0e0e0",
+                                linecolor="#bcb8b1", tickfont=dict(color="#2e2e2e"), tickcolor="#2e2e2e"),
+                angularaxis=dict(gridcolor="#e0e0e0", linecolor="#bcb8b1",
+                                 tickfont=dict(color="#2e2e2e", size=12, weight='bold'), tickcolor="#2e2e2e"),
+                bgcolor='rgba(0,0,0,0)'
+            ),
+            showlegend=False,
+            paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', width=800, height=600
+        )
+        return fig.to_image(format="png", width=800, height=600)
+    return render
+
+
+def load_nothing():
+    return lambda: None
+
+
+# "python" renders nothing: the cost of the bare interpreter, for reference
+RENDERERS = {"python": load_nothing, "native": load_native, "plotly": load_plotly}
+
+
+def run_child(name: str, renders: int):
+    start = time.perf_counter()
+    try:
+        render = RENDERERS[name]()
+    except ImportError as e:
+        print(json.dumps({"skipped": str(e)}))
+        return
+    imported = time.perf_counter()
+    render()
+    first = time.perf_counter()
+    for _ in range(renders):
+        render()
+    done = time.perf_counter()
+    print(json.dumps({
+        "import_s": imported - start,
+        "first_render_s": first - imported,
+        "render_s": (done - first) / renders if renders else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the study chart renderers")
+    parser.add_argument("--renders", type=int, default=20, help="Warm renders to average")
+    parser.add_argument("--child", choices=RENDERERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.renders)
+        return
+
+    print(f"{'renderer':<10}{'import':>10}{'first':>10}{'warm':>12}{'peak RSS':>12}")
+    for name in RENDERERS:
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, "--renders", str(args.renders)],
+                               capture_output=True, text=True)
+        if child.returncode != 0:
+            print(f"{name:<10}failed: {child.stderr.strip().splitlines()[-1] if child.stderr.strip() else child.returncode}")
+            continue
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        if "skipped" in result:
+            print(f"{name:<10}skipped ({result['skipped']})")
+            continue
+        print(f"{name:<10}{result['import_s'] * 1000:>8.0f}ms{result['first_render_s'] * 1000:>8.0f}ms"
+              f"{result['render_s'] * 1000:>10.2f}ms{result['peak_rss_mb']:>9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
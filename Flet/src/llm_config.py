@@ -0,0 +1,4 @@
+# Settings shared by the Ollama callers, in a module of their own so reading them doesn't import ollama
+
+# How long Ollama keeps the model (and its KV cache) resident between turns
+KEEP_ALIVE = "30m"
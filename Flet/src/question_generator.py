@@ -1,7 +1,7 @@
 import asyncio
 import os
 import sys
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import json
 
 # Try to import ollama, if not available, provide installation instructions
@@ -11,6 +11,13 @@ except ImportError:
     print("Ollama package not found. Please install it using:")
     print("pip install ollama")
     sys.exit(1)
+
+try:
+    from .response_cache import ResponseCache, cached_chat, cached_async_chat, deterministic_options, cache_key
+    from .llm_config import KEEP_ALIVE
+except ImportError:
+    from response_cache import ResponseCache, cached_chat, cached_async_chat, deterministic_options, cache_key
+    from llm_config import KEEP_ALIVE
     
 class QuestionGenerator:
     """
@@ -18,34 +25,42 @@ class QuestionGenerator:
     Generates thoughtful questions based on topic and conversation context.
     """
     
-    def __init__(self, model_name: str = "gemma3:1b-it-qat"):
+    def __init__(self, model_name: str = "gemma3:1b-it-qat", cache: Optional[ResponseCache] = None,
+                 deterministic: bool = False):
         """
         Initialize the question generator.
         
         Args:
             model_name: The Ollama model to use for question generation
+            cache: Response cache for repeated requests, used only when deterministic (optional)
+            deterministic: Pin temperature to 0 and use a fixed seed so cached replies are reproducible
         """
         self.model_name = model_name
         self.last_response = ""
+        self.cache = cache
+        self.deterministic = deterministic
+        self.keep_alive = KEEP_ALIVE
         
-    def generate_question(self, topic: str, last_response: str = "", max_tokens: int = 300, temperature: float = 0.8) -> str:
-        """
-        Generate a thoughtful question based on the topic and last Canary response.
-        
-        Args:
-            topic: The current topic being studied
-            last_response: The last response from Canary (optional)
-            max_tokens: Maximum number of tokens to generate
-            temperature: Controls randomness
-            
-        Returns:
-            A thoughtful question to help the user understand the topic better
-        """
-        if not topic:
-            return "Please set a topic first."
-            
-        # Create a focused prompt for question generation
-        question_prompt = f"""You are Canary, a learning assistant focused on {topic}. 
+    def _options(self, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        options = {
+            "num_predict": max_tokens,
+            "temperature": temperature,
+            "top_k": 40,
+            "top_p": 0.9,
+            "repeat_penalty": 1.1
+        }
+        return deterministic_options(options) if self.deterministic else options
+
+    def _messages(self, prompt: str) -> List[Dict[str, str]]:
+        return [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+    def _question_prompt(self, topic: str, last_response: str) -> str:
+        return f"""You are Canary, a learning assistant focused on {topic}. 
 
 Based on the topic '{topic}' and the last conversation context, generate a thoughtful and engaging question that will help the user deepen their understanding of {topic}.
 
@@ -62,26 +77,68 @@ Last response context: {last_response if last_response else 'No previous context
 
 Generate a single, focused question:"""
 
-        try:
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": question_prompt
-                    }
-                ],
-                options={
-                    "num_predict": max_tokens,
-                    "temperature": temperature,
-                    "top_k": 40,
-                    "top_p": 0.9,
-                    "repeat_penalty": 1.1
-                }
-            )
-            
-            return response['message']['content'].strip()
+    def _deep_question_prompt(self, topic: str, last_response: str) -> str:
+        return f"""You are Canary, a learning assistant focused on {topic}. 
+
+Generate a deep, analytical question that will challenge the user's understanding of {topic}. This should be a question that:
+
+- Requires critical thinking and analysis
+- Connects different concepts within {topic}
+- Asks for real-world applications or implications
+- Encourages the user to think beyond surface-level understanding
+- Could lead to a deeper discussion about {topic}
+- Is thought-provoking and engaging
+
+Topic: {topic}
+Last response context: {last_response if last_response else 'No previous context'}
+
+Generate a single, deep analytical question:"""
+
+    def _follow_up_prompt(self, topic: str, user_explanation: str, last_response: str) -> str:
+        return f"""You are Canary, a learning assistant focused on {topic}. 
+
+The user just explained something about {topic}. Based on their explanation, generate a follow-up question that will help them:
+
+- Clarify any unclear points in their explanation
+- Explore related aspects they might have missed
+- Connect their explanation to broader concepts in {topic}
+- Apply their understanding to practical scenarios
+- Think more deeply about the implications
+
+User's explanation: {user_explanation}
+Topic: {topic}
+Last response context: {last_response if last_response else 'No previous context'}
+
+Generate a single, focused follow-up question:"""
+
+    def _chat(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        return cached_chat(
+            ollama.chat,
+            self.cache,
+            model=self.model_name,
+            messages=self._messages(prompt),
+            options=self._options(max_tokens, temperature),
+            keep_alive=self.keep_alive
+        ).strip()
+        
+    def generate_question(self, topic: str, last_response: str = "", max_tokens: int = 300, temperature: float = 0.8) -> str:
+        """
+        Generate a thoughtful question based on the topic and last Canary response.
+        
+        Args:
+            topic: The current topic being studied
+            last_response: The last response from Canary (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Controls randomness
             
+        Returns:
+            A thoughtful question to help the user understand the topic better
+        """
+        if not topic:
+            return "Please set a topic first."
+
+        try:
+            return self._chat(self._question_prompt(topic, last_response), max_tokens, temperature)
         except Exception as e:
             return f"Error generating question: {str(e)}"
     
@@ -100,43 +157,9 @@ Generate a single, focused question:"""
         """
         if not topic:
             return "Please set a topic first."
-            
-        deep_question_prompt = f"""You are Canary, a learning assistant focused on {topic}. 
-
-Generate a deep, analytical question that will challenge the user's understanding of {topic}. This should be a question that:
-
-- Requires critical thinking and analysis
-- Connects different concepts within {topic}
-- Asks for real-world applications or implications
-- Encourages the user to think beyond surface-level understanding
-- Could lead to a deeper discussion about {topic}
-- Is thought-provoking and engaging
-
-Topic: {topic}
-Last response context: {last_response if last_response else 'No previous context'}
-
-Generate a single, deep analytical question:"""
 
         try:
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": deep_question_prompt
-                    }
-                ],
-                options={
-                    "num_predict": max_tokens,
-                    "temperature": temperature,
-                    "top_k": 40,
-                    "top_p": 0.9,
-                    "repeat_penalty": 1.1
-                }
-            )
-            
-            return response['message']['content'].strip()
-            
+            return self._chat(self._deep_question_prompt(topic, last_response), max_tokens, temperature)
         except Exception as e:
             return f"Error generating deep question: {str(e)}"
     
@@ -156,43 +179,9 @@ Generate a single, deep analytical question:"""
         """
         if not topic:
             return "Please set a topic first."
-            
-        follow_up_prompt = f"""You are Canary, a learning assistant focused on {topic}. 
-
-The user just explained something about {topic}. Based on their explanation, generate a follow-up question that will help them:
-
-- Clarify any unclear points in their explanation
-- Explore related aspects they might have missed
-- Connect their explanation to broader concepts in {topic}
-- Apply their understanding to practical scenarios
-- Think more deeply about the implications
-
-User's explanation: {user_explanation}
-Topic: {topic}
-Last response context: {last_response if last_response else 'No previous context'}
-
-Generate a single, focused follow-up question:"""
 
         try:
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": follow_up_prompt
-                    }
-                ],
-                options={
-                    "num_predict": max_tokens,
-                    "temperature": temperature,
-                    "top_k": 40,
-                    "top_p": 0.9,
-                    "repeat_penalty": 1.1
-                }
-            )
-            
-            return response['message']['content'].strip()
-            
+            return self._chat(self._follow_up_prompt(topic, user_explanation, last_response), max_tokens, temperature)
         except Exception as e:
             return f"Error generating follow-up question: {str(e)}"
     
@@ -220,3 +209,144 @@ Generate a single, focused follow-up question:"""
             "model_name": self.model_name,
             "last_response": self.last_response[:100] + "..." if self.last_response and len(self.last_response) > 100 else self.last_response
         }
+
+
+class AsyncQuestionGenerator(QuestionGenerator):
+    """
+    Asyncio-native question generator built on ollama.AsyncClient.
+    Shares prompts and options with QuestionGenerator, but every call is a
+    coroutine so several generations can run on one event loop.
+    """
+
+    def __init__(self, model_name: str = "gemma3:1b-it-qat", cache: Optional[ResponseCache] = None,
+                 deterministic: bool = False, host: Optional[str] = None):
+        """
+        Initialize the async question generator.
+
+        Args:
+            model_name: The Ollama model to use for question generation
+            cache: Response cache for repeated requests, used only when deterministic (optional)
+            deterministic: Pin temperature to 0 and use a fixed seed so cached replies are reproducible
+            host: Ollama server address (defaults to the client default)
+        """
+        super().__init__(model_name, cache=cache, deterministic=deterministic)
+        self.client = ollama.AsyncClient(host=host)
+
+    async def _chat(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        content = await cached_async_chat(
+            self.client,
+            self.cache,
+            model=self.model_name,
+            messages=self._messages(prompt),
+            options=self._options(max_tokens, temperature),
+            keep_alive=self.keep_alive
+        )
+        return content.strip()
+
+    async def generate_question(self, topic: str, last_response: str = "", max_tokens: int = 300, temperature: float = 0.8) -> str:
+        """
+        Generate a thoughtful question based on the topic and last Canary response.
+
+        Args:
+            topic: The current topic being studied
+            last_response: The last response from Canary (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Controls randomness
+
+        Returns:
+            A thoughtful question to help the user understand the topic better
+        """
+        if not topic:
+            return "Please set a topic first."
+
+        try:
+            return await self._chat(self._question_prompt(topic, last_response), max_tokens, temperature)
+        except Exception as e:
+            return f"Error generating question: {str(e)}"
+
+    async def generate_deep_question(self, topic: str, last_response: str = "", max_tokens: int = 400, temperature: float = 0.9) -> str:
+        """
+        Generate a deep, analytical question that requires critical thinking.
+
+        Args:
+            topic: The current topic being studied
+            last_response: The last response from Canary (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Controls randomness
+
+        Returns:
+            A deep analytical question
+        """
+        if not topic:
+            return "Please set a topic first."
+
+        try:
+            return await self._chat(self._deep_question_prompt(topic, last_response), max_tokens, temperature)
+        except Exception as e:
+            return f"Error generating deep question: {str(e)}"
+
+    async def generate_follow_up_question(self, topic: str, user_explanation: str, last_response: str = "", max_tokens: int = 250, temperature: float = 0.7) -> str:
+        """
+        Generate a follow-up question based on the user's explanation.
+
+        Args:
+            topic: The current topic being studied
+            user_explanation: What the user just explained
+            last_response: The last response from Canary (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Controls randomness
+
+        Returns:
+            A follow-up question based on the user's explanation
+        """
+        if not topic:
+            return "Please set a topic first."
+
+        try:
+            return await self._chat(self._follow_up_prompt(topic, user_explanation, last_response), max_tokens, temperature)
+        except Exception as e:
+            return f"Error generating follow-up question: {str(e)}"
+
+    async def stream_question(self, topic: str, last_response: str = "", max_tokens: int = 300, temperature: float = 0.8):
+        """
+        Stream a thoughtful question as it is generated.
+
+        Args:
+            topic: The current topic being studied
+            last_response: The last response from Canary (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Controls randomness
+
+        Yields:
+            Question text chunks
+        """
+        if not topic:
+            yield "Please set a topic first."
+            return
+
+        messages = self._messages(self._question_prompt(topic, last_response))
+        options = self._options(max_tokens, temperature)
+        key = cache_key(self.cache, self.model_name, messages, options)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        try:
+            stream = await self.client.chat(
+                model=self.model_name,
+                messages=messages,
+                options=options,
+                keep_alive=self.keep_alive,
+                stream=True
+            )
+            parts = []
+            async for chunk in stream:
+                if 'message' in chunk and 'content' in chunk['message']:
+                    parts.append(chunk['message']['content'])
+                    yield chunk['message']['content']
+            if key is not None:
+                self.cache.put(key, "".join(parts))
+        except Exception as e:
+            yield f"Error streaming question: {str(e)}"
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage', 'temp', 'llm_cache.sqlite3')
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+DETERMINISTIC_SEED = 42
+
+
+def make_key(model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None,
+             format: Optional[Any] = None) -> str:
+    """
+    Build a stable cache key for a chat request.
+
+    Args:
+        model: The Ollama model name
+        messages: The chat messages sent to the model
+        options: Generation options
+        format: Output format or JSON schema, if any
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "options": options or {}, "format": format},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def deterministic_options(options: Optional[Dict[str, Any]] = None, seed: int = DETERMINISTIC_SEED) -> Dict[str, Any]:
+    """
+    Return a copy of the options with sampling pinned, so equal requests give equal replies.
+
+    Args:
+        options: Generation options to pin
+        seed: Fixed sampling seed
+
+    Returns:
+        Options with temperature 0 and a fixed seed
+    """
+    pinned = dict(options or {})
+    pinned["temperature"] = 0
+    pinned["seed"] = seed
+    return pinned
+
+
+def is_deterministic(options: Optional[Dict[str, Any]]) -> bool:
+    """Return True if the options pin sampling (temperature 0 and a seed), as deterministic_options() does."""
+    return bool(options) and options.get("temperature") == 0 and options.get("seed") is not None
+
+
+def cache_key(cache: Optional["ResponseCache"], model: str, messages: List[Dict[str, Any]],
+              options: Optional[Dict[str, Any]] = None, format: Optional[Any] = None) -> Optional[str]:
+    """
+    Get the cache key for a request, or None if it must not be cached.
+
+    Only requests with pinned sampling are cached: a sampled reply is one
+    draw among many, and replaying it would return the same "random"
+    answer forever.
+    """
+    if cache is None or not is_deterministic(options):
+        return None
+    return make_key(model, messages, options, format)
+
+
+class ResponseCache:
+    """
+    Persistent LLM response cache stored in a small SQLite file.
+
+    Entries are keyed by model, messages, options and format schema, and are
+    evicted least-recently-used first once either the entry count or the total
+    size limit is exceeded. Hit and miss counters are kept for sizing.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Open (or create) the cache.
+
+        Args:
+            path: Location of the cache database
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached responses in bytes
+        """
+        self.path = os.path.abspath(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response and mark it as recently used.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            The cached response text, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str):
+        """
+        Store a response, evicting the least recently used entries if over the limits.
+
+        Args:
+            key: Key from make_key()
+            value: Response text to cache
+        """
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        stale = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        """Remove every cached response and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache usage counters.
+
+        Returns:
+            Dictionary with hits, misses, hit rate, entry count and stored bytes
+        """
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def cached_chat(chat: Callable, cache: Optional[ResponseCache], model: str, messages: List[Dict[str, Any]],
+                options: Optional[Dict[str, Any]] = None, format: Optional[Any] = None, **kwargs) -> str:
+    """
+    Run a blocking chat call through the cache and return the reply text.
+
+    Args:
+        chat: ollama.chat or a Client.chat bound method
+        cache: Cache to consult (only for deterministic options), or None to always call the model
+        model: The Ollama model name
+        messages: The chat messages
+        options: Generation options
+        format: Output format or JSON schema, if any
+
+    Returns:
+        The reply content
+    """
+    key = cache_key(cache, model, messages, options, format)
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    response = chat(model=model, messages=messages, options=options, format=format, **kwargs)
+    content = response['message']['content']
+    if key is not None:
+        cache.put(key, content)
+    return content
+
+
+async def cached_async_chat(client, cache: Optional[ResponseCache], model: str, messages: List[Dict[str, Any]],
+                            options: Optional[Dict[str, Any]] = None, format: Optional[Any] = None, **kwargs) -> str:
+    """
+    Run an ollama.AsyncClient chat call through the cache and return the reply text.
+
+    Args:
+        client: The ollama.AsyncClient to use on a miss
+        cache: Cache to consult (only for deterministic options), or None to always call the model
+        model: The Ollama model name
+        messages: The chat messages
+        options: Generation options
+        format: Output format or JSON schema, if any
+
+    Returns:
+        The reply content
+    """
+    key = cache_key(cache, model, messages, options, format)
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    response = await client.chat(model=model, messages=messages, options=options, format=format, **kwargs)
+    content = response['message']['content']
+    if key is not None:
+        cache.put(key, content)
+    return content
@@ -1,58 +1,220 @@
-import plotly.graph_objects as go
-import pandas as pd
+import base64
+import hashlib
+import json
 import os
 import sys
+import threading
 from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'storage', 'data', 'DB'))
 from DB_API import TopicsDB
 
-def create_radar_chart():
-    # Colors
-    BG_COLOR, CONTAINER_BG, TEXT_FIELD_BG, TEXT_COLOR, BLACK_TEXT = "#4a4a4a", "#bcb8b1", "#e0e0e0", "#2e2e2e", "#2e2e2e"
-    
-    # Get data from database
-    df = pd.DataFrame(TopicsDB().get_all_topics())
-    df['time_spend'] = pd.to_numeric(df['time_spend'], errors='coerce').fillna(0)
-    df['date'] = pd.to_datetime(df['date'])
-    df = df[df['date'] >= datetime.now() - timedelta(days=7)]
-    
-    if df.empty:
-        print("No data found for the last 7 days.")
-        return None
-    
-    topic_stats = df.groupby('topic_name')['time_spend'].sum().sort_values(ascending=False).head(5)
-    if len(topic_stats) < 2:
-        print("Not enough topics for a radar chart.")
+try:
+    from .svg_charts import radar_svg, bar_svg
+except ImportError:
+    from svg_charts import radar_svg, bar_svg
+
+TEMP_DIR = "./storage/temp/"
+# Chart kinds and their titles
+CHARTS = {
+    "radar": "Study Time Distribution (Last 7 Days)",
+    "daily": "Study Time per Day (Last 7 Days)",
+    "weekly": "Study Time per Week (Last 8 Weeks)",
+}
+RADAR_TOPICS = 5
+DAILY_DAYS = 7
+WEEKLY_WEEKS = 8
+# Bar chart series, stacked in this order
+ACTIVITIES = ("speaking", "quiz", "flashcards")
+
+
+def get_chart_data(db=None, kind: str = "radar") -> Dict:
+    """
+    Read the aggregates a chart is drawn from, out of the study-time rollups.
+
+    Args:
+        db: TopicsDB to read from
+        kind: One of CHARTS
+
+    Returns:
+        {"labels": [...], "values": [...]} for the radar chart, or
+        {"labels": [...], "series": {activity: [...]}} for the bar charts
+    """
+    db = db or TopicsDB()
+    if kind == "radar":
+        # Minutes per topic over the last 7 days
+        topic_stats = db.get_study_time_by_topic(days=7, limit=RADAR_TOPICS)
+        return {"labels": [name for name, _ in topic_stats], "values": [minutes for _, minutes in topic_stats]}
+
+    today = datetime.now().date()
+    if kind == "daily":
+        slots = [(today - timedelta(days=n)).strftime('%Y-%m-%d') for n in range(DAILY_DAYS - 1, -1, -1)]
+        rows, field = db.get_daily_study_time(days=DAILY_DAYS), 'date'
+        labels = [datetime.strptime(slot, '%Y-%m-%d').strftime('%a %d') for slot in slots]
+    elif kind == "weekly":
+        monday = today - timedelta(days=today.weekday())
+        slots = [(monday - timedelta(weeks=n)).strftime('%Y-%m-%d') for n in range(WEEKLY_WEEKS - 1, -1, -1)]
+        rows, field = db.get_weekly_study_time(weeks=WEEKLY_WEEKS), 'week'
+        labels = [datetime.strptime(slot, '%Y-%m-%d').strftime('%d %b') for slot in slots]
+    else:
+        raise ValueError(f"Unknown chart '{kind}', expected one of {', '.join(CHARTS)}")
+
+    index = {slot: i for i, slot in enumerate(slots)}
+    series = {activity: [0.0] * len(slots) for activity in ACTIVITIES}
+    for row in rows:
+        if row[field] in index:
+            series.setdefault(row['activity'], [0.0] * len(slots))[index[row[field]]] += row['minutes']
+    return {"labels": labels, "series": {activity: [round(value, 1) for value in values]
+                                         for activity, values in series.items() if any(values)}}
+
+
+def chart_key(kind: str, data: Dict) -> str:
+    """Hash the aggregates a chart is drawn from; equal keys mean identical charts."""
+    payload = json.dumps([kind, data], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_chart(kind: str, data: Dict) -> Optional[bytes]:
+    """
+    Draw a chart from get_chart_data() output.
+
+    Returns:
+        SVG bytes, or None if there is too little data to plot
+    """
+    if kind == "radar":
+        if len(data["labels"]) < 2:
+            print("Not enough topics for a radar chart.")
+            return None
+        return radar_svg(data["labels"], data["values"])
+    if not data["series"]:
+        print(f"No study time for the {kind} chart.")
         return None
-    
-    topics, values = topic_stats.index.tolist(), topic_stats.values.tolist()
-    
-    # Create radar chart
-    fig = go.Figure(data=go.Scatterpolar(
-        r=values, theta=topics, fill='toself', name='Time Spent',
-        line_color=CONTAINER_BG, fillcolor=f'rgba(188, 184, 177, 0.3)', line_width=3
-    ))
-    
-    # Update layout
-    fig.update_layout(
-        polar=dict(
-            radialaxis=dict(visible=True, range=[0, values], gridcolor=TEXT_FIELD_BG, 
-                           linecolor=CONTAINER_BG, tickfont=dict(color=BLACK_TEXT), tickcolor=BLACK_TEXT),
-            angularaxis=dict(gridcolor=TEXT_FIELD_BG, linecolor=CONTAINER_BG, 
-                           tickfont=dict(color=TEXT_COLOR, size=12, weight='bold'), tickcolor=TEXT_COLOR),
-            bgcolor='rgba(0,0,0,0)'
-        ),
-        showlegend=False,
-        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', width=800, height=600
-    )
-    
-    # Save
-    temp_dir = "./storage/temp/"
-    os.makedirs(temp_dir, exist_ok=True)
-    save_path = os.path.join(temp_dir, "radar_chart_7days.png")
-    fig.write_image(save_path, width=800, height=600)
-    return save_path
-
-def get_radar_chart_path():
-    return create_radar_chart()
+    return bar_svg(data["labels"], data["series"])
+
+
+class _RenderWorker:
+    """
+    One long-lived daemon thread that renders every ChartCache in turn.
+
+    A cache submitted while it is already waiting is queued once, so
+    repeated refreshes collapse into a single pass, and two renders of the
+    same chart never run at the same time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queued: List["ChartCache"] = []
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, cache: "ChartCache"):
+        with self._lock:
+            if cache not in self._queued:
+                self._queued.append(cache)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if not self._queued:
+                    # Cleared under the lock, so a submit() can't slip in between the check and the clear
+                    self._wake.clear()
+                    continue
+                cache = self._queued.pop(0)
+            try:
+                cache._render_pass()
+            except Exception as e:
+                print(f"[Spider Graph] Error: {e}")
+
+
+_worker = _RenderWorker()
+
+
+class ChartCache:
+    """
+    Keeps the latest render of one chart in memory as base64, keyed by its data.
+
+    `image` is available immediately; on first use it comes from the SVG
+    saved by the previous run. refresh() queues the chart on the shared
+    render thread, which reads the aggregates and renders again only when
+    their hash differs from the cached one. Refreshes requested while one
+    is queued are folded into it.
+    """
+
+    def __init__(self, db=None, kind: str = "radar", temp_dir: str = TEMP_DIR):
+        """
+        Initialize the cache and load the chart saved by the last run, if any.
+
+        Args:
+            db: TopicsDB to read study time from
+            kind: One of CHARTS
+            temp_dir: Directory holding the saved chart and its data key
+        """
+        if kind not in CHARTS:
+            raise ValueError(f"Unknown chart '{kind}', expected one of {', '.join(CHARTS)}")
+        self.db = db
+        self.kind = kind
+        self.title = CHARTS[kind]
+        self.temp_dir = temp_dir
+        self.image: Optional[str] = None
+        self.key: Optional[str] = None
+        self._chart_file = os.path.join(temp_dir, f"{kind}_chart.svg")
+        # Hash of the data behind the saved chart, so a restart can tell whether it is still current
+        self._key_file = os.path.join(temp_dir, f"{kind}_chart.key")
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[Optional[str]], None]] = []
+        self._load_saved()
+
+    def _load_saved(self):
+        try:
+            with open(self._key_file, encoding="utf-8") as f:
+                key = f.read().strip()
+            with open(self._chart_file, "rb") as f:
+                self.image = base64.b64encode(f.read()).decode("ascii")
+            self.key = key
+        except OSError:
+            pass
+
+    def _save(self, image: bytes, key: str):
+        os.makedirs(self.temp_dir, exist_ok=True)
+        with open(self._chart_file, "wb") as f:
+            f.write(image)
+        with open(self._key_file, "w", encoding="utf-8") as f:
+            f.write(key)
+
+    def refresh(self, on_ready: Optional[Callable[[Optional[str]], None]] = None):
+        """
+        Re-render in the background if the study-time data has changed.
+
+        Args:
+            on_ready: Called from the render thread with the new base64 image
+                (None if there is too little data to chart), only if it changed
+        """
+        if on_ready:
+            with self._lock:
+                self._callbacks.append(on_ready)
+        _worker.submit(self)
+
+    def _render_pass(self):
+        # Callbacks registered from here on wait for the next pass, which their refresh() has queued
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+        data = get_chart_data(self.db, self.kind)
+        key = chart_key(self.kind, data)
+        if key == self.key:
+            return
+        rendered = render_chart(self.kind, data)
+        image = base64.b64encode(rendered).decode("ascii") if rendered else None
+        if rendered:
+            self._save(rendered, key)
+        self.image, self.key = image, key
+        for callback in callbacks:
+            try:
+                callback(image)
+            except Exception as e:
+                print(f"[Spider Graph] Error: {e}")
@@ -0,0 +1,167 @@
+import builtins
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
+
+
+class StartupProfiler:
+    """
+    Breaks app startup time down by import and initialization step.
+
+    While enabled, every module imported for the first time is timed at the
+    outermost import statement that pulled it in, so "flet" includes
+    everything flet itself imports. step() times named initialization
+    blocks, and lazily loaded subsystems report their load time too.
+    report() prints the breakdown once the first view is on screen.
+    Disabled, every method returns immediately.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initialize the profiler.
+
+        Args:
+            enabled: Whether to collect and print timings at all
+        """
+        self.enabled = enabled
+        self.imports: List[Tuple[str, float]] = []
+        self.steps: List[Tuple[str, float]] = []
+        self.loads: List[Tuple[str, float, bool]] = []
+        self._start = time.perf_counter()
+        self._first_paint: Optional[float] = None
+        self._local = threading.local()
+        self._original_import = builtins.__import__
+
+    def start(self):
+        """Start timing imports (call before the imports to be measured)."""
+        if self.enabled:
+            self._start = time.perf_counter()
+            builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only the outermost import of a module not loaded yet is timed; nested imports count toward it
+        if getattr(self._local, 'depth', 0):
+            return self._original_import(name, globals, locals, fromlist, level)
+        full_name = name
+        if level:
+            try:
+                full_name = importlib.util.resolve_name("." * level + name, (globals or {}).get('__package__') or "")
+            except (ImportError, ValueError):
+                pass
+        if full_name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._local.depth = 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._local.depth = 0
+            self.imports.append((full_name, time.perf_counter() - start))
+
+    @contextmanager
+    def step(self, name: str):
+        """Time an initialization step."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def record_load(self, name: str, seconds: float):
+        """Record the load time of a lazily imported subsystem."""
+        if not self.enabled:
+            return
+        after_paint = self._first_paint is not None
+        self.loads.append((name, seconds, after_paint))
+        if after_paint:
+            print(f"[Startup] {name} loaded in {seconds * 1000:.0f} ms")
+
+    def report(self, top: int = 15):
+        """
+        Print the startup breakdown and stop timing imports. Call once the first view is shown.
+
+        Args:
+            top: Number of slowest imports to list
+        """
+        if not self.enabled or self._first_paint is not None:
+            return
+        self._first_paint = time.perf_counter()
+        builtins.__import__ = self._original_import
+        total = self._first_paint - self._start
+        imported = sum(seconds for _, seconds in self.imports)
+        print(f"[Startup] First view after {total * 1000:.0f} ms "
+              f"({imported * 1000:.0f} ms in {len(self.imports)} imports)")
+        print("[Startup] Slowest imports:")
+        for name, seconds in sorted(self.imports, key=lambda item: item[1], reverse=True)[:top]:
+            print(f"    {seconds * 1000:8.1f} ms  {name}")
+        if self.steps:
+            print("[Startup] Initialization steps:")
+            for name, seconds in self.steps:
+                print(f"    {seconds * 1000:8.1f} ms  {name}")
+        if self.loads:
+            print("[Startup] Subsystems loaded before the first view:")
+            for name, seconds, _ in self.loads:
+                print(f"    {seconds * 1000:8.1f} ms  {name}")
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access.
+
+    The import happens once, under a lock, so a background warm-up and a
+    user action racing for the same subsystem don't load it twice. Callbacks
+    registered with on_load() run right after the import (or immediately if
+    it already happened), for setup that shouldn't force the import early.
+    """
+
+    def __init__(self, name: str, profiler: Optional[StartupProfiler] = None):
+        """
+        Initialize the placeholder without importing anything.
+
+        Args:
+            name: Module to import, e.g. "s2t.s2t"
+            profiler: Receives the import time, if given
+        """
+        self._name = name
+        self._profiler = profiler
+        self._module = None
+        self._lock = threading.Lock()
+        self._on_load: List[Callable] = []
+
+    def load(self):
+        """Import the module now if it isn't yet, and return it."""
+        if self._module is not None:
+            return self._module
+        with self._lock:
+            if self._module is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self._name)
+                if self._profiler:
+                    self._profiler.record_load(self._name, time.perf_counter() - start)
+                for callback in self._on_load:
+                    callback(module)
+                self._module = module
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def on_load(self, callback: Callable):
+        """Run callback(module) once the module is imported."""
+        with self._lock:
+            if self._module is None:
+                self._on_load.append(callback)
+                return
+        callback(self._module)
+
+    def __getattr__(self, attr):
+        # Only reached for names not set in __init__, i.e. the module's own attributes
+        return getattr(self.load(), attr)
@@ -0,0 +1,154 @@
+import threading
+import time
+from datetime import datetime
+from typing import Optional, List, Tuple
+
+# Time without any interaction after which a span stops counting
+IDLE_TIMEOUT = 300.0
+# Seconds between background flushes; an open span is also cut and recorded at each flush
+FLUSH_INTERVAL = 30.0
+# Flush early once this many events are waiting
+MAX_BUFFERED_EVENTS = 50
+# Spans shorter than this are dropped
+MIN_EVENT_SECONDS = 1
+
+
+class StudyTimer:
+    """
+    Records active study time per topic and activity (speaking, quiz, flashcards).
+
+    start() opens a span for a topic and activity, closing whatever was open.
+    touch() marks user interaction; a span stops counting IDLE_TIMEOUT after
+    the last one and resumes on the next touch(). Closed spans become events
+    in an in-memory buffer that a background thread writes to the database in
+    batches, every `flush_interval` seconds or once `max_buffered` events wait.
+    """
+
+    def __init__(self, db, flush_interval: float = FLUSH_INTERVAL, max_buffered: int = MAX_BUFFERED_EVENTS,
+                 idle_timeout: float = IDLE_TIMEOUT):
+        """
+        Initialize the timer and start its flush thread.
+
+        Args:
+            db: TopicsDB that receives the events through record_study_events()
+            flush_interval: Seconds between background flushes
+            max_buffered: Number of waiting events that triggers an early flush
+            idle_timeout: Seconds without interaction after which time stops counting
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._buffer: List[Tuple[int, str, str, int]] = []
+        self._current: Optional[Tuple[int, str]] = None
+        self._span_start: Optional[float] = None
+        self._span_wall: Optional[datetime] = None
+        self._last_touch = 0.0
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def start(self, topic_id: Optional[int], activity: str):
+        """
+        Begin timing an activity on a topic. Does nothing if it is already being timed.
+
+        Args:
+            topic_id: Topic being studied; None stops timing
+            activity: Kind of study, e.g. "speaking", "quiz" or "flashcards"
+        """
+        with self._lock:
+            if topic_id is not None and self._current == (topic_id, activity) and self._span_start is not None:
+                self._last_touch = time.monotonic()
+                return
+            self._end_span(time.monotonic())
+            self._current = (topic_id, activity) if topic_id is not None else None
+            if self._current:
+                self._begin_span()
+
+    def touch(self):
+        """Mark user interaction, keeping the current span alive (or resuming it after idling)."""
+        with self._lock:
+            now = time.monotonic()
+            if self._span_start is not None and now - self._last_touch > self.idle_timeout:
+                self._end_span(now)
+            if self._span_start is None and self._current:
+                self._begin_span()
+            self._last_touch = now
+
+    def stop(self):
+        """Stop timing; the open span is buffered as an event."""
+        with self._lock:
+            self._end_span(time.monotonic())
+            self._current = None
+
+    def _begin_span(self):
+        self._span_start = self._last_touch = time.monotonic()
+        self._span_wall = datetime.now()
+
+    def _end_span(self, now: float):
+        if self._span_start is None:
+            return
+        # Idle time after the last interaction isn't study time
+        end = min(now, self._last_touch + self.idle_timeout)
+        seconds = int(round(end - self._span_start))
+        topic_id, activity = self._current
+        if seconds >= MIN_EVENT_SECONDS:
+            self._buffer.append((topic_id, activity, self._span_wall.strftime('%Y-%m-%d %H:%M:%S'), seconds))
+        self._span_start = None
+        if len(self._buffer) >= self.max_buffered:
+            self._wake.set()
+
+    def _checkpoint(self):
+        # Record the open span so far and carry on timing, so long sessions show up before they end
+        now = time.monotonic()
+        if self._span_start is None or now - self._last_touch > self.idle_timeout:
+            self._end_span(now)
+            return
+        # Whole seconds only; the fraction carries over into the continuing span
+        seconds = int(now - self._span_start)
+        if seconds < MIN_EVENT_SECONDS:
+            return
+        topic_id, activity = self._current
+        self._buffer.append((topic_id, activity, self._span_wall.strftime('%Y-%m-%d %H:%M:%S'), seconds))
+        self._span_start += seconds
+        self._span_wall = datetime.now()
+
+    def flush(self) -> int:
+        """
+        Write buffered events (and the open span so far) to the database now.
+
+        Returns:
+            Number of events written
+        """
+        with self._lock:
+            self._checkpoint()
+            events, self._buffer = self._buffer, []
+        if not events:
+            return 0
+        try:
+            return self.db.record_study_events(events)
+        except Exception as e:
+            print(f"[StudyTimer] Error: {e}")
+            # Keep the events for the next flush
+            with self._lock:
+                self._buffer = events + self._buffer
+            return 0
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if not self._closed:
+                self.flush()
+
+    def close(self):
+        """Stop timing, write everything still buffered and end the flush thread."""
+        if self._closed:
+            return
+        self.stop()
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
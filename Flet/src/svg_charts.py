@@ -0,0 +1,150 @@
+import math
+from typing import Dict, List, Sequence
+from xml.sax.saxutils import escape
+
+# Colors, as in the app theme
+CONTAINER_BG = "#bcb8b1"
+TEXT_FIELD_BG = "#e0e0e0"
+BLACK_TEXT = "#2e2e2e"
+FILL = "rgb(188, 184, 177)"
+FILL_OPACITY = 0.3
+# One shade per activity in the bar charts, darkest first
+SERIES_COLORS = ("#6b6760", "#928d84", "#bcb8b1", "#d6d2cb")
+FONT = "Cairo, Arial, sans-serif"
+
+
+def _nice_max(value: float) -> float:
+    """Round a maximum up to 1, 2, 2.5 or 5 times a power of ten so the axis ticks are round numbers."""
+    if value <= 0:
+        return 1.0
+    magnitude = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 2.5, 5, 10):
+        if value <= step * magnitude:
+            return step * magnitude
+    return 10 * magnitude
+
+
+def _number(value: float) -> str:
+    return f"{value:g}"
+
+
+def _svg(width: int, height: int, body: List[str]) -> bytes:
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="{FONT}">\n' + "\n".join(body) + "\n</svg>\n"
+    ).encode("utf-8")
+
+
+def radar_svg(labels: Sequence[str], values: Sequence[float], width: int = 800, height: int = 600,
+              rings: int = 5) -> bytes:
+    """
+    Draw a filled radar (spider) chart.
+
+    Args:
+        labels: One axis label per value, placed clockwise from the top
+        values: Non-negative values, scaled against a rounded-up maximum
+        width: Image width in pixels
+        height: Image height in pixels
+        rings: Number of grid rings (and radial ticks)
+
+    Returns:
+        SVG document as UTF-8 bytes
+    """
+    count = len(values)
+    cx, cy = width / 2, height / 2
+    radius = min(width, height) / 2 - 90
+    top = _nice_max(max(values) if values else 0)
+
+    def point(index: int, fraction: float):
+        angle = -math.pi / 2 + 2 * math.pi * index / count
+        return cx + radius * fraction * math.cos(angle), cy + radius * fraction * math.sin(angle)
+
+    def polygon(points):
+        return " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+
+    body = []
+    # Grid rings and spokes
+    for ring in range(1, rings + 1):
+        ring_points = [point(i, ring / rings) for i in range(count)]
+        body.append(f'<polygon points="{polygon(ring_points)}" fill="none" stroke="{TEXT_FIELD_BG}" stroke-width="1"/>')
+    for i in range(count):
+        x, y = point(i, 1)
+        body.append(f'<line x1="{cx:.1f}" y1="{cy:.1f}" x2="{x:.1f}" y2="{y:.1f}" stroke="{TEXT_FIELD_BG}" stroke-width="1"/>')
+    body.append(f'<polygon points="{polygon(point(i, 1) for i in range(count))}" fill="none" '
+                f'stroke="{CONTAINER_BG}" stroke-width="1.5"/>')
+
+    # Data
+    data_points = [point(i, min(value / top, 1)) for i, value in enumerate(values)]
+    body.append(f'<polygon points="{polygon(data_points)}" fill="{FILL}" fill-opacity="{FILL_OPACITY}" '
+                f'stroke="{CONTAINER_BG}" stroke-width="3" stroke-linejoin="round"/>')
+
+    # Radial ticks along the first spoke
+    for ring in range(1, rings + 1):
+        x, y = point(0, ring / rings)
+        body.append(f'<text x="{x + 6:.1f}" y="{y + 4:.1f}" font-size="11" fill="{BLACK_TEXT}">'
+                    f'{_number(round(top * ring / rings, 2))}</text>')
+
+    # Axis labels, anchored away from the center
+    for i, label in enumerate(labels):
+        x, y = point(i, 1.12)
+        anchor = "middle" if abs(x - cx) < 1 else ("start" if x > cx else "end")
+        body.append(f'<text x="{x:.1f}" y="{y + 4:.1f}" font-size="13" font-weight="bold" '
+                    f'fill="{BLACK_TEXT}" text-anchor="{anchor}">{escape(label)}</text>')
+    return _svg(width, height, body)
+
+
+def bar_svg(labels: Sequence[str], series: Dict[str, Sequence[float]], width: int = 800, height: int = 600,
+            unit: str = "min", ticks: int = 5) -> bytes:
+    """
+    Draw a stacked bar chart with a legend.
+
+    Args:
+        labels: One label per bar, left to right
+        series: Name -> one value per bar; stacked bottom-up in the given order
+        width: Image width in pixels
+        height: Image height in pixels
+        unit: Suffix for the value axis
+        ticks: Number of value-axis gridlines above zero
+
+    Returns:
+        SVG document as UTF-8 bytes
+    """
+    left, right, top_margin, bottom = 60, 20, 50, 50
+    plot_width, plot_height = width - left - right, height - top_margin - bottom
+    totals = [sum(values[i] for values in series.values()) for i in range(len(labels))]
+    top = _nice_max(max(totals) if totals else 0)
+    slot = plot_width / max(len(labels), 1)
+    bar_width = slot * 0.6
+
+    body = []
+    # Value axis gridlines and ticks
+    for tick in range(ticks + 1):
+        y = top_margin + plot_height * (1 - tick / ticks)
+        body.append(f'<line x1="{left}" y1="{y:.1f}" x2="{width - right}" y2="{y:.1f}" '
+                    f'stroke="{TEXT_FIELD_BG if tick else CONTAINER_BG}" stroke-width="1"/>')
+        body.append(f'<text x="{left - 8}" y="{y + 4:.1f}" font-size="11" fill="{BLACK_TEXT}" text-anchor="end">'
+                    f'{_number(round(top * tick / ticks, 2))}</text>')
+    body.append(f'<text x="{left - 8}" y="{top_margin - 14}" font-size="11" fill="{BLACK_TEXT}" text-anchor="end">'
+                f'{escape(unit)}</text>')
+
+    # Bars
+    for i, label in enumerate(labels):
+        x = left + slot * i + (slot - bar_width) / 2
+        base = top_margin + plot_height
+        for n, values in enumerate(series.values()):
+            bar_height = plot_height * values[i] / top
+            if bar_height <= 0:
+                continue
+            base -= bar_height
+            body.append(f'<rect x="{x:.1f}" y="{base:.1f}" width="{bar_width:.1f}" height="{bar_height:.1f}" '
+                        f'fill="{SERIES_COLORS[n % len(SERIES_COLORS)]}"/>')
+        body.append(f'<text x="{x + bar_width / 2:.1f}" y="{top_margin + plot_height + 20}" font-size="12" '
+                    f'fill="{BLACK_TEXT}" text-anchor="middle">{escape(label)}</text>')
+
+    # Legend
+    x = left
+    for n, name in enumerate(series):
+        body.append(f'<rect x="{x}" y="14" width="12" height="12" fill="{SERIES_COLORS[n % len(SERIES_COLORS)]}"/>')
+        body.append(f'<text x="{x + 18}" y="25" font-size="12" fill="{BLACK_TEXT}">{escape(name)}</text>')
+        x += 30 + 8 * len(name)
+    return _svg(width, height, body)
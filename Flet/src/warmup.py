@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Optional, Dict, Any, Callable
+
+try:
+    from .llm_config import KEEP_ALIVE
+except ImportError:
+    from llm_config import KEEP_ALIVE
+
+import ollama
+
+
+class ModelWarmup:
+    """
+    Loads the app's models in the background at startup.
+
+    Each model gets its own daemon thread so the window can appear straight
+    away. Ollama models are loaded with an empty prompt, which loads the
+    weights without generating, and pinned in memory for `keep_alive`.
+    Per-model load times and failures are recorded for reporting.
+    """
+
+    def __init__(self, keep_alive: str = KEEP_ALIVE):
+        """
+        Initialize the warm-up manager.
+
+        Args:
+            keep_alive: How long Ollama keeps preloaded models resident
+        """
+        self.keep_alive = keep_alive
+        self.load_times: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._ready: Dict[str, threading.Event] = {}
+        self._started = False
+
+    def add(self, name: str, loader: Callable[[], Any]):
+        """
+        Register a model to preload.
+
+        Args:
+            name: Name used in reports and for wait()
+            loader: Callable that loads and returns the model; returning None counts as a failure,
+                for loaders that report errors that way instead of raising
+        """
+        self._loaders[name] = loader
+        self._ready[name] = threading.Event()
+
+    def add_ollama_model(self, model_name: str):
+        """
+        Register an Ollama model to load and pin with keep_alive.
+
+        Args:
+            model_name: The Ollama model to preload
+        """
+        self.add(model_name, lambda: ollama.generate(model=model_name, prompt="", keep_alive=self.keep_alive))
+
+    def start(self):
+        """Start loading every registered model in the background."""
+        if self._started:
+            return
+        self._started = True
+        for name in self._loaders:
+            threading.Thread(target=self._load, args=(name,), daemon=True).start()
+
+    def _load(self, name: str):
+        start = time.perf_counter()
+        try:
+            if self._loaders[name]() is None:
+                raise RuntimeError("loader returned no model")
+            self.load_times[name] = time.perf_counter() - start
+            print(f"[Warmup] {name} ready in {self.load_times[name]:.2f}s")
+        except Exception as e:
+            self.errors[name] = str(e)
+            print(f"[Warmup] {name} failed to load: {e}")
+        finally:
+            self._ready[name].set()
+
+    def is_ready(self, name: str) -> bool:
+        """Return True once the named model has finished loading (or failed)."""
+        return name in self._ready and self._ready[name].is_set()
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the named model has finished loading.
+
+        Args:
+            name: Name given to add()
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if loading finished within the timeout
+        """
+        if name not in self._ready:
+            return True
+        return self._ready[name].wait(timeout)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Get the warm-up state of every registered model.
+
+        Returns:
+            Dictionary mapping model name to status and load time in seconds
+        """
+        report = {}
+        for name in self._loaders:
+            if name in self.errors:
+                report[name] = {"status": "failed", "error": self.errors[name]}
+            elif name in self.load_times:
+                report[name] = {"status": "ready", "load_time": round(self.load_times[name], 2)}
+            else:
+                report[name] = {"status": "loading" if self._started else "pending"}
+        return report
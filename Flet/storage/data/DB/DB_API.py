@@ -1,149 +1,1038 @@
+import bisect
 import csv
+import glob
 import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator
 import json
 
+try:
+    from .deck_io import detect_format, read_cards, write_cards, card_fields
+    from . import srs
+except ImportError:
+    from deck_io import detect_format, read_cards, write_cards, card_fields
+    import srs
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+SCHEMA_VERSION = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    topic_name TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    time_spend INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_topics_name ON topics(topic_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_topics_date ON topics(date, id);
+
+CREATE TABLE IF NOT EXISTS flashcards (
+    topic_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created_date TEXT NOT NULL,
+    PRIMARY KEY (topic_id, id)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Schema changes after version 1, applied in order by _ensure_schema. Each runs in one transaction.
+MIGRATIONS = {
+    # Statistics aggregates, backfilled from existing rows and kept current by triggers
+    2: """
+CREATE TABLE stats_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    topic_count INTEGER NOT NULL,
+    total_time INTEGER NOT NULL
+);
+INSERT INTO stats_totals (id, topic_count, total_time)
+    SELECT 1, COUNT(*), COALESCE(SUM(time_spend), 0) FROM topics;
+
+CREATE TABLE stats_topic_time (
+    topic_name TEXT PRIMARY KEY,
+    topic_count INTEGER NOT NULL,
+    total_time INTEGER NOT NULL
+);
+CREATE INDEX idx_stats_topic_time_total ON stats_topic_time(total_time);
+INSERT INTO stats_topic_time (topic_name, topic_count, total_time)
+    SELECT topic_name, COUNT(*), SUM(time_spend) FROM topics GROUP BY topic_name;
+
+CREATE TABLE stats_daily (
+    date TEXT PRIMARY KEY,
+    topic_count INTEGER NOT NULL,
+    total_time INTEGER NOT NULL
+);
+INSERT INTO stats_daily (date, topic_count, total_time)
+    SELECT date, COUNT(*), SUM(time_spend) FROM topics GROUP BY date;
+
+CREATE TRIGGER topics_stats_insert AFTER INSERT ON topics BEGIN
+    UPDATE stats_totals SET topic_count = topic_count + 1, total_time = total_time + NEW.time_spend WHERE id = 1;
+    INSERT INTO stats_topic_time (topic_name, topic_count, total_time) VALUES (NEW.topic_name, 1, NEW.time_spend)
+        ON CONFLICT(topic_name) DO UPDATE SET topic_count = topic_count + 1, total_time = total_time + excluded.total_time;
+    INSERT INTO stats_daily (date, topic_count, total_time) VALUES (NEW.date, 1, NEW.time_spend)
+        ON CONFLICT(date) DO UPDATE SET topic_count = topic_count + 1, total_time = total_time + excluded.total_time;
+END;
+
+CREATE TRIGGER topics_stats_delete AFTER DELETE ON topics BEGIN
+    UPDATE stats_totals SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend WHERE id = 1;
+    UPDATE stats_topic_time SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend
+        WHERE topic_name = OLD.topic_name;
+    DELETE FROM stats_topic_time WHERE topic_name = OLD.topic_name AND topic_count <= 0;
+    UPDATE stats_daily SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend WHERE date = OLD.date;
+    DELETE FROM stats_daily WHERE date = OLD.date AND topic_count <= 0;
+END;
+
+CREATE TRIGGER topics_stats_update AFTER UPDATE OF topic_name, date, time_spend ON topics BEGIN
+    UPDATE stats_totals SET total_time = total_time - OLD.time_spend + NEW.time_spend WHERE id = 1;
+    UPDATE stats_topic_time SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend
+        WHERE topic_name = OLD.topic_name;
+    DELETE FROM stats_topic_time WHERE topic_name = OLD.topic_name AND topic_count <= 0;
+    INSERT INTO stats_topic_time (topic_name, topic_count, total_time) VALUES (NEW.topic_name, 1, NEW.time_spend)
+        ON CONFLICT(topic_name) DO UPDATE SET topic_count = topic_count + 1, total_time = total_time + excluded.total_time;
+    UPDATE stats_daily SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend WHERE date = OLD.date;
+    DELETE FROM stats_daily WHERE date = OLD.date AND topic_count <= 0;
+    INSERT INTO stats_daily (date, topic_count, total_time) VALUES (NEW.date, 1, NEW.time_spend)
+        ON CONFLICT(date) DO UPDATE SET topic_count = topic_count + 1, total_time = total_time + excluded.total_time;
+END;
+""",
+    # Give flashcards a stable integer key so the search index can refer to rows across VACUUM
+    3: """
+CREATE TABLE flashcards_v3 (
+    uid INTEGER PRIMARY KEY,
+    topic_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created_date TEXT NOT NULL,
+    UNIQUE (topic_id, id)
+);
+INSERT INTO flashcards_v3 (topic_id, id, question, answer, created_date)
+    SELECT topic_id, id, question, answer, created_date FROM flashcards ORDER BY topic_id, id;
+DROP TABLE flashcards;
+ALTER TABLE flashcards_v3 RENAME TO flashcards;
+""",
+    # Tie flashcards to their topic (cascade delete), allocate ids from a per-topic counter and index
+    # created_date for queries across topics. Cards whose topic no longer exists get a placeholder topic.
+    4: """
+INSERT OR IGNORE INTO topics (id, topic_name, notes, date, time_spend)
+    SELECT topic_id, 'Recovered flashcards ' || topic_id, '', substr(MIN(created_date), 1, 10), 0
+    FROM flashcards WHERE topic_id NOT IN (SELECT id FROM topics) GROUP BY topic_id;
+
+CREATE TABLE flashcards_v4 (
+    uid INTEGER PRIMARY KEY,
+    topic_id INTEGER NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    id INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created_date TEXT NOT NULL,
+    UNIQUE (topic_id, id)
+);
+INSERT INTO flashcards_v4 (uid, topic_id, id, question, answer, created_date)
+    SELECT uid, topic_id, id, question, answer, created_date FROM flashcards;
+DROP TABLE flashcards;
+ALTER TABLE flashcards_v4 RENAME TO flashcards;
+CREATE INDEX idx_flashcards_created ON flashcards(created_date);
+
+CREATE TABLE flashcard_counters (
+    topic_id INTEGER PRIMARY KEY REFERENCES topics(id) ON DELETE CASCADE,
+    next_id INTEGER NOT NULL
+);
+INSERT INTO flashcard_counters (topic_id, next_id)
+    SELECT topic_id, MAX(id) + 1 FROM flashcards GROUP BY topic_id;
+
+-- Keeps the counter ahead of every id inserted, including ones given explicitly (CSV import)
+CREATE TRIGGER flashcards_counter_insert AFTER INSERT ON flashcards BEGIN
+    INSERT INTO flashcard_counters (topic_id, next_id) VALUES (NEW.topic_id, NEW.id + 1)
+        ON CONFLICT(topic_id) DO UPDATE SET next_id = MAX(next_id, excluded.next_id);
+END;
+""",
+    # Study time: raw activity events plus daily and weekly rollups kept current by a trigger. Weeks are
+    # keyed by their Monday. Existing time_spend values are carried into the rollups as 'imported'.
+    5: """
+CREATE TABLE study_events (
+    id INTEGER PRIMARY KEY,
+    topic_id INTEGER NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    activity TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    seconds INTEGER NOT NULL
+);
+CREATE INDEX idx_study_events_topic ON study_events(topic_id, started_at);
+
+CREATE TABLE study_daily (
+    date TEXT NOT NULL,
+    topic_id INTEGER NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    activity TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    PRIMARY KEY (date, topic_id, activity)
+);
+CREATE INDEX idx_study_daily_topic ON study_daily(topic_id);
+
+CREATE TABLE study_weekly (
+    week TEXT NOT NULL,
+    topic_id INTEGER NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    activity TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    PRIMARY KEY (week, topic_id, activity)
+);
+CREATE INDEX idx_study_weekly_topic ON study_weekly(topic_id);
+
+-- Tracked seconds per topic, so time_spend (minutes) can be advanced without losing the remainder
+CREATE TABLE study_totals (
+    topic_id INTEGER PRIMARY KEY REFERENCES topics(id) ON DELETE CASCADE,
+    seconds INTEGER NOT NULL
+);
+
+INSERT INTO study_daily (date, topic_id, activity, seconds)
+    SELECT date, id, 'imported', time_spend * 60 FROM topics WHERE time_spend > 0;
+INSERT INTO study_weekly (week, topic_id, activity, seconds)
+    SELECT date(date, 'weekday 0', '-6 days'), id, 'imported', SUM(time_spend * 60)
+    FROM topics WHERE time_spend > 0 GROUP BY 1, 2;
+
+CREATE TRIGGER study_events_rollup AFTER INSERT ON study_events BEGIN
+    INSERT INTO study_daily (date, topic_id, activity, seconds)
+        VALUES (date(NEW.started_at), NEW.topic_id, NEW.activity, NEW.seconds)
+        ON CONFLICT(date, topic_id, activity) DO UPDATE SET seconds = seconds + excluded.seconds;
+    INSERT INTO study_weekly (week, topic_id, activity, seconds)
+        VALUES (date(NEW.started_at, 'weekday 0', '-6 days'), NEW.topic_id, NEW.activity, NEW.seconds)
+        ON CONFLICT(week, topic_id, activity) DO UPDATE SET seconds = seconds + excluded.seconds;
+    UPDATE topics SET time_spend = time_spend
+        + (COALESCE((SELECT seconds FROM study_totals WHERE topic_id = NEW.topic_id), 0) + NEW.seconds) / 60
+        - COALESCE((SELECT seconds FROM study_totals WHERE topic_id = NEW.topic_id), 0) / 60
+        WHERE id = NEW.topic_id;
+    INSERT INTO study_totals (topic_id, seconds) VALUES (NEW.topic_id, NEW.seconds)
+        ON CONFLICT(topic_id) DO UPDATE SET seconds = seconds + excluded.seconds;
+END;
+""",
+    # Spaced repetition: SM-2 state per card, indexed by due time overall and per topic, plus a review log.
+    # Every card gets a state row when it is created and is due straight away.
+    6: """
+CREATE TABLE card_reviews (
+    card_uid INTEGER PRIMARY KEY REFERENCES flashcards(uid) ON DELETE CASCADE,
+    topic_id INTEGER NOT NULL,
+    due TEXT NOT NULL,
+    interval_days REAL NOT NULL DEFAULT 0,
+    ease REAL NOT NULL DEFAULT 2.5,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    last_review TEXT
+);
+CREATE INDEX idx_card_reviews_due ON card_reviews(due);
+CREATE INDEX idx_card_reviews_topic_due ON card_reviews(topic_id, due);
+INSERT INTO card_reviews (card_uid, topic_id, due) SELECT uid, topic_id, created_date FROM flashcards;
+
+CREATE TRIGGER flashcards_review_insert AFTER INSERT ON flashcards BEGIN
+    INSERT INTO card_reviews (card_uid, topic_id, due) VALUES (NEW.uid, NEW.topic_id, NEW.created_date);
+END;
+
+CREATE TABLE review_log (
+    id INTEGER PRIMARY KEY,
+    card_uid INTEGER NOT NULL REFERENCES flashcards(uid) ON DELETE CASCADE,
+    reviewed_at TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    interval_days REAL NOT NULL
+);
+CREATE INDEX idx_review_log_card ON review_log(card_uid);
+""",
+    # Placeholder topics for recovered flashcards used to be dated the day they were created, which
+    # counted them as studied that day. Date them from their earliest card and recompute the streak.
+    7: """
+UPDATE topics SET date = (SELECT substr(MIN(created_date), 1, 10) FROM flashcards WHERE topic_id = topics.id)
+    WHERE topic_name = 'Recovered flashcards ' || id AND notes = '' AND time_spend = 0
+    AND EXISTS (SELECT 1 FROM flashcards WHERE topic_id = topics.id);
+DELETE FROM meta WHERE key IN ('streak_end', 'streak_length');
+""",
+    # Flag the recovered-flashcard placeholder topics and leave them out of the statistics: the stats
+    # triggers only count real topics, and the aggregates are rebuilt without the placeholders.
+    8: """
+ALTER TABLE topics ADD COLUMN placeholder INTEGER NOT NULL DEFAULT 0;
+UPDATE topics SET placeholder = 1
+    WHERE topic_name = 'Recovered flashcards ' || id AND notes = '' AND time_spend = 0;
+
+DROP TRIGGER topics_stats_insert;
+DROP TRIGGER topics_stats_delete;
+DROP TRIGGER topics_stats_update;
+
+CREATE TRIGGER topics_stats_insert AFTER INSERT ON topics WHEN NEW.placeholder = 0 BEGIN
+    UPDATE stats_totals SET topic_count = topic_count + 1, total_time = total_time + NEW.time_spend WHERE id = 1;
+    INSERT INTO stats_topic_time (topic_name, topic_count, total_time) VALUES (NEW.topic_name, 1, NEW.time_spend)
+        ON CONFLICT(topic_name) DO UPDATE SET topic_count = topic_count + 1, total_time = total_time + excluded.total_time;
+    INSERT INTO stats_daily (date, topic_count, total_time) VALUES (NEW.date, 1, NEW.time_spend)
+        ON CONFLICT(date) DO UPDATE SET topic_count = topic_count + 1, total_time = total_time + excluded.total_time;
+END;
+
+CREATE TRIGGER topics_stats_delete AFTER DELETE ON topics WHEN OLD.placeholder = 0 BEGIN
+    UPDATE stats_totals SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend WHERE id = 1;
+    UPDATE stats_topic_time SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend
+        WHERE topic_name = OLD.topic_name;
+    DELETE FROM stats_topic_time WHERE topic_name = OLD.topic_name AND topic_count <= 0;
+    UPDATE stats_daily SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend WHERE date = OLD.date;
+    DELETE FROM stats_daily WHERE date = OLD.date AND topic_count <= 0;
+END;
+
+-- An update takes the old row out and puts the new one in, each only if it is a real topic
+CREATE TRIGGER topics_stats_update_old AFTER UPDATE OF topic_name, date, time_spend, placeholder ON topics
+WHEN OLD.placeholder = 0 BEGIN
+    UPDATE stats_totals SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend WHERE id = 1;
+    UPDATE stats_topic_time SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend
+        WHERE topic_name = OLD.topic_name;
+    DELETE FROM stats_topic_time WHERE topic_name = OLD.topic_name AND topic_count <= 0;
+    UPDATE stats_daily SET topic_count = topic_count - 1, total_time = total_time - OLD.time_spend WHERE date = OLD.date;
+    DELETE FROM stats_daily WHERE date = OLD.date AND topic_count <= 0;
+END;
+
+CREATE TRIGGER topics_stats_update_new AFTER UPDATE OF topic_name, date, time_spend, placeholder ON topics
+WHEN NEW.placeholder = 0 BEGIN
+    UPDATE stats_totals SET topic_count = topic_count + 1, total_time = total_time + NEW.time_spend WHERE id = 1;
+    INSERT INTO stats_topic_time (topic_name, topic_count, total_time) VALUES (NEW.topic_name, 1, NEW.time_spend)
+        ON CONFLICT(topic_name) DO UPDATE SET topic_count = topic_count + 1, total_time = total_time + excluded.total_time;
+    INSERT INTO stats_daily (date, topic_count, total_time) VALUES (NEW.date, 1, NEW.time_spend)
+        ON CONFLICT(date) DO UPDATE SET topic_count = topic_count + 1, total_time = total_time + excluded.total_time;
+END;
+
+DELETE FROM stats_totals;
+INSERT INTO stats_totals (id, topic_count, total_time)
+    SELECT 1, COUNT(*), COALESCE(SUM(time_spend), 0) FROM topics WHERE placeholder = 0;
+DELETE FROM stats_topic_time;
+INSERT INTO stats_topic_time (topic_name, topic_count, total_time)
+    SELECT topic_name, COUNT(*), SUM(time_spend) FROM topics WHERE placeholder = 0 GROUP BY topic_name;
+DELETE FROM stats_daily;
+INSERT INTO stats_daily (date, topic_count, total_time)
+    SELECT date, COUNT(*), SUM(time_spend) FROM topics WHERE placeholder = 0 GROUP BY date;
+DELETE FROM meta WHERE key IN ('streak_end', 'streak_length');
+""",
+}
+
+RECOVERED_TOPIC_NAME = "Recovered flashcards {}"
+
+# Full-text index over topic names, notes and flashcards. The FTS5 tables read their text from the
+# real tables (external content) and triggers keep them in step with every write.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS topics_fts USING fts5(
+    topic_name, notes, content='topics', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5(
+    question, answer, content='flashcards', content_rowid='uid', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS topics_fts_insert AFTER INSERT ON topics BEGIN
+    INSERT INTO topics_fts (rowid, topic_name, notes) VALUES (NEW.id, NEW.topic_name, NEW.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS topics_fts_delete AFTER DELETE ON topics BEGIN
+    INSERT INTO topics_fts (topics_fts, rowid, topic_name, notes) VALUES ('delete', OLD.id, OLD.topic_name, OLD.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS topics_fts_update AFTER UPDATE OF topic_name, notes ON topics BEGIN
+    INSERT INTO topics_fts (topics_fts, rowid, topic_name, notes) VALUES ('delete', OLD.id, OLD.topic_name, OLD.notes);
+    INSERT INTO topics_fts (rowid, topic_name, notes) VALUES (NEW.id, NEW.topic_name, NEW.notes);
+END;
+
+CREATE TRIGGER IF NOT EXISTS flashcards_fts_insert AFTER INSERT ON flashcards BEGIN
+    INSERT INTO flashcards_fts (rowid, question, answer) VALUES (NEW.uid, NEW.question, NEW.answer);
+END;
+CREATE TRIGGER IF NOT EXISTS flashcards_fts_delete AFTER DELETE ON flashcards BEGIN
+    INSERT INTO flashcards_fts (flashcards_fts, rowid, question, answer) VALUES ('delete', OLD.uid, OLD.question, OLD.answer);
+END;
+CREATE TRIGGER IF NOT EXISTS flashcards_fts_update AFTER UPDATE OF question, answer ON flashcards BEGIN
+    INSERT INTO flashcards_fts (flashcards_fts, rowid, question, answer) VALUES ('delete', OLD.uid, OLD.question, OLD.answer);
+    INSERT INTO flashcards_fts (rowid, question, answer) VALUES (NEW.uid, NEW.question, NEW.answer);
+END;
+"""
+
+# Background compaction: the write-ahead log is checkpointed once it grows past this size, and the
+# snapshot copy is refreshed once it is this old (seconds). Both are checked with a stat after each commit.
+CHECKPOINT_WAL_BYTES = 4 * 1024 * 1024
+SNAPSHOT_INTERVAL = 60 * 60
+
+# Rows per executemany() call when adding flashcards in bulk
+FLASHCARD_BATCH_SIZE = 500
+# Default number of flashcards per get_flashcards_page() call
+FLASHCARD_PAGE_SIZE = 50
+
+# Relative bm25 weight of a match in each column; a hit in the title outranks one in the body
+TOPIC_NAME_WEIGHT = 10.0
+QUESTION_WEIGHT = 2.0
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching every word, each as a prefix."""
+    return " ".join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def _to_int(value, default=0) -> int:
+    try:
+        return int(str(value).strip())
+    except (ValueError, TypeError):
+        return default
+
+
+class _FileLock:
+    """Advisory lock on a file, shared by every process that opens the same database. Not reentrant."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            return self
+        self._file.seek(0)
+        while True:
+            try:
+                # Gives up after about 10 seconds of retrying, so keep waiting
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                return self
+            except OSError:
+                continue
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _move_database(path: str, target: str):
+    """Move a database file together with its -wal and -shm files."""
+    os.replace(path, target)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.replace(path + suffix, target + suffix)
+
+
+def _remove_database(path: str):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _readable(path: str) -> bool:
+    """Return True if the file passes SQLite's quick integrity check."""
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError:
+        return False
+
+
+def _copy_readable(damaged_path: str, db_file_path: str) -> bool:
+    """
+    Rebuild a damaged database from its tables, if every row can still be read. Nothing is lost.
+
+    Rows are read with table scans and indexes and triggers are created
+    afresh, so damage confined to indexes or free pages doesn't matter.
+    Full-text tables are left out; opening the database rebuilds them.
+    """
+    temp_path = f"{db_file_path}.{os.getpid()}.recovering"
+    _remove_database(temp_path)
+    try:
+        conn = sqlite3.connect(temp_path, isolation_level=None)
+        try:
+            conn.execute("ATTACH DATABASE ? AS damaged", (damaged_path,))
+            objects = conn.execute(
+                "SELECT type, name, tbl_name, sql FROM damaged.sqlite_master "
+                "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"
+            ).fetchall()
+            virtual = [name for _, name, _, sql in objects if sql.upper().startswith("CREATE VIRTUAL TABLE")]
+            kept = [(kind, name, sql) for kind, name, table, sql in objects
+                    if not any(table == v or table.startswith(v + "_") or v in sql for v in virtual)]
+            version = conn.execute("PRAGMA damaged.user_version").fetchone()[0]
+            conn.execute("BEGIN")
+            for kind, name, sql in kept:
+                if kind == 'table':
+                    conn.execute(sql)
+                    conn.execute(f'INSERT INTO main."{name}" SELECT * FROM damaged."{name}"')
+            # After the rows, so triggers don't fire on the copy
+            for kind, name, sql in kept:
+                if kind != 'table':
+                    conn.execute(sql)
+            conn.execute("COMMIT")
+            conn.execute("DETACH DATABASE damaged")
+            conn.execute(f"PRAGMA user_version={version}")
+        finally:
+            conn.close()
+        os.replace(temp_path, db_file_path)
+        return True
+    except sqlite3.DatabaseError:
+        _remove_database(temp_path)
+        return False
+
+
+def _salvage_with_shell(damaged_path: str, db_file_path: str) -> bool:
+    """Rebuild a database from the rows the sqlite3 shell's .recover can still read. Rows may be missing."""
+    shell = shutil.which("sqlite3")
+    if shell is None:
+        return False
+    with open(damaged_path, 'rb') as file:
+        header = file.read(100)
+    if not header.startswith(b"SQLite format 3\x00"):
+        return False
+    temp_path = f"{db_file_path}.{os.getpid()}.recovering"
+    _remove_database(temp_path)
+    recover = subprocess.Popen([shell, damaged_path, ".recover"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    load = subprocess.run([shell, temp_path], stdin=recover.stdout, capture_output=True)
+    recover.stdout.close()
+    if recover.wait() != 0 or load.returncode != 0 or not os.path.exists(temp_path):
+        _remove_database(temp_path)
+        return False
+    # .recover doesn't carry the schema version over; it is in the header at offset 60
+    conn = sqlite3.connect(temp_path)
+    try:
+        conn.execute(f"PRAGMA user_version={int.from_bytes(header[60:64], 'big')}")
+    finally:
+        conn.close()
+    os.replace(temp_path, db_file_path)
+    return True
+
+
 class TopicsDB:
-    def __init__(self, csv_file_path: str = "TopicesDB.csv"):
+    """
+    Topic and flashcard storage backed by SQLite.
+
+    The public methods and the shape of the returned rows (dicts of strings,
+    as the old CSV files produced) are unchanged. Existing CSV data next to
+    this file is imported once, the first time the database is opened.
+
+    One instance can be shared by any number of threads. Writes are
+    serialized by a lock inside the process and an advisory lock file across
+    processes, and each runs as a single IMMEDIATE transaction. Reads use a
+    connection per thread; in WAL mode they see the last committed state and
+    never wait for a writer.
+
+    Topics are read from the database once into an in-memory table with
+    id, name and date indexes, kept in step with this instance's writes and
+    reloaded only when SQLite's data_version shows another connection has
+    committed a change.
+
+    Statistics come from aggregate tables (totals, per-topic and per-day
+    sums) that triggers update with every write, plus the current streak
+    stored in meta, so get_statistics() doesn't rescan the history.
+
+    Topic names, notes and flashcards are indexed with SQLite FTS5 for
+    ranked prefix search; without FTS5, search falls back to substring scans.
+    """
+
+    def __init__(self, csv_file_path: str = "TopicesDB.csv", db_file_path: str = "TopicsDB.sqlite3"):
         current_dir = os.path.dirname(os.path.abspath(__file__))
         self.csv_file_path = os.path.join(current_dir, csv_file_path)
+        self.data_dir = os.path.dirname(self.csv_file_path)
+        self.db_file_path = os.path.join(current_dir, db_file_path)
+        self.snapshot_path = os.path.splitext(self.db_file_path)[0] + ".snapshot.sqlite3"
         self.fieldnames = ['id', 'topic_name', 'notes', 'date', 'time_spend']
-        self._ensure_csv_exists()
-    
-    def _ensure_csv_exists(self):
-        if not os.path.exists(self.csv_file_path):
-            with open(self.csv_file_path, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=self.fieldnames)
-                writer.writeheader()
-    
-    def _get_next_id(self) -> int:
-        topics = self.get_all_topics()
-        if not topics:
-            return 1
-        # Filter out topics with invalid IDs and handle None/empty values
-        valid_ids = []
-        for topic in topics:
+        self.flashcard_fieldnames = ['id', 'question', 'answer', 'created_date']
+        self._write_lock = threading.RLock()
+        self._file_lock = _FileLock(self.db_file_path + ".lock")
+        self._cache_lock = threading.RLock()
+        self._readers = threading.local()
+        self._reader_conns: List[sqlite3.Connection] = []
+        self._pending_cache: List[tuple] = []
+        self._topics: Optional[Dict[int, Dict]] = None
+        self._topics_by_name: Dict[str, List[int]] = {}
+        self._topics_by_date: Dict[str, List[int]] = {}
+        self._recent_order: List[tuple] = []
+        self._data_version = None
+        self.has_fts = False
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._snapshot_started = 0.0
+        # Set if the file was unreadable at open: how it was recovered and whether anything was lost
+        self.recovery: Optional[Dict] = None
+        self._conn = None
+        try:
+            self._open()
+        except sqlite3.DatabaseError as e:
+            self._recover(e)
+        # Only used under _cache_lock, to notice commits made by other processes
+        self._watch_conn = self._connect()
+        if self._get_meta('csv_migrated') is None:
+            self.migrate_from_csv()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _open(self):
+        self._conn = self._connect()
+        # Commits append to the write-ahead log and fsync only that, so a save costs the size of the change
+        # and an interrupted write is rolled back on the next open
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        # The log is folded back into the database file by compact(), off the saving thread
+        self._conn.execute("PRAGMA wal_autocheckpoint=0")
+        # Deleting a topic deletes its flashcards
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._write_lock, self._file_lock:
+            self._ensure_schema()
+
+    def _recover(self, error: Exception):
+        """
+        Replace an unreadable database file, keeping as much of it as possible.
+
+        The damaged file and its log are moved aside, then tried in order:
+        a full copy (if every table can still be read, nothing is lost), the
+        sqlite3 shell's .recover (salvages the readable rows) and the last
+        snapshot (loses every write made since it was taken). self.recovery
+        records which one worked, for the UI to report.
+        """
+        # Locked or busy files are not damaged; only corruption is recovered from
+        if isinstance(error, sqlite3.OperationalError) or not os.path.exists(self.db_file_path):
+            raise error
+        self._close_writer()
+        with self._file_lock:
+            # Another process may have recovered the file while we waited
+            if _readable(self.db_file_path):
+                damaged_path = None
+            else:
+                print(f"Database unreadable ({error}); recovering")
+                damaged_path = f"{self.db_file_path}.damaged-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                _move_database(self.db_file_path, damaged_path)
+        if damaged_path is None:
+            self._open()
+            return
+        for source, restore in (("copy", _copy_readable), ("recover", _salvage_with_shell),
+                                ("snapshot", self._copy_snapshot)):
             try:
-                if topic.get('id') and str(topic['id']).strip():
-                    valid_ids.append(int(topic['id']))
-            except (ValueError, TypeError):
+                if not restore(damaged_path, self.db_file_path):
+                    continue
+                self._open()
+            except (sqlite3.Error, OSError, subprocess.SubprocessError) as e:
+                print(f"Database {source} recovery failed: {e}")
+                self._close_writer()
+                _remove_database(self.db_file_path)
                 continue
-        return max(valid_ids) + 1 if valid_ids else 1
-    
+            self.recovery = {
+                'source': source,
+                'data_lost': source != "copy",
+                'error': str(error),
+                'damaged_path': damaged_path,
+                'snapshot_time': (datetime.fromtimestamp(os.path.getmtime(self.snapshot_path)).isoformat(timespec='seconds')
+                                  if source == "snapshot" else None),
+            }
+            print(f"Database recovered by {source}; damaged file kept as {damaged_path}")
+            return
+        _move_database(damaged_path, self.db_file_path)
+        raise error
+
+    def _copy_snapshot(self, damaged_path: str, db_file_path: str) -> bool:
+        if not os.path.exists(self.snapshot_path):
+            return False
+        shutil.copyfile(self.snapshot_path, db_file_path)
+        return True
+
+    def _close_writer(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _ensure_schema(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            self._conn.executescript(SCHEMA)
+            version = 1
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            self._conn.executescript(f"BEGIN;\n{MIGRATIONS[target]}\nPRAGMA user_version={target};\nCOMMIT;")
+        if self._get_meta('streak_end', self._conn) is None:
+            with self._conn:
+                self._update_streak()
+        self.has_fts = self._ensure_search_index()
+
+    def _ensure_search_index(self) -> bool:
+        """Create the full-text index if this SQLite has FTS5. Returns False if search must fall back to scans."""
+        try:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'topics_fts'"
+            ).fetchone()
+            self._conn.executescript(f"BEGIN;\n{SEARCH_SCHEMA}\nCOMMIT;")
+        except sqlite3.OperationalError as e:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            print(f"Full-text search unavailable, using substring search: {e}")
+            return False
+        if not exists:
+            with self._conn:
+                self._conn.execute("INSERT INTO topics_fts (topics_fts) VALUES ('rebuild')")
+                self._conn.execute("INSERT INTO flashcards_fts (flashcards_fts) VALUES ('rebuild')")
+        return True
+
+    # Connections
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's read-only connection, opened on first use and closed when the thread ends."""
+        conn = getattr(self._readers, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            self._readers.conn = conn
+            with self._cache_lock:
+                self._reader_conns.append(conn)
+            # Short-lived UI threads would otherwise each leave a connection (and its file handles) open
+            weakref.finalize(threading.current_thread(), self._close_reader, conn)
+        return conn
+
+    def _close_reader(self, conn: sqlite3.Connection):
+        with self._cache_lock:
+            if conn not in self._reader_conns:
+                # Already closed by close()
+                return
+            self._reader_conns.remove(conn)
+        conn.close()
+
+    @contextmanager
+    def _writing(self):
+        """
+        Run one write transaction on the writer connection.
+
+        Holds the in-process write lock and the cross-process lock file for
+        the whole read-modify-write cycle, and starts with BEGIN IMMEDIATE
+        so SQLite's own write lock is taken before anything is read.
+        Changes queued with _queue_cache_update() reach the in-memory table
+        only once the commit has succeeded.
+        """
+        with self._write_lock, self._file_lock:
+            self._pending_cache = []
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                self._pending_cache = []
+                raise
+            self._apply_pending_cache()
+            self._note_write()
+
+    def _get_meta(self, key: str, conn: Optional[sqlite3.Connection] = None) -> Optional[str]:
+        conn = conn or self._reader()
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _topic_to_dict(self, row) -> Dict:
+        return {
+            'id': str(row['id']),
+            'topic_name': row['topic_name'],
+            'notes': row['notes'],
+            'date': row['date'],
+            'time_spend': str(row['time_spend'])
+        }
+
+    def _flashcard_to_dict(self, row) -> Dict:
+        return {
+            'id': str(row['id']),
+            'question': row['question'],
+            'answer': row['answer'],
+            'created_date': row['created_date']
+        }
+
+    # In-memory topic table
+    def _topics_table(self) -> Dict[int, Dict]:
+        """Return the loaded topic table, reloading it if another process has committed. Call under _cache_lock."""
+        # The watch connection never writes, so data_version moves for every commit including ours;
+        # _apply_pending_cache() records the version after our own commits
+        version = self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._topics is None or version != self._data_version:
+            self._topics = {}
+            self._topics_by_name = {}
+            self._topics_by_date = {}
+            self._recent_order = []
+            for row in self._watch_conn.execute("SELECT * FROM topics ORDER BY id"):
+                self._cache_put(self._topic_to_dict(row), row['placeholder'])
+            self._data_version = version
+        return self._topics
+
+    def _cache_put(self, topic: Dict, placeholder: bool = False):
+        topic_id = int(topic['id'])
+        if topic_id in self._topics:
+            self._cache_remove(topic_id)
+        self._topics[topic_id] = topic
+        bisect.insort(self._topics_by_name.setdefault(topic['topic_name'].lower(), []), topic_id)
+        # Placeholder topics for recovered flashcards can be looked up but aren't recent or today's topics
+        if placeholder:
+            return
+        bisect.insort(self._topics_by_date.setdefault(topic['date'], []), topic_id)
+        bisect.insort(self._recent_order, (topic['date'], topic_id))
+
+    def _cache_remove(self, topic_id: int):
+        topic = self._topics.pop(topic_id, None)
+        if topic is None:
+            return
+        for index, key in ((self._topics_by_name, topic['topic_name'].lower()), (self._topics_by_date, topic['date'])):
+            ids = index.get(key, [])
+            if topic_id in ids:
+                ids.remove(topic_id)
+            if not ids:
+                index.pop(key, None)
+        position = bisect.bisect_left(self._recent_order, (topic['date'], topic_id))
+        if position < len(self._recent_order) and self._recent_order[position] == (topic['date'], topic_id):
+            del self._recent_order[position]
+
+    def _queue_cache_update(self, topic_id: int, row=None):
+        """Record a topic write (row=None for a delete) to apply to the in-memory table after commit."""
+        self._pending_cache.append((topic_id, row))
+
+    def _apply_pending_cache(self):
+        pending, self._pending_cache = self._pending_cache, []
+        with self._cache_lock:
+            if self._topics is None:
+                return
+            for topic_id, row in pending:
+                if row is None:
+                    self._cache_remove(topic_id)
+                else:
+                    self._cache_put(self._topic_to_dict(row), row['placeholder'])
+            # Still under the lock file, so no other process can have committed since our commit
+            self._data_version = self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # Compaction
+    def _note_write(self):
+        """After a commit, start a background compaction if the log has grown or the snapshot is due."""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        # The snapshot's mtime is shared with other processes; _snapshot_started stops retrying a failing one
+        last_snapshot = max(_mtime(self.snapshot_path), self._snapshot_started)
+        snapshot_due = time.time() - last_snapshot >= SNAPSHOT_INTERVAL
+        if not snapshot_due and _size(self.db_file_path + "-wal") < CHECKPOINT_WAL_BYTES:
+            return
+        if snapshot_due:
+            self._snapshot_started = time.time()
+        self._compaction_thread = threading.Thread(target=self.compact, args=(snapshot_due,), daemon=True)
+        self._compaction_thread.start()
+
+    def compact(self, snapshot: bool = True) -> Dict:
+        """
+        Checkpoint the write-ahead log into the database file and truncate it.
+
+        Runs on its own connection so readers and writers carry on meanwhile.
+        With snapshot=True a consistent copy of the database is also written
+        to a temporary file and renamed over snapshot_path, so the snapshot
+        is always either the previous complete copy or the new one. The
+        temporary name is unique to this process and thread.
+        """
+        conn = sqlite3.connect(self.db_file_path, timeout=5)
+        temp_path = f"{self.snapshot_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            busy, log_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            if snapshot:
+                conn.execute("VACUUM INTO ?", (temp_path,))
+                os.replace(temp_path, self.snapshot_path)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Compaction failed: {e}")
+            _remove_database(temp_path)
+            return {'busy': True, 'log_pages': 0, 'checkpointed': 0}
+        finally:
+            conn.close()
+        return {'busy': bool(busy), 'log_pages': log_pages, 'checkpointed': checkpointed}
+
+    # Statistics aggregates
+    def _update_streak(self):
+        """Store the run of consecutive study days ending at the latest one. Call inside the write transaction."""
+        latest = self._conn.execute("SELECT MAX(date) FROM stats_daily").fetchone()[0]
+        length = 0
+        if latest:
+            day = datetime.strptime(latest, '%Y-%m-%d').date()
+            # Walks only the current run, not the whole history
+            while self._conn.execute(
+                "SELECT 1 FROM stats_daily WHERE date = ?", (day.strftime('%Y-%m-%d'),)
+            ).fetchone():
+                length += 1
+                day -= timedelta(days=1)
+        self._set_meta('streak_end', latest or '')
+        self._set_meta('streak_length', str(length))
+
+    def _current_streak(self, conn: sqlite3.Connection) -> int:
+        # A streak only counts if its last day is today
+        if self._get_meta('streak_end', conn) != datetime.now().strftime('%Y-%m-%d'):
+            return 0
+        return _to_int(self._get_meta('streak_length', conn))
+
+    # Migration
+    def migrate_from_csv(self) -> Dict:
+        """Import TopicesDB.csv and every flashcards_{id}.csv in one transaction. Runs once per database."""
+        migrated = {'topics': 0, 'flashcards': 0}
+        with self._writing() as conn:
+            if self._get_meta('csv_migrated', conn) is not None:
+                return migrated
+            if os.path.exists(self.csv_file_path):
+                with open(self.csv_file_path, 'r', newline='', encoding='utf-8') as file:
+                    for row in csv.DictReader(file):
+                        topic_id = _to_int(row.get('id'), default=None)
+                        conn.execute(
+                            "INSERT OR IGNORE INTO topics (id, topic_name, notes, date, time_spend) VALUES (?, ?, ?, ?, ?)",
+                            (topic_id, row.get('topic_name') or '', row.get('notes') or '',
+                             row.get('date') or datetime.now().strftime('%Y-%m-%d'), _to_int(row.get('time_spend')))
+                        )
+                        migrated['topics'] += 1
+            for file_path in glob.glob(os.path.join(self.data_dir, "flashcards_*.csv")):
+                match = re.search(r'flashcards_(\d+)\.csv$', file_path)
+                if not match:
+                    continue
+                topic_id = int(match.group(1))
+                # Keep cards whose topic is gone reachable (and satisfy the foreign key)
+                recovered = conn.execute(
+                    "INSERT OR IGNORE INTO topics (id, topic_name, notes, date, time_spend, placeholder) "
+                    "VALUES (?, ?, '', ?, 0, 1)",
+                    (topic_id, RECOVERED_TOPIC_NAME.format(topic_id), datetime.now().strftime('%Y-%m-%d'))
+                ).rowcount
+                with open(file_path, 'r', newline='', encoding='utf-8') as file:
+                    for row in csv.DictReader(file):
+                        card_id = _to_int(row.get('id'), default=None)
+                        if card_id is None:
+                            continue
+                        conn.execute(
+                            "INSERT OR IGNORE INTO flashcards (topic_id, id, question, answer, created_date) VALUES (?, ?, ?, ?, ?)",
+                            (topic_id, card_id, row.get('question') or '', row.get('answer') or '',
+                             row.get('created_date') or datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                        )
+                        migrated['flashcards'] += 1
+                if recovered:
+                    # Date the placeholder from its cards, so it doesn't count as a topic studied today
+                    conn.execute(
+                        "UPDATE topics SET date = COALESCE((SELECT substr(MIN(created_date), 1, 10) FROM flashcards "
+                        "WHERE topic_id = ?), date) WHERE id = ?", (topic_id, topic_id)
+                    )
+            self._update_streak()
+            self._set_meta('csv_migrated', datetime.now().isoformat(timespec='seconds'))
+        # Rows came in by id, not through the cache; load them fresh on next read
+        with self._cache_lock:
+            self._topics = None
+        return migrated
+
     def create_topic(self, topic_name: str, notes: str = "", time_spend: int = 0) -> Dict:
-        topic_id = self._get_next_id()
         current_date = datetime.now().strftime('%Y-%m-%d')
-        
-        new_topic = {
+        with self._writing() as conn:
+            cursor = conn.execute(
+                "INSERT INTO topics (topic_name, notes, date, time_spend) VALUES (?, ?, ?, ?)",
+                (topic_name, notes, current_date, _to_int(time_spend))
+            )
+            topic_id = cursor.lastrowid
+            self._queue_cache_update(topic_id, conn.execute("SELECT * FROM topics WHERE id = ?", (topic_id,)).fetchone())
+            self._update_streak()
+
+        return {
             'id': str(topic_id),
             'topic_name': topic_name,
             'notes': notes,
             'date': current_date,
             'time_spend': str(time_spend)
         }
-        
-        with open(self.csv_file_path, 'a', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=self.fieldnames)
-            writer.writerow(new_topic)
-        
-        return new_topic
-    
+
     def get_all_topics(self) -> List[Dict]:
-        topics = []
-        try:
-            with open(self.csv_file_path, 'r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    topics.append(row)
-        except FileNotFoundError:
-            pass
-        return topics
-    
+        with self._cache_lock:
+            topics = self._topics_table()
+            return [dict(topics[topic_id]) for topic_id in sorted(topics)]
+
     def get_topic_by_id(self, topic_id: int) -> Optional[Dict]:
-        topics = self.get_all_topics()
-        for topic in topics:
-            try:
-                if topic.get('id') and str(topic['id']).strip() and int(topic['id']) == topic_id:
-                    return topic
-            except (ValueError, TypeError):
-                continue
-        return None
-    
+        with self._cache_lock:
+            topic = self._topics_table().get(topic_id)
+            return dict(topic) if topic else None
+
     def get_topic_by_name(self, topic_name: str) -> Optional[Dict]:
-        topics = self.get_all_topics()
-        for topic in topics:
-            if topic['topic_name'].lower() == topic_name.lower():
-                return topic
-        return None
-    
+        with self._cache_lock:
+            topics = self._topics_table()
+            ids = self._topics_by_name.get(topic_name.lower())
+            return dict(topics[ids[0]]) if ids else None
+
     def update_topic(self, topic_id: int, **kwargs) -> Optional[Dict]:
-        topics = self.get_all_topics()
-        updated_topic = None
-        
-        for topic in topics:
-            try:
-                if topic.get('id') and str(topic['id']).strip() and int(topic['id']) == topic_id:
-                    for key, value in kwargs.items():
-                        if key in self.fieldnames and key != 'id':
-                            topic[key] = str(value)
-                    updated_topic = topic
-                    break
-            except (ValueError, TypeError):
-                continue
-        
-        if updated_topic:
-            self._write_all_topics(topics)
-        
-        return updated_topic
-    
+        updates = {key: value for key, value in kwargs.items() if key in self.fieldnames and key != 'id'}
+        if not updates:
+            return self.get_topic_by_id(topic_id)
+        if 'time_spend' in updates:
+            updates['time_spend'] = _to_int(updates['time_spend'])
+        # Editing a recovered-flashcard placeholder makes it a real topic, counted in the statistics
+        assignments = ", ".join(f"{key} = ?" for key in updates) + ", placeholder = 0"
+        with self._writing() as conn:
+            was_placeholder = conn.execute("SELECT placeholder FROM topics WHERE id = ?", (topic_id,)).fetchone()
+            conn.execute(f"UPDATE topics SET {assignments} WHERE id = ?", (*updates.values(), topic_id))
+            if 'date' in updates or (was_placeholder and was_placeholder[0]):
+                self._update_streak()
+            row = conn.execute("SELECT * FROM topics WHERE id = ?", (topic_id,)).fetchone()
+            if row:
+                self._queue_cache_update(topic_id, row)
+        return self._topic_to_dict(row) if row else None
+
     def delete_topic(self, topic_id: int) -> bool:
-        topics = self.get_all_topics()
-        original_count = len(topics)
-        filtered_topics = []
-        
-        for topic in topics:
-            try:
-                if topic.get('id') and str(topic['id']).strip() and int(topic['id']) != topic_id:
-                    filtered_topics.append(topic)
-            except (ValueError, TypeError):
-                # Keep topics with invalid IDs
-                filtered_topics.append(topic)
-        
-        if len(filtered_topics) < original_count:
-            self._write_all_topics(filtered_topics)
-            return True
-        return False
-    
-    def _write_all_topics(self, topics: List[Dict]):
-        with open(self.csv_file_path, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=self.fieldnames)
-            writer.writeheader()
-            writer.writerows(topics)
-    
+        """Delete a topic together with its flashcards."""
+        with self._writing() as conn:
+            cursor = conn.execute("DELETE FROM topics WHERE id = ?", (topic_id,))
+            if cursor.rowcount > 0:
+                self._queue_cache_update(topic_id)
+                self._update_streak()
+        return cursor.rowcount > 0
+
     def get_recent_topics(self, limit: int = 5) -> List[Dict]:
-        topics = self.get_all_topics()
-        # Filter out topics with invalid IDs for sorting
-        valid_topics = []
-        for topic in topics:
-            try:
-                if topic.get('id') and str(topic['id']).strip():
-                    valid_topics.append(topic)
-            except (ValueError, TypeError):
-                continue
-        
-        sorted_topics = sorted(valid_topics, key=lambda x: (x['date'], int(x['id'])), reverse=True)
-        return sorted_topics[:limit]
-    
+        with self._cache_lock:
+            topics = self._topics_table()
+            newest = self._recent_order[-limit:] if limit > 0 else []
+            return [dict(topics[topic_id]) for _, topic_id in reversed(newest)]
+
     def get_today_topics(self) -> List[Dict]:
         today = datetime.now().strftime('%Y-%m-%d')
-        topics = self.get_all_topics()
-        return [topic for topic in topics if topic['date'] == today]
-    
+        with self._cache_lock:
+            topics = self._topics_table()
+            return [dict(topics[topic_id]) for topic_id in self._topics_by_date.get(today, [])]
+
     def get_statistics(self) -> Dict:
-        topics = self.get_all_topics()
-        
-        if not topics:
+        """Read the statistics from the aggregate tables; the cost doesn't grow with history."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        conn = self._reader()
+        # One read transaction, so every figure comes from the same committed state
+        conn.execute("BEGIN")
+        try:
+            total_topics, total_study_time = conn.execute(
+                "SELECT topic_count, total_time FROM stats_totals WHERE id = 1"
+            ).fetchone()
+            today_row = conn.execute("SELECT topic_count FROM stats_daily WHERE date = ?", (today,)).fetchone()
+            most_studied_topic = conn.execute(
+                "SELECT topic_name FROM stats_topic_time ORDER BY total_time DESC LIMIT 1"
+            ).fetchone()
+            study_streak = self._current_streak(conn)
+        finally:
+            conn.rollback()
+        if not total_topics:
             return {
                 'total_topics': 0,
                 'topics_today': 0,
@@ -153,150 +1042,402 @@ class TopicsDB:
                 'most_studied_topic': None,
                 'recent_topics': []
             }
-        
-        total_topics = len(topics)
-        topics_today = len(self.get_today_topics())
-        total_study_time = 0
-        for topic in topics:
-            try:
-                time_spend = topic.get('time_spend', '0')
-                if time_spend and str(time_spend).strip():
-                    total_study_time += int(time_spend)
-            except (ValueError, TypeError):
-                continue
+
         average_study_time = total_study_time / total_topics if total_topics > 0 else 0
-        
-        topic_study_time = {}
-        for topic in topics:
-            try:
-                topic_name = topic['topic_name']
-                time_spend = topic.get('time_spend', '0')
-                if time_spend and str(time_spend).strip():
-                    study_time = int(time_spend)
-                    topic_study_time[topic_name] = topic_study_time.get(topic_name, 0) + study_time
-            except (ValueError, TypeError):
-                continue
-        
-        most_studied_topic = max(topic_study_time.items(), key=lambda x: x[1]) if topic_study_time else None
-        study_dates = sorted(list(set(topic['date'] for topic in topics)), reverse=True)
-        study_streak = self._calculate_streak(study_dates)
         recent_topics = self.get_recent_topics(5)
-        
+
         return {
             'total_topics': total_topics,
-            'topics_today': topics_today,
+            'topics_today': today_row['topic_count'] if today_row else 0,
             'total_study_time': total_study_time,
             'average_study_time': round(average_study_time, 1),
             'study_streak': study_streak,
-            'most_studied_topic': most_studied_topic[0] if most_studied_topic else None,
+            'most_studied_topic': most_studied_topic['topic_name'] if most_studied_topic else None,
             'recent_topics': recent_topics
         }
-    
-    def _calculate_streak(self, study_dates: List[str]) -> int:
-        if not study_dates:
+
+    def search_topics(self, query: str, limit: int = 50) -> List[Dict]:
+        """
+        Find topics whose name or notes contain every word of the query.
+
+        Words match as prefixes ("bay" finds "Bayes") and results are ranked
+        best first, with matches in the topic name weighted above notes.
+        """
+        if not self.has_fts:
+            query_lower = query.lower()
+            return [topic for topic in self.get_all_topics()
+                    if query_lower in topic['topic_name'].lower() or query_lower in topic['notes'].lower()][:limit]
+        match = _fts_query(query)
+        if not match:
+            return []
+        rows = self._reader().execute(
+            "SELECT rowid FROM topics_fts WHERE topics_fts MATCH ? ORDER BY bm25(topics_fts, ?, 1.0) LIMIT ?",
+            (match, TOPIC_NAME_WEIGHT, limit)
+        ).fetchall()
+        with self._cache_lock:
+            topics = self._topics_table()
+            return [dict(topics[row['rowid']]) for row in rows if row['rowid'] in topics]
+
+    def search_flashcards(self, query: str, limit: int = 50) -> List[Dict]:
+        """
+        Find flashcards whose question or answer contains every word of the query.
+
+        Ranked best first like search_topics(). Each result also carries its topic_id.
+        """
+        if not self.has_fts:
+            pattern = f"%{query}%"
+            sql = ("SELECT * FROM flashcards WHERE question LIKE ? OR answer LIKE ? ORDER BY topic_id, id LIMIT ?",
+                   (pattern, pattern, limit))
+        else:
+            match = _fts_query(query)
+            if not match:
+                return []
+            sql = ("SELECT flashcards.* FROM flashcards_fts JOIN flashcards ON flashcards.uid = flashcards_fts.rowid "
+                   "WHERE flashcards_fts MATCH ? ORDER BY bm25(flashcards_fts, ?, 1.0) LIMIT ?",
+                   (match, QUESTION_WEIGHT, limit))
+        rows = self._reader().execute(*sql).fetchall()
+        return [{**self._flashcard_to_dict(row), 'topic_id': str(row['topic_id'])} for row in rows]
+
+    # Study time
+    def record_study_events(self, events: Iterable) -> int:
+        """
+        Store a batch of study events in one transaction.
+
+        Triggers roll each event into the daily and weekly totals and advance
+        the topic's time_spend (in minutes). Events for topics that no longer
+        exist are dropped.
+
+        Args:
+            events: (topic_id, activity, started_at, seconds) tuples, started_at as 'YYYY-MM-DD HH:MM:SS'
+
+        Returns:
+            Number of events stored
+        """
+        events = list(events)
+        if not events:
             return 0
-        
+        with self._writing() as conn:
+            topic_ids = {int(event[0]) for event in events}
+            existing = {row['id'] for row in conn.execute(
+                f"SELECT id FROM topics WHERE id IN ({', '.join('?' * len(topic_ids))})", tuple(topic_ids)
+            )}
+            rows = [(int(topic_id), activity, started_at, int(seconds))
+                    for topic_id, activity, started_at, seconds in events if int(topic_id) in existing]
+            conn.executemany(
+                "INSERT INTO study_events (topic_id, activity, started_at, seconds) VALUES (?, ?, ?, ?)", rows
+            )
+            # time_spend was changed by the trigger; refresh those topics in the in-memory table
+            for topic_id in existing:
+                self._queue_cache_update(topic_id, conn.execute("SELECT * FROM topics WHERE id = ?", (topic_id,)).fetchone())
+        return len(rows)
+
+    def get_study_time_by_topic(self, days: int = 7, limit: Optional[int] = None) -> List[tuple]:
+        """
+        Get minutes studied per topic over the last `days` days (today included), most first.
+
+        Read from the daily rollup, so the cost depends on the number of topics
+        and days in range rather than on the number of events.
+
+        Returns:
+            (topic_name, minutes) tuples
+        """
+        start = (datetime.now().date() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        rows = self._reader().execute(
+            "SELECT topics.topic_name AS topic_name, SUM(study_daily.seconds) AS seconds "
+            "FROM study_daily JOIN topics ON topics.id = study_daily.topic_id "
+            "WHERE study_daily.date >= ? AND topics.placeholder = 0 GROUP BY topics.topic_name ORDER BY seconds DESC LIMIT ?",
+            (start, limit if limit is not None else -1)
+        ).fetchall()
+        return [(row['topic_name'], round(row['seconds'] / 60, 1)) for row in rows]
+
+    def get_daily_study_time(self, days: int = 7, topic_id: Optional[int] = None) -> List[Dict]:
+        """
+        Get minutes studied per day and activity over the last `days` days, oldest first.
+
+        Args:
+            days: Number of days back, today included
+            topic_id: Limit to one topic (default: all topics)
+
+        Returns:
+            Dicts with date, activity and minutes
+        """
+        start = (datetime.now().date() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        sql = "SELECT date, activity, SUM(seconds) AS seconds FROM study_daily WHERE date >= ?"
+        params = [start]
+        if topic_id is not None:
+            sql += " AND topic_id = ?"
+            params.append(topic_id)
+        rows = self._reader().execute(sql + " GROUP BY date, activity ORDER BY date", params).fetchall()
+        return [{'date': row['date'], 'activity': row['activity'], 'minutes': round(row['seconds'] / 60, 1)}
+                for row in rows]
+
+    def get_weekly_study_time(self, weeks: int = 4, topic_id: Optional[int] = None) -> List[Dict]:
+        """
+        Get minutes studied per week and activity over the last `weeks` weeks, oldest first.
+
+        Returns:
+            Dicts with week (the Monday, YYYY-MM-DD), activity and minutes
+        """
         today = datetime.now().date()
-        streak = 0
-        current_date = today
-        
-        for study_date in study_dates:
-            study_date_obj = datetime.strptime(study_date, '%Y-%m-%d').date()
-            
-            if study_date_obj == current_date:
-                streak += 1
-                current_date = current_date - timedelta(days=1)
-            elif study_date_obj < current_date:
-                break
-        
-        return streak
-    
-    def search_topics(self, query: str) -> List[Dict]:
-        topics = self.get_all_topics()
-        query_lower = query.lower()
-        
-        matching_topics = []
-        for topic in topics:
-            if (query_lower in topic['topic_name'].lower() or 
-                query_lower in topic['notes'].lower()):
-                matching_topics.append(topic)
-        
-        return matching_topics
+        start = (today - timedelta(days=today.weekday(), weeks=weeks - 1)).strftime('%Y-%m-%d')
+        sql = "SELECT week, activity, SUM(seconds) AS seconds FROM study_weekly WHERE week >= ?"
+        params = [start]
+        if topic_id is not None:
+            sql += " AND topic_id = ?"
+            params.append(topic_id)
+        rows = self._reader().execute(sql + " GROUP BY week, activity ORDER BY week", params).fetchall()
+        return [{'week': row['week'], 'activity': row['activity'], 'minutes': round(row['seconds'] / 60, 1)}
+                for row in rows]
 
     # Flashcard methods
-    def _get_flashcards_file_path(self, topic_id: int) -> str:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        return os.path.join(current_dir, f"flashcards_{topic_id}.csv")
-    
-    def _ensure_flashcards_csv_exists(self, topic_id: int):
-        file_path = self._get_flashcards_file_path(topic_id)
-        if not os.path.exists(file_path):
-            with open(file_path, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=['id', 'question', 'answer', 'created_date'])
-                writer.writeheader()
-    
+    def _next_flashcard_id(self, conn: sqlite3.Connection, topic_id: int) -> int:
+        # One primary-key lookup; the insert trigger advances the counter
+        row = conn.execute("SELECT next_id FROM flashcard_counters WHERE topic_id = ?", (topic_id,)).fetchone()
+        return row['next_id'] if row else 1
+
     def add_flashcard(self, topic_id: int, question: str, answer: str) -> Dict:
-        self._ensure_flashcards_csv_exists(topic_id)
-        file_path = self._get_flashcards_file_path(topic_id)
-        
-        # Get existing flashcards to determine next ID
-        existing_flashcards = self.get_flashcards_by_topic(topic_id)
-        valid_ids = []
-        for card in existing_flashcards:
-            try:
-                if card.get('id') and str(card['id']).strip():
-                    valid_ids.append(int(card['id']))
-            except (ValueError, TypeError):
-                continue
-        next_id = max(valid_ids) + 1 if valid_ids else 1
-        
-        new_flashcard = {
+        created_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._writing() as conn:
+            next_id = self._next_flashcard_id(conn, topic_id)
+            conn.execute(
+                "INSERT INTO flashcards (topic_id, id, question, answer, created_date) VALUES (?, ?, ?, ?, ?)",
+                (topic_id, next_id, question, answer, created_date)
+            )
+
+        return {
             'id': str(next_id),
             'question': question,
             'answer': answer,
-            'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'created_date': created_date
         }
-        
-        with open(file_path, 'a', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=['id', 'question', 'answer', 'created_date'])
-            writer.writerow(new_flashcard)
-        
-        return new_flashcard
-    
+
+    def add_flashcards_bulk(self, topic_id: int, cards: Iterable, batch_size: int = FLASHCARD_BATCH_SIZE) -> int:
+        """
+        Add many flashcards to a topic in one transaction.
+
+        Args:
+            topic_id: Topic to add the cards to
+            cards: (question, answer) tuples, dicts or Flashcard models; may be a generator
+            batch_size: Rows written per executemany() call
+
+        Returns:
+            Number of cards added
+        """
+        created_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        added = 0
+        with self._writing() as conn:
+            first_id = self._next_flashcard_id(conn, topic_id)
+            batch = []
+            for card in cards:
+                question, answer = card_fields(card)
+                batch.append((topic_id, first_id + added, question, answer, created_date))
+                added += 1
+                if len(batch) >= batch_size:
+                    conn.executemany(
+                        "INSERT INTO flashcards (topic_id, id, question, answer, created_date) VALUES (?, ?, ?, ?, ?)", batch
+                    )
+                    batch = []
+            if batch:
+                conn.executemany(
+                    "INSERT INTO flashcards (topic_id, id, question, answer, created_date) VALUES (?, ?, ?, ?, ?)", batch
+                )
+        return added
+
+    def import_flashcards(self, topic_id: int, path: str, fmt: Optional[str] = None) -> int:
+        """
+        Stream a deck file into a topic. The format (csv, json or Anki tsv) comes from fmt or the extension.
+
+        Returns:
+            Number of cards imported
+        """
+        fmt = detect_format(path, fmt)
+        with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+            return self.add_flashcards_bulk(topic_id, read_cards(file, fmt))
+
+    def export_flashcards(self, topic_id: int, path: str, fmt: Optional[str] = None) -> int:
+        """
+        Write a topic's flashcards to a deck file, streaming rows straight from the database.
+
+        JSON output has the same shape as the FlashcardDeck model. The file is
+        written under a temporary name and renamed into place when complete.
+
+        Returns:
+            Number of cards exported
+        """
+        fmt = detect_format(path, fmt)
+        topic = self.get_topic_by_id(topic_id)
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, 'w', newline='', encoding='utf-8') as file:
+                count = write_cards(file, self.iter_flashcards(topic_id), fmt, topic['topic_name'] if topic else "")
+            os.replace(temp_path, path)
+        except BaseException:
+            # Never leave a half-written deck behind
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return count
+
+    def iter_flashcards(self, topic_id: int) -> Iterator[Dict]:
+        """Yield a topic's flashcards in id order without loading them all at once."""
+        for row in self._reader().execute("SELECT * FROM flashcards WHERE topic_id = ? ORDER BY id", (topic_id,)):
+            yield self._flashcard_to_dict(row)
+
+    def get_flashcards_page(self, topic_id: int, after_id: int = 0, limit: int = FLASHCARD_PAGE_SIZE) -> List[Dict]:
+        """
+        Get one page of a topic's flashcards in id order.
+
+        Paging is by cursor on the (topic_id, id) index, so every page costs
+        the same however deep into the deck it is.
+
+        Args:
+            topic_id: The topic
+            after_id: Return cards with an id above this; pass the last id of the previous page (0 for the first)
+            limit: Maximum number of cards to return
+
+        Returns:
+            Flashcard dicts; fewer than `limit` means the end of the deck
+        """
+        rows = self._reader().execute(
+            "SELECT * FROM flashcards WHERE topic_id = ? AND id > ? ORDER BY id LIMIT ?", (topic_id, after_id, limit)
+        ).fetchall()
+        return [self._flashcard_to_dict(row) for row in rows]
+
+    def count_flashcards(self, topic_id: int) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM flashcards WHERE topic_id = ?", (topic_id,)).fetchone()[0]
+
     def get_flashcards_by_topic(self, topic_id: int) -> List[Dict]:
-        file_path = self._get_flashcards_file_path(topic_id)
-        flashcards = []
-        
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r', newline='', encoding='utf-8') as file:
-                    reader = csv.DictReader(file)
-                    for row in reader:
-                        flashcards.append(row)
-            except FileNotFoundError:
-                pass
-        
-        return flashcards
-    
+        rows = self._reader().execute(
+            "SELECT * FROM flashcards WHERE topic_id = ? ORDER BY id", (topic_id,)
+        ).fetchall()
+        return [self._flashcard_to_dict(row) for row in rows]
+
+    def get_flashcards_created_between(self, start: str, end: Optional[str] = None,
+                                       limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get flashcards from every topic created in a date range, newest first.
+
+        Args:
+            start: First date included, as YYYY-MM-DD
+            end: Last date included, as YYYY-MM-DD (default: no upper bound)
+            limit: Maximum number of cards to return
+
+        Returns:
+            Flashcard dicts, each with its topic_id
+        """
+        # Compare against the next day so every time on the end date is included
+        end_bound = (datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d') if end else '9999'
+        rows = self._reader().execute(
+            "SELECT * FROM flashcards WHERE created_date >= ? AND created_date < ? "
+            "ORDER BY created_date DESC, uid DESC LIMIT ?",
+            (start, end_bound, limit if limit is not None else -1)
+        ).fetchall()
+        return [{**self._flashcard_to_dict(row), 'topic_id': str(row['topic_id'])} for row in rows]
+
+    def get_flashcards_this_week(self) -> List[Dict]:
+        """Get every flashcard created since Monday, across all topics."""
+        today = datetime.now().date()
+        return self.get_flashcards_created_between((today - timedelta(days=today.weekday())).strftime('%Y-%m-%d'))
+
+    # Spaced repetition
+    def get_due_flashcards(self, topic_id: Optional[int] = None, limit: int = 20,
+                           now: Optional[datetime] = None) -> List[Dict]:
+        """
+        Get the cards due for review, earliest first, from one topic or all of them.
+
+        Walks the due-time index and stops after `limit` rows, so the cost
+        doesn't depend on the size of the collection.
+
+        Returns:
+            Flashcard dicts with topic_id, due, repetitions and lapses
+        """
+        now_text = (now or datetime.now()).strftime(srs.DATE_FORMAT)
+        sql = ("SELECT flashcards.*, card_reviews.due, card_reviews.repetitions, card_reviews.lapses "
+               "FROM card_reviews JOIN flashcards ON flashcards.uid = card_reviews.card_uid WHERE ")
+        if topic_id is None:
+            rows = self._reader().execute(
+                sql + "card_reviews.due <= ? ORDER BY card_reviews.due LIMIT ?", (now_text, limit)
+            ).fetchall()
+        else:
+            rows = self._reader().execute(
+                sql + "card_reviews.topic_id = ? AND card_reviews.due <= ? ORDER BY card_reviews.due LIMIT ?",
+                (topic_id, now_text, limit)
+            ).fetchall()
+        return [{**self._flashcard_to_dict(row), 'topic_id': str(row['topic_id']), 'due': row['due'],
+                 'repetitions': row['repetitions'], 'lapses': row['lapses']} for row in rows]
+
+    def count_due_flashcards(self, topic_id: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        now_text = (now or datetime.now()).strftime(srs.DATE_FORMAT)
+        if topic_id is None:
+            row = self._reader().execute("SELECT COUNT(*) FROM card_reviews WHERE due <= ?", (now_text,)).fetchone()
+        else:
+            row = self._reader().execute(
+                "SELECT COUNT(*) FROM card_reviews WHERE topic_id = ? AND due <= ?", (topic_id, now_text)
+            ).fetchone()
+        return row[0]
+
+    def get_next_due_time(self, topic_id: Optional[int] = None) -> Optional[str]:
+        """Return when the next card (of a topic, or of any topic) falls due, or None if there are no cards."""
+        if topic_id is None:
+            row = self._reader().execute("SELECT MIN(due) FROM card_reviews").fetchone()
+        else:
+            row = self._reader().execute("SELECT MIN(due) FROM card_reviews WHERE topic_id = ?", (topic_id,)).fetchone()
+        return row[0]
+
+    def review_flashcard(self, topic_id: int, flashcard_id: int, rating: int,
+                         now: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        Record a review and reschedule the card.
+
+        Args:
+            topic_id: The card's topic
+            flashcard_id: The card's id within the topic
+            rating: srs.AGAIN, srs.HARD, srs.GOOD or srs.EASY
+            now: Time of the review (default: now)
+
+        Returns:
+            The card's new review state, or None if the card doesn't exist
+        """
+        now = now or datetime.now()
+        with self._writing() as conn:
+            row = conn.execute(
+                "SELECT card_reviews.* FROM card_reviews JOIN flashcards ON flashcards.uid = card_reviews.card_uid "
+                "WHERE flashcards.topic_id = ? AND flashcards.id = ?", (topic_id, flashcard_id)
+            ).fetchone()
+            if row is None:
+                return None
+            state = srs.schedule(dict(row), rating, now)
+            conn.execute(
+                "UPDATE card_reviews SET due = ?, interval_days = ?, ease = ?, repetitions = ?, lapses = ?, "
+                "last_review = ? WHERE card_uid = ?",
+                (state['due'], state['interval_days'], state['ease'], state['repetitions'], state['lapses'],
+                 state['last_review'], row['card_uid'])
+            )
+            conn.execute(
+                "INSERT INTO review_log (card_uid, reviewed_at, rating, interval_days) VALUES (?, ?, ?, ?)",
+                (row['card_uid'], state['last_review'], rating, state['interval_days'])
+            )
+        return state
+
     def delete_flashcard(self, topic_id: int, flashcard_id: int) -> bool:
-        file_path = self._get_flashcards_file_path(topic_id)
-        flashcards = self.get_flashcards_by_topic(topic_id)
-        original_count = len(flashcards)
-        
-        filtered_flashcards = []
-        for card in flashcards:
-            try:
-                if card.get('id') and str(card['id']).strip() and int(card['id']) != flashcard_id:
-                    filtered_flashcards.append(card)
-            except (ValueError, TypeError):
-                # Keep cards with invalid IDs
-                filtered_flashcards.append(card)
-        
-        if len(filtered_flashcards) < original_count:
-            with open(file_path, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=['id', 'question', 'answer', 'created_date'])
-                writer.writeheader()
-                writer.writerows(filtered_flashcards)
-            return True
-        return False
+        with self._writing() as conn:
+            cursor = conn.execute(
+                "DELETE FROM flashcards WHERE topic_id = ? AND id = ?", (topic_id, flashcard_id)
+            )
+        return cursor.rowcount > 0
+
+    def close(self):
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+        with self._write_lock, self._cache_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns = []
+            self._watch_conn.close()
+            self._conn.close()
+
 
+if __name__ == "__main__":
+    db = TopicsDB()
+    print(f"Database: {db.db_file_path}")
+    print(f"Topics: {len(db.get_all_topics())}")
@@ -0,0 +1,165 @@
+import csv
+import json
+import os
+from typing import Iterable, Iterator, Optional, Tuple, TextIO
+
+FORMATS = ("csv", "json", "tsv")
+READ_CHUNK = 64 * 1024
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """Pick the deck format from an explicit name or the file extension (.txt is treated as Anki TSV)."""
+    fmt = (fmt or os.path.splitext(path)[1].lstrip('.')).lower()
+    if fmt == "txt":
+        fmt = "tsv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported deck format '{fmt}', expected one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def card_fields(card) -> Tuple[str, str]:
+    """Get (question, answer) from a tuple, a dict or an object such as the Flashcard model."""
+    if isinstance(card, (tuple, list)):
+        return str(card[0]), str(card[1])
+    if isinstance(card, dict):
+        return str(card['question']), str(card['answer'])
+    return str(card.question), str(card.answer)
+
+
+# Reading
+def read_cards(file: TextIO, fmt: str) -> Iterator[Tuple[str, str]]:
+    """Yield (question, answer) pairs from an open deck file, one at a time."""
+    if fmt == "csv":
+        for row in csv.DictReader(file):
+            if row.get('question') and row.get('answer'):
+                yield row['question'], row['answer']
+    elif fmt == "tsv":
+        # Anki text exports start with "#key:value" header lines
+        lines = (line for line in file if not line.startswith('#'))
+        for row in csv.reader(lines, delimiter='\t'):
+            if len(row) >= 2 and row[0] and row[1]:
+                yield row[0], row[1]
+    else:
+        for card in _iter_json_cards(file):
+            question, answer = card_fields(card)
+            if question and answer:
+                yield question, answer
+
+
+class _JSONStream:
+    """Decodes one JSON value at a time from a file without reading it all in."""
+
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.file.read(READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Malformed deck JSON: expected '{char}'")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Probably cut off at the end of the buffer; read more and retry
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self) -> Iterator:
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+def _iter_json_cards(file: TextIO) -> Iterator:
+    """Stream cards from a FlashcardDeck object ({"topic": ..., "cards": [...]}) or a bare list of cards."""
+    stream = _JSONStream(file)
+    if stream.peek() == '[':
+        yield from stream.array()
+        return
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'cards':
+            yield from stream.array()
+        else:
+            stream.value()
+        if stream.peek() == ',':
+            stream.pos += 1
+            continue
+        stream.expect('}')
+        return
+
+
+# Writing
+def write_cards(file: TextIO, cards: Iterable, fmt: str, topic: str = "") -> int:
+    """Write cards (dicts from TopicsDB, tuples or Flashcard objects) to an open file. Returns the count."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(file)
+        writer.writerow(['id', 'question', 'answer', 'created_date'])
+        for card in cards:
+            count += 1
+            question, answer = card_fields(card)
+            extra = card if isinstance(card, dict) else {}
+            writer.writerow([extra.get('id', count), question, answer, extra.get('created_date', '')])
+    elif fmt == "tsv":
+        file.write("#separator:tab\n#html:false\n")
+        writer = csv.writer(file, delimiter='\t', lineterminator='\n')
+        for card in cards:
+            count += 1
+            writer.writerow(card_fields(card))
+    else:
+        # Same shape as the FlashcardDeck model, written one card per line
+        file.write('{"topic": ' + json.dumps(topic, ensure_ascii=False) + ', "cards": [')
+        for card in cards:
+            question, answer = card_fields(card)
+            file.write(("\n  " if count == 0 else ",\n  ")
+                       + json.dumps({"question": question, "answer": answer}, ensure_ascii=False))
+            count += 1
+        file.write("\n]}\n")
+    return count
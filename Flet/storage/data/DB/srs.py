@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from typing import Dict
+
+# Answer ratings, as on the study screen
+AGAIN, HARD, GOOD, EASY = 0, 1, 2, 3
+RATINGS = {"again": AGAIN, "hard": HARD, "good": GOOD, "easy": EASY}
+
+# SM-2 answer quality (0-5) for each rating; below 3 counts as a lapse
+QUALITY = {AGAIN: 1, HARD: 3, GOOD: 4, EASY: 5}
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+# A forgotten card comes back within the same session
+RELEARN_DELAY = timedelta(minutes=10)
+HARD_FACTOR = 1.2
+EASY_BONUS = 1.3
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def new_state() -> Dict:
+    """Review state of a card that has never been studied."""
+    return {'interval_days': 0.0, 'ease': INITIAL_EASE, 'repetitions': 0, 'lapses': 0}
+
+
+def schedule(state: Dict, rating: int, now: datetime) -> Dict:
+    """
+    Apply one review to a card's state using SM-2.
+
+    Args:
+        state: interval_days, ease, repetitions and lapses before the review
+        rating: AGAIN, HARD, GOOD or EASY
+        now: Time of the review
+
+    Returns:
+        New state with due and last_review as 'YYYY-MM-DD HH:MM:SS'
+    """
+    if rating not in QUALITY:
+        raise ValueError(f"Unknown rating {rating!r}")
+    quality = QUALITY[rating]
+    interval = float(state['interval_days'])
+    ease = float(state['ease'])
+    repetitions = int(state['repetitions'])
+    lapses = int(state['lapses'])
+
+    if quality < 3:
+        repetitions = 0
+        lapses += 1
+        interval = 0.0
+        due = now + RELEARN_DELAY
+    else:
+        if repetitions == 0:
+            interval = 1.0
+        elif repetitions == 1:
+            interval = 6.0
+        elif rating == HARD:
+            interval = interval * HARD_FACTOR
+        else:
+            interval = interval * ease
+        if rating == EASY:
+            interval *= EASY_BONUS
+        interval = float(max(1, round(interval)))
+        repetitions += 1
+        due = now + timedelta(days=interval)
+
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return {
+        'interval_days': interval,
+        'ease': round(ease, 3),
+        'repetitions': repetitions,
+        'lapses': lapses,
+        'due': due.strftime(DATE_FORMAT),
+        'last_review': now.strftime(DATE_FORMAT),
+    }
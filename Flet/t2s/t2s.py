@@ -1,56 +1,232 @@
 import os
+import sys
+import json
 import subprocess
 import re
 import asyncio
+import queue
+import threading
+import time
 
 # Suppress pygame welcome message - must be set before importing pygame
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame
-from pydub import AudioSegment
 
-async def t2s(text):
+# In-process Piper (onnxruntime) is preferred; the bundled executable is only a fallback
+try:
+    from piper import PiperVoice
+except ImportError:
+    PiperVoice = None
+
+# Get the directory where this script is located
+script_dir = os.path.dirname(os.path.abspath(__file__))
+model_path = os.path.join(script_dir, "en", "en_US-kristin-medium.onnx")
+config_path = model_path + ".json"
+piper_path = os.path.join(script_dir, "piper.exe" if sys.platform == "win32" else "piper")
+
+# Sentences shorter than this are merged with the next one so abbreviations don't produce tiny clips
+MIN_SENTENCE_CHARS = 20
+_SENTENCE_END = re.compile(r'(?<=[.!?;:])\s+|\n+')
+
+_mixer_lock = threading.Lock()
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def clean_text(text):
     # Remove emojis and special characters
     text = re.sub(r'[*./\\?!\n\t]', '', text).strip()
     # Remove emojis using Unicode ranges
     text = re.sub(r'[^\w\s.,!?;:()"\'-]', '', text).strip()
-    
-    # Get the directory where this script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    model_path = os.path.join(script_dir, "en", "en_US-kristin-medium.onnx")
-    piper_path = os.path.join(script_dir, "piper.exe")
-    temp_file = os.path.join(script_dir, "temp_audio.wav")
-    
-    print(f"[T2S] Model path: {model_path}")
-    print(f"[T2S] Piper path: {piper_path}")
-    print(f"[T2S] Text to speak: {text[:50]}...")
+    return text
+
+
+class PiperEngine:
+    """
+    Long-lived Piper voice that returns 16-bit mono PCM in memory.
+
+    With the piper-tts package installed the ONNX voice is loaded once and
+    run in-process, so an utterance costs no process spawn, model load or
+    disk round trip. Without it, the bundled executable is used with raw
+    output on stdout, which still avoids temporary files.
+    """
+
+    def __init__(self, model_path=model_path, config_path=config_path):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found at {model_path}")
+        with open(config_path, 'r', encoding='utf-8') as file:
+            self.sample_rate = json.load(file)["audio"]["sample_rate"]
+        self.model_path = model_path
+        self.voice = None
+        if PiperVoice is not None:
+            self.voice = PiperVoice.load(model_path, config_path=config_path)
+        elif not os.path.exists(piper_path):
+            raise FileNotFoundError(f"Install piper-tts or provide the Piper executable at {piper_path}")
+        self._lock = threading.Lock()
+
+    def synthesize(self, text):
+        """Return raw int16 PCM audio for text."""
+        with self._lock:
+            if self.voice is None:
+                return self._synthesize_subprocess(text)
+            if hasattr(self.voice, "synthesize_stream_raw"):
+                # piper-tts < 1.3
+                return b"".join(self.voice.synthesize_stream_raw(text))
+            return b"".join(chunk.audio_int16_bytes for chunk in self.voice.synthesize(text))
+
+    def _synthesize_subprocess(self, text):
+        process = subprocess.Popen([piper_path, "--model", self.model_path, "--output_raw"],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        audio, _ = process.communicate(input=text.encode())
+        if process.returncode != 0:
+            raise RuntimeError(f"Piper process failed with return code {process.returncode}")
+        return audio
+
+
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PiperEngine()
+        return _engine
+
+
+def _ensure_mixer(sample_rate):
+    # Initialise the mixer once, at the voice's sample rate, and keep it for the life of the app
+    with _mixer_lock:
+        if not pygame.mixer.get_init():
+            pygame.mixer.init(frequency=sample_rate, size=-16, channels=1)
+
+
+def stop_playback():
+    if pygame.mixer.get_init():
+        pygame.mixer.stop()
 
-    # Check if files exist
-    if not os.path.exists(model_path):
-        print(f"[T2S] Error: Model file not found at {model_path}")
-        return
-    if not os.path.exists(piper_path):
-        print(f"[T2S] Error: Piper executable not found at {piper_path}")
-        return
 
+class SentenceSplitter:
+    """Cuts streamed text into complete sentences as chunks arrive."""
+
+    def __init__(self, min_chars=MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """Add a chunk and return any sentences it completed."""
+        self._buffer += chunk
+        parts = _SENTENCE_END.split(self._buffer)
+        # The last part has no terminator yet; keep it buffered
+        self._buffer = parts.pop()
+        sentences = []
+        pending = ""
+        for part in parts:
+            pending = f"{pending} {part}".strip()
+            if len(pending) >= self.min_chars:
+                sentences.append(pending)
+                pending = ""
+        if pending:
+            self._buffer = f"{pending} {self._buffer}"
+        return sentences
+
+    def flush(self):
+        """Return whatever is left once the stream has ended."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return [rest] if rest else []
+
+
+class SpeechPipeline:
+    """
+    Speaks text as it streams in.
+
+    Incoming text is cut into sentences. A synthesis thread turns each
+    sentence into audio while a playback thread plays the previous one, so
+    speech starts after the first sentence instead of after the whole reply.
+    Time to first audio is measured from when the pipeline was created.
+    """
+
+    def __init__(self, on_done=None):
+        self.on_done = on_done
+        self.started_at = time.perf_counter()
+        self.time_to_first_audio = None
+        self._splitter = SentenceSplitter()
+        self._sentences = queue.Queue()
+        self._audio = queue.Queue()
+        self._stopped = threading.Event()
+        self._finished = threading.Event()
+        threading.Thread(target=self._synthesis_worker, daemon=True).start()
+        threading.Thread(target=self._playback_worker, daemon=True).start()
+
+    def feed(self, chunk):
+        for sentence in self._splitter.feed(chunk):
+            self._sentences.put(sentence)
+
+    def finish(self):
+        """Signal that no more text is coming."""
+        for sentence in self._splitter.flush():
+            self._sentences.put(sentence)
+        self._sentences.put(None)
+
+    def stop(self):
+        self._stopped.set()
+        self._sentences.put(None)
+        stop_playback()
+
+    def is_active(self):
+        return not self._finished.is_set()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    def _synthesis_worker(self):
+        try:
+            engine = get_engine()
+            while True:
+                sentence = self._sentences.get()
+                if sentence is None or self._stopped.is_set():
+                    break
+                text = clean_text(sentence)
+                if not text:
+                    continue
+                try:
+                    self._audio.put((engine.sample_rate, engine.synthesize(text)))
+                except Exception as e:
+                    print(f"[T2S] Error: {e}")
+        except Exception as e:
+            print(f"[T2S] Error: {e}")
+        finally:
+            self._audio.put(None)
+
+    def _playback_worker(self):
+        try:
+            while True:
+                item = self._audio.get()
+                if item is None:
+                    break
+                if self._stopped.is_set():
+                    continue
+                sample_rate, pcm = item
+                _ensure_mixer(sample_rate)
+                channel = pygame.mixer.Sound(buffer=pcm).play()
+                if self.time_to_first_audio is None:
+                    self.time_to_first_audio = time.perf_counter() - self.started_at
+                    print(f"[T2S] Time to first audio: {self.time_to_first_audio:.2f}s")
+                while channel is not None and channel.get_busy() and not self._stopped.is_set():
+                    time.sleep(0.05)
+        except Exception as e:
+            print(f"[T2S] Error: {e}")
+        finally:
+            self._finished.set()
+            if self.on_done:
+                self.on_done()
+
+
+async def t2s(text):
+    print(f"[T2S] Text to speak: {text[:50]}...")
     try:
-        process = subprocess.Popen([piper_path, "--model", model_path, "--output_file", temp_file], 
-                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        process.communicate(input=text.encode())
-
-        if process.returncode == 0:
-            pygame.mixer.init()
-            pygame.mixer.music.load(temp_file)
-            pygame.mixer.music.play()
-            
-            while pygame.mixer.music.get_busy():
-                await asyncio.sleep(0.1)
-            
-            pygame.mixer.quit()
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-        else:
-            print(f"[T2S] Error: Piper process failed with return code {process.returncode}")
+        pipeline = SpeechPipeline()
+        pipeline.feed(text)
+        pipeline.finish()
+        while pipeline.is_active():
+            await asyncio.sleep(0.1)
     except Exception as e:
         print(f"[T2S] Error: {e}")
-
@@ -0,0 +1,68 @@
+import csv
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'storage', 'data', 'DB'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from DB_API import MIGRATIONS, SCHEMA, TopicsDB
+
+
+@pytest.fixture
+def open_db(tmp_path):
+    """Open a TopicsDB in the temporary directory; call again to reopen it. All are closed afterwards."""
+    opened = []
+
+    def open_db():
+        topics_db = TopicsDB(str(tmp_path / "TopicesDB.csv"), str(tmp_path / "TopicsDB.sqlite3"))
+        opened.append(topics_db)
+        return topics_db
+
+    yield open_db
+    for topics_db in opened:
+        topics_db.close()
+
+
+@pytest.fixture
+def db(open_db):
+    """An empty TopicsDB in a temporary directory."""
+    return open_db()
+
+
+@pytest.fixture
+def write_csv_tree(tmp_path):
+    """Write the pre-SQLite data files: TopicesDB.csv and one flashcards_<topic id>.csv per topic."""
+
+    def write_csv_tree(topics, cards):
+        with open(tmp_path / "TopicesDB.csv", 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=['id', 'topic_name', 'notes', 'date', 'time_spend'])
+            writer.writeheader()
+            writer.writerows(topics)
+        for topic_id, rows in cards.items():
+            with open(tmp_path / f"flashcards_{topic_id}.csv", 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(['id', 'question', 'answer', 'created_date'])
+                writer.writerows(rows)
+
+    return write_csv_tree
+
+
+@pytest.fixture
+def build_database(tmp_path):
+    """Write a database left at an older schema version, as an earlier release would have, for open_db to upgrade."""
+
+    def build_database(version, script=""):
+        conn = sqlite3.connect(tmp_path / "TopicsDB.sqlite3")
+        conn.executescript(SCHEMA)
+        for step in range(2, version + 1):
+            conn.executescript(MIGRATIONS[step])
+        conn.executescript(script)
+        conn.execute(f"PRAGMA user_version={version}")
+        conn.commit()
+        conn.close()
+
+    return build_database
@@ -0,0 +1,64 @@
+from OllamaBackend import MAX_SUMMARY_CHARS, TRIM_TARGET, ChatSession, estimate_tokens
+
+
+def utterance(number, length=76):
+    """A user explanation whose first sentence names it, padded to `length` characters."""
+    text = f"Point {number}. "
+    return text + "x" * (length - len(text))
+
+
+def talk(session, count, start=1):
+    for number in range(start, start + count):
+        session.build_messages(utterance(number))
+        session.record_turn(utterance(number), "y" * 76)
+
+
+def test_history_under_budget_is_kept_whole():
+    session = ChatSession("Tutor.", token_budget=1000)
+    talk(session, 5)
+    assert len(session.turns) == 10
+    assert session.trimmed_turns == 0
+    assert session.summary == ""
+    messages = session.build_messages("Next")
+    assert messages[0] == {"role": "system", "content": "Tutor."}
+    assert messages[1:-1] == session.turns
+    assert messages[-1] == {"role": "user", "content": "Next"}
+
+
+def test_trims_oldest_pairs_to_the_target_and_summarizes_them():
+    session = ChatSession("Tutor.", token_budget=200)
+    talk(session, 5)
+    # Each pair is 40 tokens: the fifth takes the history over budget
+    assert session.trimmed_turns == 3
+    assert session.estimated_tokens() <= int(200 * TRIM_TARGET)
+    assert [turn['content'] for turn in session.turns[::2]] == [utterance(4), utterance(5)]
+    assert session.summary == "Point 1. Point 2. Point 3."
+    assert session.build_messages("Next")[0]['content'].endswith(
+        "Earlier in this session the user explained: Point 1. Point 2. Point 3.")
+
+
+def test_incoming_message_counts_toward_the_budget():
+    session = ChatSession("Tutor.", token_budget=200)
+    talk(session, 4)
+    assert session.trimmed_turns == 0
+    long_input = "Why? " + "z" * 200
+    messages = session.build_messages(long_input)
+    # History plus the new message would be over budget, so history was trimmed before sending
+    assert session.trimmed_turns > 0
+    assert sum(estimate_tokens(message['content']) for message in messages) <= int(200 * TRIM_TARGET)
+    assert messages[-1] == {"role": "user", "content": long_input}
+
+
+def test_latest_exchange_is_always_kept():
+    session = ChatSession(None, token_budget=50)
+    session.record_turn("w" * 400, "Reply")
+    assert len(session.turns) == 2
+    messages = session.build_messages("v" * 400)
+    assert [message['content'] for message in messages] == ["w" * 400, "Reply", "v" * 400]
+
+
+def test_summary_keeps_the_most_recent_points():
+    session = ChatSession("Tutor.", token_budget=100)
+    talk(session, 200)
+    assert len(session.summary) <= MAX_SUMMARY_CHARS
+    assert session.summary.endswith(f"Point {200 - len(session.turns) // 2}.")
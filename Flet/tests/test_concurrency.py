@@ -0,0 +1,94 @@
+import gc
+import multiprocessing
+import threading
+
+from DB_API import TopicsDB
+
+SHARED_TOPIC = "Shared"
+THREADS = 4
+OPS = 25
+
+
+def work(db, worker, errors):
+    shared_id = int(db.get_topic_by_name(SHARED_TOPIC)['id'])
+    for i in range(OPS):
+        try:
+            topic_id = int(db.create_topic(f"Topic {worker}-{i}", f"notes from worker {worker}", 1)['id'])
+            db.add_flashcard(shared_id, f"Question {worker}-{i}", "Answer")
+            db.update_topic(topic_id, time_spend=2)
+            db.get_statistics()
+            db.search_topics(f"worker {worker}")
+        except Exception as e:
+            errors.append(f"worker {worker}: {e!r}")
+
+
+def run_threads(db, first_worker=0):
+    errors = []
+    threads = [threading.Thread(target=work, args=(db, first_worker + n, errors)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def process_main(csv_file_path, db_file_path, results):
+    db = TopicsDB(csv_file_path, db_file_path)
+    try:
+        results.put(run_threads(db, first_worker=1000))
+    finally:
+        db.close()
+
+
+def assert_consistent(db, workers):
+    shared_id = int(db.get_topic_by_name(SHARED_TOPIC)['id'])
+    ids = sorted(int(card['id']) for card in db.get_flashcards_by_topic(shared_id))
+    # Ids come from a per-topic counter: no gaps and no duplicates under contention
+    assert ids == list(range(1, workers * OPS + 1))
+
+    topics = db.get_all_topics()
+    assert len(topics) == workers * OPS + 1
+    stats = db.get_statistics()
+    assert stats['total_topics'] == len(topics)
+    assert stats['total_study_time'] == sum(int(topic['time_spend']) for topic in topics) == workers * OPS * 2
+    if db.has_fts:
+        # Raises if the search index is out of step with its tables
+        with db._writing() as conn:
+            conn.execute("INSERT INTO topics_fts (topics_fts) VALUES ('integrity-check')")
+            conn.execute("INSERT INTO flashcards_fts (flashcards_fts) VALUES ('integrity-check')")
+
+
+def test_concurrent_writers_across_threads(db):
+    db.create_topic(SHARED_TOPIC)
+    assert run_threads(db) == []
+    assert_consistent(db, THREADS)
+
+
+def test_two_processes_share_one_file(db):
+    db.create_topic(SHARED_TOPIC)
+    # spawn, so the child opens its own connections instead of inheriting ours
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=process_main, args=(db.csv_file_path, db.db_file_path, results))
+    process.start()
+    errors = run_threads(db)
+    errors += results.get(timeout=60)
+    process.join(timeout=60)
+    assert process.exitcode == 0
+    assert errors == []
+    assert_consistent(db, THREADS * 2)
+
+
+def test_exited_threads_close_their_reader_connections(db):
+    db.create_topic(SHARED_TOPIC)
+    for _ in range(5):
+        threads = [threading.Thread(target=db.get_statistics) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        del threads, thread
+        gc.collect()
+    with db._cache_lock:
+        open_readers = len(db._reader_conns)
+    assert open_readers <= 1
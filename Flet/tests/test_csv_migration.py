@@ -0,0 +1,43 @@
+from DB_API import RECOVERED_TOPIC_NAME, SCHEMA_VERSION
+
+TOPICS = [
+    {'id': '1', 'topic_name': "Bayes' Theorem", 'notes': "Conditional probability", 'date': '2024-01-15', 'time_spend': '45'},
+    {'id': '2', 'topic_name': "Quantum Mechanics", 'notes': "", 'date': '2024-01-16', 'time_spend': '60'},
+    {'id': '3', 'topic_name': "Neural Networks", 'notes': "Backpropagation", 'date': '2024-01-17', 'time_spend': 'n/a'},
+]
+CARDS = {
+    1: [('1', "What is a prior?", "Belief before the evidence", '2024-01-15 10:00:00'),
+        ('2', "What is a posterior?", "Belief after the evidence", '2024-01-15 10:05:00'),
+        ('', "Row without an id", "Skipped", '2024-01-15 10:06:00')],
+    # Topic 7 is not in TopicesDB.csv
+    7: [('1', "What is a binomial distribution?", "Win/lose trials", '2025-08-06 22:44:58'),
+        ('2', "Its mean?", "n * p", '2025-08-07 08:00:00')],
+}
+
+
+def test_migrates_a_csv_tree(open_db, write_csv_tree):
+    write_csv_tree(TOPICS, CARDS)
+    db = open_db()
+    conn = db._conn
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    topics = {row['id']: dict(row) for row in conn.execute("SELECT * FROM topics")}
+    assert set(topics) == {1, 2, 3, 7}
+    assert topics[3]['time_spend'] == 0
+    assert topics[7]['topic_name'] == RECOVERED_TOPIC_NAME.format(7)
+
+    assert [card['question'] for card in db.get_flashcards_by_topic(1)] == ["What is a prior?", "What is a posterior?"]
+    assert len(db.get_flashcards_by_topic(7)) == 2
+    assert db._get_meta('csv_migrated') is not None
+
+    stats = db.get_statistics()
+    assert stats['total_topics'] == 3
+    assert stats['total_study_time'] == 105
+    assert stats['most_studied_topic'] == "Quantum Mechanics"
+
+
+def test_csv_tree_is_migrated_once(open_db, write_csv_tree):
+    write_csv_tree(TOPICS, CARDS)
+    open_db().close()
+    db = open_db()
+    assert db._conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0] == 4
+    assert db._conn.execute("SELECT COUNT(*) FROM flashcards").fetchone()[0] == 4
@@ -0,0 +1,127 @@
+import io
+import json
+
+import pytest
+
+from deck_io import detect_format, read_cards, write_cards
+
+CARDS = [
+    ("What is Bayes' theorem?", "P(A|B) = P(B|A) P(A) / P(B)"),
+    ("Comma, \"quotes\" and\ttab", "Line one\nline two"),
+    ("Unicode", "Ünïcödé — ✓"),
+]
+
+
+def round_trip(cards, fmt):
+    buffer = io.StringIO(newline='')
+    count = write_cards(buffer, cards, fmt, topic="Statistics")
+    buffer.seek(0)
+    return count, list(read_cards(buffer, fmt))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "tsv", "json"])
+def test_round_trip(fmt):
+    count, cards = round_trip(CARDS, fmt)
+    assert count == len(CARDS)
+    assert cards == CARDS
+
+
+@pytest.mark.parametrize("fmt", ["csv", "tsv", "json"])
+def test_round_trip_empty_deck(fmt):
+    assert round_trip([], fmt) == (0, [])
+
+
+def test_write_accepts_dicts_and_objects():
+    class Flashcard:
+        question, answer = "Q2", "A2"
+
+    cards = [{'id': '7', 'question': "Q1", 'answer': "A1", 'created_date': "2024-01-15 10:00:00"}, Flashcard()]
+    buffer = io.StringIO(newline='')
+    write_cards(buffer, cards, "csv")
+    assert buffer.getvalue().splitlines()[1] == "7,Q1,A1,2024-01-15 10:00:00"
+    buffer.seek(0)
+    assert list(read_cards(buffer, "csv")) == [("Q1", "A1"), ("Q2", "A2")]
+
+
+def test_json_is_a_flashcard_deck():
+    buffer = io.StringIO()
+    write_cards(buffer, CARDS, "json", topic="Statistics")
+    deck = json.loads(buffer.getvalue())
+    assert deck['topic'] == "Statistics"
+    assert [(card['question'], card['answer']) for card in deck['cards']] == CARDS
+
+
+def test_json_bare_list_and_other_keys():
+    bare = json.dumps([{"question": "Q1", "answer": "A1"}, ["Q2", "A2"]])
+    assert list(read_cards(io.StringIO(bare), "json")) == [("Q1", "A1"), ("Q2", "A2")]
+    deck = json.dumps({"meta": {"cards": "not these"}, "cards": [{"question": "Q", "answer": "A"}], "topic": "T"})
+    assert list(read_cards(io.StringIO(deck), "json")) == [("Q", "A")]
+
+
+def test_json_streams_across_chunks(monkeypatch):
+    import deck_io
+    # Tiny chunks make every value straddle a buffer boundary
+    monkeypatch.setattr(deck_io, "READ_CHUNK", 7)
+    cards = [(f"Question {n}", f"Answer {n * 12345}") for n in range(50)]
+    assert round_trip(cards, "json") == (50, cards)
+
+
+def test_json_malformed():
+    with pytest.raises(ValueError):
+        list(read_cards(io.StringIO('{"cards": [{"question": "Q", "answer": "A"}'), "json"))
+
+
+def test_tsv_skips_anki_headers_and_incomplete_rows():
+    text = "#separator:tab\n#html:false\n#notetype column:3\nQ1\tA1\tBasic\nonly a question\n\tA\nQ2\tA2\n"
+    assert list(read_cards(io.StringIO(text), "tsv")) == [("Q1", "A1"), ("Q2", "A2")]
+
+
+def test_csv_skips_rows_missing_a_side():
+    text = "id,question,answer,created_date\n1,Q1,A1,\n2,,A2,\n3,Q3,,\n"
+    assert list(read_cards(io.StringIO(text), "csv")) == [("Q1", "A1")]
+
+
+@pytest.mark.parametrize("path, fmt, expected", [
+    ("deck.csv", None, "csv"),
+    ("deck.JSON", None, "json"),
+    ("anki export.txt", None, "tsv"),
+    ("deck.dat", "tsv", "tsv"),
+])
+def test_detect_format(path, fmt, expected):
+    assert detect_format(path, fmt) == expected
+
+
+def test_detect_format_unsupported():
+    with pytest.raises(ValueError):
+        detect_format("deck.xlsx")
+
+
+@pytest.mark.parametrize("extension", ["csv", "txt", "json"])
+def test_export_import_through_the_database(db, tmp_path, extension):
+    source = db.create_topic("Statistics")
+    target = db.create_topic("Copy")
+    db.add_flashcards_bulk(int(source['id']), CARDS)
+    path = str(tmp_path / f"deck.{extension}")
+
+    assert db.export_flashcards(int(source['id']), path) == len(CARDS)
+    assert db.import_flashcards(int(target['id']), path) == len(CARDS)
+    copied = db.get_flashcards_by_topic(int(target['id']))
+    assert [(card['question'], card['answer']) for card in copied] == CARDS
+
+
+def test_failed_export_leaves_no_files(db, tmp_path, monkeypatch):
+    import DB_API
+
+    def failing_writer(file, cards, fmt, topic=""):
+        file.write("question,answer\n")
+        raise OSError("disk full")
+
+    source = db.create_topic("Statistics")
+    db.add_flashcards_bulk(int(source['id']), CARDS)
+    monkeypatch.setattr(DB_API, "write_cards", failing_writer)
+    path = tmp_path / "deck.csv"
+
+    with pytest.raises(OSError):
+        db.export_flashcards(int(source['id']), str(path))
+    assert not path.exists()
+    assert not (tmp_path / "deck.csv.tmp").exists()
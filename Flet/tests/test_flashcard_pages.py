@@ -0,0 +1,55 @@
+import pytest
+
+
+def read_pages(db, topic_id, limit, after_id=0):
+    pages = []
+    while True:
+        page = db.get_flashcards_page(topic_id, after_id, limit)
+        pages.append(page)
+        if len(page) < limit:
+            return pages
+        after_id = int(page[-1]['id'])
+
+
+@pytest.fixture
+def decks(db):
+    first = int(db.create_topic("Statistics")['id'])
+    second = int(db.create_topic("Calculus")['id'])
+    # Interleave the two topics' cards and leave holes in the first topic's ids
+    for number in range(1, 24):
+        db.add_flashcard(first, f"Statistics {number}", "A")
+        db.add_flashcard(second, f"Calculus {number}", "A")
+    for flashcard_id in (1, 5, 6, 20):
+        db.delete_flashcard(first, flashcard_id)
+    return first, second
+
+
+@pytest.mark.parametrize("limit", [1, 4, 19, 50])
+def test_pages_cover_the_deck_once_in_order(db, decks, limit):
+    first, _ = decks
+    pages = read_pages(db, first, limit)
+    assert all(len(page) == limit for page in pages[:-1])
+    ids = [card['id'] for page in pages for card in page]
+    assert ids == [card['id'] for card in db.get_flashcards_by_topic(first)]
+    assert len(ids) == db.count_flashcards(first) == 19
+
+
+def test_deck_filling_the_last_page_ends_with_an_empty_page(db, decks):
+    _, second = decks
+    pages = read_pages(db, second, 23)
+    assert [len(page) for page in pages] == [23, 0]
+
+
+def test_cursor_survives_writes_between_pages(db, decks):
+    first, _ = decks
+    page = db.get_flashcards_page(first, 0, 5)
+    seen = [card['id'] for card in page]
+    # A card already shown and one not yet shown are deleted, and a new card is added
+    db.delete_flashcard(first, int(seen[0]))
+    db.delete_flashcard(first, 15)
+    added = db.add_flashcard(first, "New", "Card")
+    rest = [card['id'] for page in read_pages(db, first, 5, after_id=int(seen[-1])) for card in page]
+    assert not set(seen) & set(rest)
+    assert '15' not in rest
+    assert rest[-1] == added['id']
+    assert seen[1:] + rest == [card['id'] for card in db.get_flashcards_by_topic(first)]
@@ -0,0 +1,60 @@
+from DB_API import SCHEMA_VERSION
+
+TOPICS = """
+INSERT INTO topics VALUES (1, 'Calculus', '', '2024-02-01', 30);
+INSERT INTO topics VALUES (2, 'Algebra', '', '2024-02-01', 15);
+INSERT INTO topics VALUES (3, 'Calculus', 'Second pass', '2024-02-03', 20);
+INSERT INTO meta VALUES ('csv_migrated', '2024-02-01T09:00:00');
+"""
+
+
+def recount(db):
+    """The aggregates as computed from the topics table itself."""
+    conn = db._conn
+    return (tuple(conn.execute("SELECT COUNT(*), COALESCE(SUM(time_spend), 0) FROM topics").fetchone()),
+            [tuple(row) for row in conn.execute(
+                "SELECT topic_name, COUNT(*), SUM(time_spend) FROM topics GROUP BY topic_name ORDER BY 1")],
+            [tuple(row) for row in conn.execute(
+                "SELECT date, COUNT(*), SUM(time_spend) FROM topics GROUP BY date ORDER BY 1")])
+
+
+def aggregates(db):
+    conn = db._conn
+    return (tuple(conn.execute("SELECT topic_count, total_time FROM stats_totals").fetchone()),
+            [tuple(row) for row in conn.execute("SELECT * FROM stats_topic_time ORDER BY 1")],
+            [tuple(row) for row in conn.execute("SELECT * FROM stats_daily ORDER BY 1")])
+
+
+def test_upgrade_backfills_the_aggregates(build_database, open_db):
+    build_database(1, TOPICS)
+    db = open_db()
+    assert db._conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert aggregates(db) == recount(db)
+
+    stats = db.get_statistics()
+    assert stats['total_topics'] == 3
+    assert stats['total_study_time'] == 65
+    assert stats['average_study_time'] == 21.7
+    assert stats['most_studied_topic'] == "Calculus"
+
+
+def test_aggregates_follow_topic_writes(db):
+    calculus = int(db.create_topic("Calculus", time_spend=30)['id'])
+    algebra = int(db.create_topic("Algebra", time_spend=15)['id'])
+    db.create_topic("Calculus", time_spend=20)
+    assert aggregates(db) == recount(db)
+    assert db.get_statistics()['topics_today'] == 3
+
+    db.update_topic(algebra, topic_name="Linear Algebra", time_spend=60)
+    assert aggregates(db) == recount(db)
+    assert db.get_statistics()['most_studied_topic'] == "Linear Algebra"
+
+    db.update_topic(calculus, date='2024-02-01')
+    assert aggregates(db) == recount(db)
+    assert db.get_statistics()['topics_today'] == 2
+
+    db.delete_topic(algebra)
+    assert aggregates(db) == recount(db)
+    assert ("Linear Algebra", 1, 60) not in aggregates(db)[1]
+    stats = db.get_statistics()
+    assert (stats['total_topics'], stats['total_study_time']) == (2, 50)
@@ -0,0 +1,101 @@
+import os
+from datetime import datetime
+
+from DB_API import RECOVERED_TOPIC_NAME
+
+TOPICS = [
+    {'id': '1', 'topic_name': "Bayes' Theorem", 'notes': "", 'date': '2024-01-15', 'time_spend': '45'},
+    {'id': '2', 'topic_name': "Calculus", 'notes': "", 'date': '2024-01-16', 'time_spend': '60'},
+]
+CARDS = {1: [('1', "What is a prior?", "Belief before the evidence", '2024-01-15 10:00:00')]}
+# Topic 7 is not in TopicesDB.csv
+ORPHANED = {7: [('1', "What is a binomial distribution?", "Win/lose trials", '2025-08-06 22:44:58'),
+                ('2', "Its mean?", "n * p", '2025-08-07 08:00:00')]}
+
+
+def summary(db):
+    stats = db.get_statistics()
+    return ({key: value for key, value in stats.items() if key != 'recent_topics'},
+            [topic['topic_name'] for topic in db.get_recent_topics(5)],
+            db.get_today_topics(),
+            db.get_study_time_by_topic(days=7))
+
+
+def remove_database(db):
+    for path in (db.db_file_path, db.db_file_path + "-wal", db.db_file_path + "-shm", db.snapshot_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_recovery_leaves_the_statistics_unchanged(open_db, write_csv_tree):
+    write_csv_tree(TOPICS, CARDS)
+    db = open_db()
+    without = summary(db)
+    db.close()
+    remove_database(db)
+
+    write_csv_tree(TOPICS, {**CARDS, **ORPHANED})
+    db = open_db()
+    assert summary(db) == without
+    # The cards are still reachable through their placeholder topic
+    assert db.get_topic_by_id(7)['topic_name'] == RECOVERED_TOPIC_NAME.format(7)
+    assert db.get_topic_by_id(7)['date'] == '2025-08-06'
+    assert len(db.get_flashcards_by_topic(7)) == 2
+
+
+def test_studying_a_placeholder_is_not_charted(open_db, write_csv_tree):
+    write_csv_tree(TOPICS, ORPHANED)
+    db = open_db()
+    db.record_study_events([(7, "flashcards", datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 600)])
+    assert db.get_study_time_by_topic(days=7) == []
+    assert db.get_statistics()['total_study_time'] == 105
+
+
+def test_editing_a_placeholder_makes_it_a_topic(open_db, write_csv_tree):
+    write_csv_tree(TOPICS, ORPHANED)
+    db = open_db()
+    db.update_topic(7, topic_name="Probability")
+    stats = db.get_statistics()
+    assert stats['total_topics'] == 3
+    assert [topic['topic_name'] for topic in db.get_recent_topics(1)] == ["Probability"]
+    db.delete_topic(7)
+    assert db.get_statistics()['total_topics'] == 2
+
+
+def test_upgrade_gives_orphaned_cards_a_placeholder(build_database, open_db):
+    # A version 3 database, from before flashcards were tied to their topic
+    build_database(3, """
+INSERT INTO topics VALUES (1, 'Calculus', '', '2024-02-01', 30);
+INSERT INTO flashcards (topic_id, id, question, answer, created_date) VALUES
+    (1, 1, 'Derivative of x^2?', '2x', '2024-02-01 09:00:00'),
+    (5, 1, 'Orphaned', 'Card', '2024-03-02 12:00:00'),
+    (5, 2, 'Also orphaned', 'Card', '2024-03-01 12:00:00');
+INSERT INTO meta VALUES ('csv_migrated', '2024-02-01T09:00:00');
+""")
+    db = open_db()
+    placeholder = db._conn.execute("SELECT topic_name, date, placeholder FROM topics WHERE id = 5").fetchone()
+    assert tuple(placeholder) == (RECOVERED_TOPIC_NAME.format(5), '2024-03-01', 1)
+    assert db.get_statistics()['total_topics'] == 1
+    # New cards continue the topic's ids
+    assert int(db.add_flashcard(5, "New", "Card")['id']) == 3
+    assert int(db.add_flashcard(1, "New", "Card")['id']) == 2
+
+
+def test_upgrade_redates_and_flags_placeholders_created_today(build_database, open_db):
+    # A version 6 database from before placeholders were dated from their cards
+    today = datetime.now().strftime('%Y-%m-%d')
+    build_database(6, f"""
+INSERT INTO topics VALUES (1, 'Calculus', '', '2024-02-01', 30);
+INSERT INTO topics VALUES (5, '{RECOVERED_TOPIC_NAME.format(5)}', '', '{today}', 0);
+INSERT INTO flashcards (topic_id, id, question, answer, created_date) VALUES (5, 1, 'Orphaned', 'Card', '2024-03-01 12:00:00');
+INSERT INTO meta VALUES ('csv_migrated', '2024-02-01T09:00:00');
+INSERT OR REPLACE INTO meta VALUES ('streak_end', '{today}');
+INSERT OR REPLACE INTO meta VALUES ('streak_length', '1');
+""")
+    db = open_db()
+    assert tuple(db._conn.execute("SELECT date, placeholder FROM topics WHERE id = 5").fetchone()) == ('2024-03-01', 1)
+    stats = db.get_statistics()
+    assert stats['total_topics'] == 1
+    assert stats['topics_today'] == 0
+    assert stats['study_streak'] == 0
+    assert [topic['topic_name'] for topic in db.get_recent_topics(5)] == ["Calculus"]
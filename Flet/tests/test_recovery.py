@@ -0,0 +1,101 @@
+import os
+import sqlite3
+
+import pytest
+
+import DB_API
+
+
+def topic_names(db):
+    return sorted(topic['topic_name'] for topic in db.get_all_topics())
+
+
+def overwrite(path, offset, data):
+    with open(path, 'r+b') as file:
+        file.seek(offset)
+        file.write(data)
+
+
+def test_unreadable_file_is_restored_from_the_snapshot(open_db):
+    db = open_db()
+    db.create_topic("Kept")
+    db.compact()
+    db.create_topic("Written after the snapshot")
+    db.close()
+    overwrite(db.db_file_path, 0, b"not a database" * 8)
+
+    db = open_db()
+    assert topic_names(db) == ["Kept"]
+    assert db.recovery['source'] == "snapshot"
+    assert db.recovery['data_lost'] is True
+    assert db.recovery['snapshot_time'] is not None
+    assert os.path.exists(db.recovery['damaged_path'])
+
+
+def test_unreadable_file_without_a_snapshot_is_left_in_place(open_db):
+    db = open_db()
+    db.create_topic("Topic")
+    db.close()
+    os.remove(db.snapshot_path)
+    overwrite(db.db_file_path, 0, b"not a database" * 8)
+    with open(db.db_file_path, 'rb') as file:
+        damaged = file.read()
+
+    with pytest.raises(sqlite3.DatabaseError):
+        open_db()
+    with open(db.db_file_path, 'rb') as file:
+        assert file.read() == damaged
+
+
+def test_damaged_index_is_rebuilt_without_losing_data(open_db):
+    db = open_db()
+    for n in range(20):
+        db.create_topic(f"Topic {n}")
+    db.close()
+    conn = sqlite3.connect(db.db_file_path)
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    root_page = conn.execute("SELECT rootpage FROM sqlite_master WHERE name = 'idx_topics_name'").fetchone()[0]
+    conn.close()
+    overwrite(db.db_file_path, (root_page - 1) * page_size, b"\xff" * page_size)
+
+    db = open_db()
+    db._recover(sqlite3.DatabaseError("database disk image is malformed"))
+    assert db.recovery['source'] == "copy"
+    assert db.recovery['data_lost'] is False
+    assert len(db.get_all_topics()) == 20
+    assert db._conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    # The search index is rebuilt from the copied rows
+    assert [topic['topic_name'] for topic in db.search_topics("Topic 7")][:1] == ["Topic 7"]
+
+
+def test_locked_database_is_not_recovered(db):
+    with pytest.raises(sqlite3.OperationalError):
+        db._recover(sqlite3.OperationalError("database is locked"))
+    assert db.recovery is None
+
+
+def compactions(db):
+    thread = db._compaction_thread
+    if thread is not None:
+        thread.join()
+    return thread
+
+
+def test_compaction_runs_on_snapshot_age_and_log_size(db, monkeypatch):
+    # A new database has no snapshot, so the first commit takes one
+    db.create_topic("First")
+    assert compactions(db) is not None
+    assert os.path.exists(db.snapshot_path)
+    taken = os.path.getmtime(db.snapshot_path)
+
+    monkeypatch.setattr(DB_API, "CHECKPOINT_WAL_BYTES", 1 << 30)
+    started = db._compaction_thread
+    db.create_topic("Second")
+    assert db._compaction_thread is started
+
+    # A large log is checkpointed without taking another snapshot
+    monkeypatch.setattr(DB_API, "CHECKPOINT_WAL_BYTES", 1)
+    db.create_topic("Third")
+    assert compactions(db) is not started
+    assert os.path.getmtime(db.snapshot_path) == taken
+    assert not [name for name in os.listdir(os.path.dirname(db.snapshot_path)) if name.endswith(".tmp")]
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+import question_generator
+from response_cache import ResponseCache, cached_async_chat, cached_chat, deterministic_options, is_deterministic
+
+MESSAGES = [{"role": "user", "content": "Ask me about Bayes' theorem"}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    response_cache = ResponseCache(str(tmp_path / "llm_cache.sqlite3"))
+    yield response_cache
+    response_cache.close()
+
+
+class FakeChat:
+    """Stands in for ollama.chat, replying with a new question on every call."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        return {'message': {'content': f"Question {self.calls}"}}
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.chat_calls = FakeChat()
+
+    async def chat(self, **kwargs):
+        return self.chat_calls(**kwargs)
+
+
+def test_is_deterministic():
+    assert is_deterministic(deterministic_options({"temperature": 0.8, "top_k": 40}))
+    assert not is_deterministic(None)
+    assert not is_deterministic({"temperature": 0.8, "seed": 42})
+    assert not is_deterministic({"temperature": 0})
+
+
+def test_deterministic_request_is_cached(cache):
+    chat = FakeChat()
+    replies = [cached_chat(chat, cache, "gemma3", MESSAGES, options=deterministic_options()) for _ in range(3)]
+    assert replies == ["Question 1"] * 3
+    assert chat.calls == 1
+    assert cache.stats()['hits'] == 2
+
+
+def test_sampled_request_is_not_cached(cache):
+    chat = FakeChat()
+    replies = [cached_chat(chat, cache, "gemma3", MESSAGES, options={"temperature": 0.8}) for _ in range(3)]
+    assert replies == ["Question 1", "Question 2", "Question 3"]
+    assert cache.stats()['entries'] == 0
+
+
+def test_sampled_async_request_is_not_cached(cache):
+    client = FakeAsyncClient()
+
+    async def ask_twice():
+        return [await cached_async_chat(client, cache, "gemma3", MESSAGES, options={"temperature": 0.8})
+                for _ in range(2)]
+
+    assert asyncio.run(ask_twice()) == ["Question 1", "Question 2"]
+    assert cache.stats()['entries'] == 0
+
+
+@pytest.mark.parametrize("deterministic, expected", [
+    (False, ["Question 1", "Question 2"]),
+    (True, ["Question 1", "Question 1"]),
+])
+def test_question_generator_caches_only_when_deterministic(cache, monkeypatch, deterministic, expected):
+    chat = FakeChat()
+    monkeypatch.setattr(question_generator.ollama, "chat", chat)
+    generator = question_generator.QuestionGenerator(cache=cache, deterministic=deterministic)
+    assert [generator.generate_question("Bayes' theorem") for _ in range(2)] == expected
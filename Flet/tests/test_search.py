@@ -0,0 +1,78 @@
+import pytest
+
+from DB_API import _fts_query
+
+
+@pytest.fixture
+def db(db):
+    if not db.has_fts:
+        pytest.skip("SQLite was built without FTS5")
+    return db
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("bay", '"bay"*'),
+    ("Bayes theorem", '"Bayes"* "theorem"*'),
+    # Operators, quotes and column filters are only ever matched as words
+    ('NOT "prior" OR topic_name:x*', '"NOT"* "prior"* "OR"* "topic_name"* "x"*'),
+    ("C++ (NEAR)", '"C"* "NEAR"*'),
+    ("", ""),
+    ('*"-^', ""),
+])
+def test_fts_query(text, expected):
+    assert _fts_query(text) == expected
+
+
+def test_words_match_as_prefixes_name_first(db):
+    db.create_topic("Probability", notes="Bayes' theorem and priors")
+    db.create_topic("Bayesian Statistics")
+    db.create_topic("Calculus", notes="Limits")
+    assert [topic['topic_name'] for topic in db.search_topics("bay")] == ["Bayesian Statistics", "Probability"]
+    assert [topic['topic_name'] for topic in db.search_topics("bayes prior")] == ["Probability"]
+    assert db.search_topics("bayes limits") == []
+
+
+def test_query_syntax_is_not_interpreted(db):
+    db.create_topic("Logic", notes="NOT and OR gates")
+    assert [topic['topic_name'] for topic in db.search_topics('NOT "gates')] == ["Logic"]
+    assert db.search_topics('"') == []
+    assert db.search_flashcards("AND (") == []
+
+
+def test_topic_index_follows_updates_and_deletes(db):
+    topic_id = int(db.create_topic("Calculus", notes="Limits")['id'])
+    db.update_topic(topic_id, topic_name="Analysis", notes="Sequences")
+    assert db.search_topics("calculus") == []
+    assert db.search_topics("limits") == []
+    assert [topic['id'] for topic in db.search_topics("analysis sequences")] == [str(topic_id)]
+
+    db.delete_topic(topic_id)
+    assert db.search_topics("analysis") == []
+
+
+def test_flashcard_index_follows_deletes(db):
+    first = int(db.create_topic("Statistics")['id'])
+    second = int(db.create_topic("Probability")['id'])
+    card = db.add_flashcard(first, "What is a prior?", "Belief before the evidence")
+    db.add_flashcard(second, "What is a posterior?", "Belief after the evidence")
+    assert sorted(result['topic_id'] for result in db.search_flashcards("belief")) == [str(first), str(second)]
+
+    db.delete_flashcard(first, int(card['id']))
+    assert [result['question'] for result in db.search_flashcards("belief")] == ["What is a posterior?"]
+    # Deleting a topic removes its cards from the index too
+    db.delete_topic(second)
+    assert db.search_flashcards("belief") == []
+
+
+def test_upgrade_builds_the_index(build_database, open_db):
+    # A version 2 database, from before the search index
+    build_database(2, """
+INSERT INTO topics VALUES (1, 'Calculus', 'Derivatives', '2024-02-01', 30);
+INSERT INTO flashcards VALUES (1, 1, 'Derivative of x^2?', '2x', '2024-02-01 09:00:00');
+INSERT INTO meta VALUES ('csv_migrated', '2024-02-01T09:00:00');
+""")
+    db = open_db()
+    if not db.has_fts:
+        pytest.skip("SQLite was built without FTS5")
+    assert [topic['topic_name'] for topic in db.search_topics("deriv")] == ["Calculus"]
+    assert [card['answer'] for card in db.search_flashcards("deriv")] == ["2x"]
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import srs
+
+NOW = datetime(2024, 1, 15, 9, 30)
+
+
+def review(ratings, state=None, now=NOW):
+    state = state or srs.new_state()
+    for rating in ratings:
+        state = srs.schedule(state, rating, now)
+    return state
+
+
+def test_good_steps_one_six_then_ease():
+    intervals = []
+    state = srs.new_state()
+    for _ in range(3):
+        state = srs.schedule(state, srs.GOOD, NOW)
+        intervals.append(state['interval_days'])
+    assert intervals == [1.0, 6.0, 15.0]
+    assert state['ease'] == srs.INITIAL_EASE
+    assert state['repetitions'] == 3
+    assert state['due'] == (NOW + timedelta(days=15)).strftime(srs.DATE_FORMAT)
+    assert state['last_review'] == NOW.strftime(srs.DATE_FORMAT)
+
+
+def test_hard_grows_slowly_and_lowers_ease():
+    state = review([srs.GOOD, srs.GOOD, srs.HARD])
+    assert state['interval_days'] == 7.0
+    assert state['ease'] == 2.36
+
+
+def test_easy_bonus_and_ease_increase():
+    state = review([srs.EASY])
+    assert state['interval_days'] == 1.0
+    assert state['ease'] == 2.6
+    assert review([srs.EASY, srs.EASY])['interval_days'] == 8.0
+    assert review([srs.EASY, srs.EASY, srs.EASY])['interval_days'] == 28.0
+
+
+def test_again_is_a_lapse_due_within_the_session():
+    state = review([srs.GOOD, srs.GOOD, srs.GOOD, srs.AGAIN])
+    assert state['interval_days'] == 0.0
+    assert state['repetitions'] == 0
+    assert state['lapses'] == 1
+    assert state['ease'] == 1.96
+    assert state['due'] == (NOW + srs.RELEARN_DELAY).strftime(srs.DATE_FORMAT)
+
+
+def test_relearning_restarts_the_steps():
+    state = review([srs.GOOD, srs.GOOD, srs.AGAIN, srs.GOOD])
+    assert state['interval_days'] == 1.0
+    assert state['repetitions'] == 1
+    assert state['lapses'] == 1
+
+
+def test_ease_never_drops_below_the_floor():
+    assert [review([srs.AGAIN] * n)['ease'] for n in (1, 2, 3, 6)] == [1.96, 1.42, srs.MIN_EASE, srs.MIN_EASE]
+
+
+def test_schedule_does_not_modify_its_input():
+    state = srs.new_state()
+    srs.schedule(state, srs.GOOD, NOW)
+    assert state == srs.new_state()
+
+
+@pytest.mark.parametrize("rating", [-1, 4, "good", None])
+def test_unknown_rating(rating):
+    with pytest.raises(ValueError):
+        srs.schedule(srs.new_state(), rating, NOW)
+
+
+def test_review_flashcard_reschedules_and_logs(db):
+    topic_id = int(db.create_topic("Statistics")['id'])
+    card = db.add_flashcard(topic_id, "Q", "A")
+    later = datetime.now() + timedelta(minutes=1)
+    assert db.count_due_flashcards(topic_id, now=later) == 1
+
+    state = db.review_flashcard(topic_id, int(card['id']), srs.GOOD, now=later)
+    assert state['interval_days'] == 1.0
+    assert db.count_due_flashcards(topic_id, now=later) == 0
+    assert db.get_next_due_time(topic_id) == state['due']
+    assert db.get_due_flashcards(topic_id, now=later + timedelta(days=1))[0]['repetitions'] == 1
+    assert [row[0] for row in db._conn.execute("SELECT rating FROM review_log")] == [srs.GOOD]
+
+
+def test_review_unknown_flashcard(db):
+    topic_id = int(db.create_topic("Statistics")['id'])
+    assert db.review_flashcard(topic_id, 99, srs.GOOD) is None
+
+
+def test_upgrade_schedules_existing_cards(build_database, open_db):
+    # A version 5 database, from before cards had a review state
+    build_database(5, """
+INSERT INTO topics VALUES (1, 'Calculus', '', '2024-02-01', 30);
+INSERT INTO flashcards (topic_id, id, question, answer, created_date) VALUES
+    (1, 1, 'Derivative of x^2?', '2x', '2024-02-01 09:00:00'),
+    (1, 2, 'Integral of 2x?', 'x^2 + C', '2024-02-02 09:00:00');
+INSERT INTO meta VALUES ('csv_migrated', '2024-02-01T09:00:00');
+""")
+    db = open_db()
+    # Every existing card is due from when it was written, oldest first
+    due = db.get_due_flashcards(1, now=datetime(2024, 2, 3))
+    assert [(card['id'], card['due'], card['repetitions']) for card in due] == [
+        ('1', '2024-02-01 09:00:00', 0), ('2', '2024-02-02 09:00:00', 0)]
+    assert db.count_due_flashcards(1, now=datetime(2024, 2, 1, 12)) == 1
@@ -0,0 +1,140 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import study_timer
+from study_timer import StudyTimer
+
+
+class Clock:
+    """Stands in for the time module so spans can be measured without sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class RecordingDB:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    def record_study_events(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("database is busy")
+        self.batches.append(list(events))
+        return len(events)
+
+    def seconds(self):
+        return [event[3] for batch in self.batches for event in batch]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(study_timer, "time", clock)
+    return clock
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_idle_time_is_not_counted(clock):
+    db = RecordingDB()
+    timer = StudyTimer(db, flush_interval=3600, idle_timeout=300)
+    timer.start(1, "quiz")
+    clock.now += 10
+    timer.touch()
+    clock.now += 1000
+    # Counts up to idle_timeout past the last touch, then resumes as a new span
+    timer.touch()
+    clock.now += 20
+    timer.close()
+    assert [(event[0], event[1], event[3]) for event in db.batches[0]] == [(1, "quiz", 310), (1, "quiz", 20)]
+
+
+def test_restarting_the_same_activity_keeps_the_span(clock):
+    db = RecordingDB()
+    timer = StudyTimer(db, flush_interval=3600)
+    timer.start(1, "quiz")
+    clock.now += 30
+    timer.start(1, "quiz")
+    clock.now += 30
+    timer.start(2, "flashcards")
+    clock.now += 0.4
+    # Spans shorter than MIN_EVENT_SECONDS are dropped
+    timer.start(None, "flashcards")
+    timer.close()
+    assert db.seconds() == [60]
+
+
+def test_flushes_once_enough_events_wait(clock):
+    db = RecordingDB()
+    timer = StudyTimer(db, flush_interval=3600, max_buffered=3)
+    for topic_id in (1, 2, 3):
+        timer.start(topic_id, "speaking")
+        clock.now += 5
+    timer.stop()
+    wait_for(lambda: db.batches)
+    assert [event[0] for event in db.batches[0]] == [1, 2, 3]
+    timer.close()
+
+
+def test_periodic_flush_records_the_open_span(clock):
+    db = RecordingDB()
+    timer = StudyTimer(db, flush_interval=0.01)
+    timer.start(1, "speaking")
+    clock.now += 45.5
+    wait_for(lambda: db.batches)
+    # Whole seconds are recorded while the span stays open; the fraction carries over
+    assert db.seconds() == [45]
+    clock.now += 14.5
+    timer.close()
+    assert db.seconds() == [45, 15]
+
+
+def test_failed_writes_are_kept_for_the_next_flush(clock):
+    db = RecordingDB(failures=1)
+    timer = StudyTimer(db, flush_interval=3600)
+    timer.start(1, "quiz")
+    clock.now += 30
+    timer.stop()
+    assert timer.flush() == 0
+    assert timer.flush() == 1
+    assert db.seconds() == [30]
+    timer.close()
+
+
+def test_close_writes_the_open_span(clock, db):
+    topic_id = int(db.create_topic("Calculus", time_spend=10)['id'])
+    timer = StudyTimer(db, flush_interval=3600)
+    timer.start(topic_id, "flashcards")
+    clock.now += 150
+    timer.close()
+    assert not timer._thread.is_alive()
+    # Whole minutes go to time_spend; the daily rollup keeps the seconds
+    assert db.get_topic_by_id(topic_id)['time_spend'] == '12'
+    assert db.get_daily_study_time(days=1) == [
+        {'date': datetime.now().strftime('%Y-%m-%d'), 'activity': "flashcards", 'minutes': 2.5}]
+    timer.close()
+
+
+def test_upgrade_carries_time_spent_into_the_rollups(build_database, open_db):
+    # A version 4 database, from before study events
+    day = (datetime.now() - timedelta(days=2)).strftime('%Y-%m-%d')
+    build_database(4, f"""
+INSERT INTO topics VALUES (1, 'Calculus', '', '{day}', 30);
+INSERT INTO topics VALUES (2, 'Algebra', '', '{day}', 0);
+INSERT INTO meta VALUES ('csv_migrated', '2024-02-01T09:00:00');
+""")
+    db = open_db()
+    assert db.get_daily_study_time(days=7) == [{'date': day, 'activity': "imported", 'minutes': 30.0}]
+    assert db.get_study_time_by_topic(days=7) == [("Calculus", 30.0)]
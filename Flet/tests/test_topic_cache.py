@@ -0,0 +1,42 @@
+import sqlite3
+
+
+def test_reads_are_served_from_memory(db):
+    db.create_topic("Calculus")
+    table = db._topics_table()
+    db.create_topic("Algebra")
+    db.update_topic(1, notes="Limits")
+    assert db.get_topic_by_name("algebra")['id'] == '2'
+    assert db.get_topic_by_id(1)['notes'] == "Limits"
+    # Our own commits are applied in place rather than by reloading the table
+    assert db._topics is table
+
+
+def test_commits_by_another_connection_are_seen(db):
+    db.create_topic("Calculus")
+    db.create_topic("Algebra")
+    table = db._topics_table()
+
+    other = sqlite3.connect(db.db_file_path)
+    with other:
+        other.execute("INSERT INTO topics (id, topic_name, notes, date, time_spend) "
+                      "VALUES (3, 'Geometry', '', '2024-02-01', 10)")
+        other.execute("UPDATE topics SET topic_name = 'Linear Algebra' WHERE id = 2")
+        other.execute("DELETE FROM topics WHERE id = 1")
+    other.close()
+
+    assert [topic['topic_name'] for topic in db.get_all_topics()] == ["Linear Algebra", "Geometry"]
+    assert db.get_topic_by_id(1) is None
+    assert db.get_topic_by_name("algebra") is None
+    assert db.get_topic_by_name("linear algebra")['id'] == '2'
+    assert db._topics is not table
+
+
+def test_instances_sharing_a_file_see_each_others_writes(open_db):
+    first, second = open_db(), open_db()
+    first.create_topic("Calculus")
+    assert second.get_topic_by_name("Calculus")['id'] == '1'
+    second.update_topic(1, topic_name="Integral Calculus")
+    assert first.get_topic_by_id(1)['topic_name'] == "Integral Calculus"
+    first.delete_topic(1)
+    assert second.get_all_topics() == []
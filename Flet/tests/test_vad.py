@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sounddevice")
+pytest.importorskip("faster_whisper")
+
+from s2t.s2t import VAD_FRAME_SECONDS, VAD_MAX_CHUNK, _find_cut
+
+SAMPLERATE = 16000
+FRAME = int(SAMPLERATE * VAD_FRAME_SECONDS)
+rng = np.random.default_rng(0)
+
+
+def speech(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * SAMPLERATE)) / SAMPLERATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return rng.normal(0, 0.001, int(seconds * SAMPLERATE)).astype(np.float32)
+
+
+def signal(*parts):
+    return np.concatenate(parts)
+
+
+def assert_cut_near(cut, seconds):
+    assert cut is not None and cut % FRAME == 0
+    assert abs(cut / SAMPLERATE - seconds) <= 2 * VAD_FRAME_SECONDS
+
+
+def test_waits_for_the_minimum_chunk():
+    assert _find_cut(signal(speech(1), silence(1)), SAMPLERATE) is None
+    assert _find_cut(np.zeros(0, dtype=np.float32), SAMPLERATE) is None
+
+
+def test_cuts_in_the_middle_of_a_pause():
+    cut = _find_cut(signal(speech(4), silence(1), speech(1)), SAMPLERATE)
+    assert_cut_near(cut, 4.5)
+
+
+def test_short_pauses_do_not_end_a_chunk():
+    assert _find_cut(signal(speech(4), silence(0.3), speech(2)), SAMPLERATE) is None
+
+
+def test_pause_before_the_minimum_chunk_is_ignored():
+    audio = signal(speech(1), silence(1), speech(3))
+    assert _find_cut(audio, SAMPLERATE) is None
+    cut = _find_cut(signal(audio, silence(1), speech(0.5)), SAMPLERATE)
+    assert_cut_near(cut, 5.5)
+
+
+def test_cuts_at_the_last_pause():
+    cut = _find_cut(signal(speech(3.5), silence(1), speech(2), silence(2), speech(1)), SAMPLERATE)
+    assert_cut_near(cut, 7.5)
+
+
+def test_forces_a_cut_at_the_quietest_frame_without_a_pause():
+    dip = VAD_MAX_CHUNK - 8
+    audio = signal(speech(dip), speech(0.3, amplitude=0.05), speech(8))
+    assert _find_cut(audio[:int((VAD_MAX_CHUNK - 1) * SAMPLERATE)], SAMPLERATE) is None
+    cut = _find_cut(audio, SAMPLERATE)
+    assert cut is not None and cut % FRAME == 0
+    assert dip <= cut / SAMPLERATE < dip + 0.3